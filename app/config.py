@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     # Groq API Configuration
     GROQ_API_KEY: Optional[str] = os.getenv("GROQ_API_KEY", "")
     GROQ_MODEL: str = "llama-3.1-70b-versatile"
+    GROQ_SMALL_MODEL: str = "llama-3.1-8b-instant"
     GROQ_API_URL: str = "https://api.groq.com/openai/v1/chat/completions"
     
     # MailHog SMTP Configuration
@@ -20,14 +21,132 @@ class Settings(BaseSettings):
     SMTP_FROM_EMAIL: str = os.getenv("SMTP_FROM_EMAIL", "sales@example.com")
     SMTP_FROM_NAME: str = os.getenv("SMTP_FROM_NAME", "Sales Team")
     
+    # SMTP Connection Pool (0 = never recycle a connection)
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", "30"))
+    
+    # Outbound Mail Queue (defaults to <REPORTS_DIR>/mail_queue.sqlite3, 0 per minute = no domain rate cap)
+    MAIL_QUEUE_ENABLED: bool = os.getenv("MAIL_QUEUE_ENABLED", "true").lower() == "true"
+    MAIL_QUEUE_PATH: str = os.getenv("MAIL_QUEUE_PATH", "")
+    MAIL_QUEUE_WORKERS: int = int(os.getenv("MAIL_QUEUE_WORKERS", "4"))
+    MAIL_QUEUE_MAX_ATTEMPTS: int = int(os.getenv("MAIL_QUEUE_MAX_ATTEMPTS", "5"))
+    MAIL_QUEUE_RETRY_BASE_SECONDS: float = float(os.getenv("MAIL_QUEUE_RETRY_BASE_SECONDS", "30"))
+    MAIL_QUEUE_RETRY_MAX_SECONDS: float = float(os.getenv("MAIL_QUEUE_RETRY_MAX_SECONDS", "3600"))
+    MAIL_QUEUE_RETENTION_SECONDS: float = float(os.getenv("MAIL_QUEUE_RETENTION_SECONDS", "604800"))
+    MAIL_DOMAIN_CONCURRENCY: int = int(os.getenv("MAIL_DOMAIN_CONCURRENCY", "2"))
+    MAIL_DOMAIN_PER_MINUTE: int = int(os.getenv("MAIL_DOMAIN_PER_MINUTE", "60"))
+    
     # Application Settings
     CSV_FILE_PATH: str = os.getenv("CSV_FILE_PATH", "/app/data/leads.csv")
     REPORTS_DIR: str = os.getenv("REPORTS_DIR", "/app/reports")
+    CSV_CHUNK_SIZE: int = int(os.getenv("CSV_CHUNK_SIZE", "1000"))
+    
+    # Lead Storage Backend ("csv" or "sqlite"; the database defaults to <CSV_FILE_PATH without extension>.sqlite3)
+    LEAD_STORAGE_BACKEND: str = os.getenv("LEAD_STORAGE_BACKEND", "csv")
+    LEAD_DB_PATH: str = os.getenv("LEAD_DB_PATH", "")
+    
+    # Columnar Lead Files (used when CSV_FILE_PATH ends in .parquet, .arrow or .feather; requires pyarrow)
+    COLUMNAR_COMPRESSION: str = os.getenv("COLUMNAR_COMPRESSION", "zstd")
+    COLUMNAR_ROW_GROUP_SIZE: int = int(os.getenv("COLUMNAR_ROW_GROUP_SIZE", "50000"))
+    
+    # Campaign Checkpoint Journal (defaults to <CSV_FILE_PATH>.journal.jsonl, fsync every N records, 0 = never)
+    JOURNAL_PATH: str = os.getenv("JOURNAL_PATH", "")
+    JOURNAL_FSYNC_EVERY: int = int(os.getenv("JOURNAL_FSYNC_EVERY", "20"))
+    
+    # Sharded Campaigns (worker processes per campaign, 1 = in-process; work dir defaults to <CSV_FILE_PATH>.shards)
+    CAMPAIGN_SHARDS: int = int(os.getenv("CAMPAIGN_SHARDS", "1"))
+    SHARD_WORK_DIR: str = os.getenv("SHARD_WORK_DIR", "")
     
     # LLM Settings
     MAX_RETRIES: int = 3
     REQUEST_TIMEOUT: int = 30
     
+    # LLM HTTP Client Settings
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    LLM_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "false").lower() == "true"
+    LLM_WARMUP_CONNECTIONS: int = int(os.getenv("LLM_WARMUP_CONNECTIONS", "2"))
+    
+    # LLM Rate Limiting (0 disables the local bucket, provider headers are still honoured)
+    GROQ_REQUESTS_PER_MINUTE: int = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    GROQ_TOKENS_PER_MINUTE: int = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "0"))
+    LLM_INITIAL_CONCURRENCY: int = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+    LLM_MIN_CONCURRENCY: int = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    MAX_RATE_LIMIT_RETRIES: int = int(os.getenv("MAX_RATE_LIMIT_RETRIES", "5"))
+    GROQ_SMALL_REQUESTS_PER_MINUTE: int = int(os.getenv("GROQ_SMALL_REQUESTS_PER_MINUTE", "30"))
+    GROQ_SMALL_TOKENS_PER_MINUTE: int = int(os.getenv("GROQ_SMALL_TOKENS_PER_MINUTE", "0"))
+    
+    # Model Routing (task=model or task:priority=model; "large" is GROQ_MODEL, "small" is GROQ_SMALL_MODEL)
+    LLM_MODEL_ROUTES: str = os.getenv(
+        "LLM_MODEL_ROUTES",
+        "scoring=small,enrichment=small,profile=small,classification=small,repair=small,"
+        "email:High=large,email=small,summary=large"
+    )
+    
+    # LLM Provider Backends (JSON list of {"name", "url", "model", "api_key"} OpenAI-compatible endpoints tried
+    # after Groq; a duplicate request is sent to the next backend after the given percentile of recent latencies)
+    LLM_BACKENDS: str = os.getenv("LLM_BACKENDS", "")
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_DELAY_SECONDS: float = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "2.0"))
+    LLM_HEDGE_WINDOW: int = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_BACKEND_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BACKEND_FAILURE_THRESHOLD", "3"))
+    LLM_BACKEND_COOLDOWN_SECONDS: float = float(os.getenv("LLM_BACKEND_COOLDOWN_SECONDS", "30"))
+    
+    # LLM Response Cache (classification is left out on purpose, it is meant to vary)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "")
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+    LLM_CACHE_MAX_DISK_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "100000"))
+    LLM_CACHE_TASKS: str = os.getenv("LLM_CACHE_TASKS", "enrichment,scoring,profile,email,summary")
+    
+    # Generation Profiles (output token cap per task, the default applies to any other task)
+    LLM_MAX_TOKENS_SCORING: int = int(os.getenv("LLM_MAX_TOKENS_SCORING", "150"))
+    LLM_MAX_TOKENS_ENRICHMENT: int = int(os.getenv("LLM_MAX_TOKENS_ENRICHMENT", "200"))
+    LLM_MAX_TOKENS_PROFILE: int = int(os.getenv("LLM_MAX_TOKENS_PROFILE", "250"))
+    LLM_MAX_TOKENS_EMAIL: int = int(os.getenv("LLM_MAX_TOKENS_EMAIL", "700"))
+    LLM_MAX_TOKENS_CLASSIFICATION: int = int(os.getenv("LLM_MAX_TOKENS_CLASSIFICATION", "100"))
+    LLM_MAX_TOKENS_SUMMARY: int = int(os.getenv("LLM_MAX_TOKENS_SUMMARY", "300"))
+    LLM_DEFAULT_MAX_TOKENS: int = int(os.getenv("LLM_DEFAULT_MAX_TOKENS", "1000"))
+    
+    # Campaign Token Budget (prompt + completion tokens per campaign run, 0 = unlimited; leads past it use the rule-based results)
+    CAMPAIGN_TOKEN_BUDGET: int = int(os.getenv("CAMPAIGN_TOKEN_BUDGET", "0"))
+    
+    # Streamed Completions (emails stop reading once subject and body are complete, reports stream to file and clients)
+    LLM_STREAMING_ENABLED: bool = os.getenv("LLM_STREAMING_ENABLED", "true").lower() == "true"
+    
+    # Structured Output (JSON mode is not used for streamed requests; one repair request re-asks only for invalid fields)
+    LLM_JSON_MODE: bool = os.getenv("LLM_JSON_MODE", "true").lower() == "true"
+    LLM_REPAIR_ENABLED: bool = os.getenv("LLM_REPAIR_ENABLED", "true").lower() == "true"
+    LLM_MAX_TOKENS_REPAIR: int = int(os.getenv("LLM_MAX_TOKENS_REPAIR", "200"))
+    
+    # Batched Prompts (scoring, enrichment and classification)
+    LLM_BATCH_ENABLED: bool = os.getenv("LLM_BATCH_ENABLED", "true").lower() == "true"
+    LLM_BATCH_SIZE: int = int(os.getenv("LLM_BATCH_SIZE", "10"))
+    LLM_BATCH_TOKEN_BUDGET: int = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000"))
+    LLM_BATCH_LINGER_SECONDS: float = float(os.getenv("LLM_BATCH_LINGER_SECONDS", "0.5"))
+    
+    # Fused enrichment + scoring (one LLM call per lead instead of two)
+    FUSED_ENRICHMENT_SCORING: bool = os.getenv("FUSED_ENRICHMENT_SCORING", "false").lower() == "true"
+    
+    # Rule Confidence Gate (skip enrichment/scoring LLM calls when rules are confident)
+    RULE_GATE_ENABLED: bool = os.getenv("RULE_GATE_ENABLED", "true").lower() == "true"
+    RULE_CONFIDENCE_THRESHOLD: float = float(os.getenv("RULE_CONFIDENCE_THRESHOLD", "0.9"))
+    
+    # Pipeline Settings
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "50"))
+    PIPELINE_MAX_IN_FLIGHT: int = int(os.getenv("PIPELINE_MAX_IN_FLIGHT", "500"))
+    ENRICHMENT_CONCURRENCY: int = int(os.getenv("ENRICHMENT_CONCURRENCY", "4"))
+    SCORING_CONCURRENCY: int = int(os.getenv("SCORING_CONCURRENCY", "4"))
+    EMAIL_CONCURRENCY: int = int(os.getenv("EMAIL_CONCURRENCY", "4"))
+    CLASSIFICATION_CONCURRENCY: int = int(os.getenv("CLASSIFICATION_CONCURRENCY", "4"))
+    MAIL_CONCURRENCY: int = int(os.getenv("MAIL_CONCURRENCY", "2"))
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
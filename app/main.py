@@ -1,30 +1,115 @@
 """FastAPI main application."""
 import asyncio
-from fastapi import FastAPI, HTTPException
-from typing import List
+import itertools
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Optional
 from app.config import settings
 from app.models import Lead, Priority
-from app.services.csv_service import CSVService
+from app.services.csv_service import FIELDNAMES, INPUT_FIELDS, CSVService
+from app.services.lead_index import LeadIndex
+from app.services.lead_store import SQLiteLeadStore, create_lead_store
 from app.services.llm_service import LLMService
 from app.services.lead_scoring import LeadScoringService
 from app.services.persona_agent import PersonaAgent
+from app.services.lead_profiler import LeadProfiler
+from app.services.confidence_gate import ConfidenceGate
 from app.services.email_agent import EmailAgent
 from app.services.response_classifier import ResponseClassifier
 from app.services.mail_service import MailService
+from app.services.mail_queue import MailQueue
 from app.services.report_generator import ReportGenerator
+from app.services.pipeline import LeadPipeline, PipelineStage
+from app.services.campaign_journal import CampaignJournal
+from app.services.campaign_jobs import CANCELLED, COMPLETED, CampaignJob, CampaignJobManager
+from app.services.campaign_shards import ShardedCampaign
+from app.utils import metrics
 
 
-app = FastAPI(title="AI Sales CRM", version="1.0.0")
+LEAD_STORE_SECONDS = metrics.histogram(
+    "lead_store_operation_duration_seconds", "Duration of lead store chunk reads and writes.", ["operation"]
+)
+PIPELINE_QUEUE_DEPTH = metrics.gauge("pipeline_queue_depth", "Items waiting in front of each pipeline stage.", ["stage"])
+LLM_IN_FLIGHT = metrics.gauge("llm_requests_in_flight", "Chat completion requests currently in flight.")
+LLM_CONCURRENCY_LIMIT = metrics.gauge("llm_concurrency_limit", "Current adaptive LLM concurrency limit.")
+LLM_BACKEND_HEALTH = metrics.gauge(
+    "llm_backend_health", "Health score of each LLM backend (moving average of request outcomes).", ["backend"]
+)
+LLM_BACKEND_AVAILABLE = metrics.gauge(
+    "llm_backend_available", "Whether each LLM backend is in use (0 while cooling down after failures).", ["backend"]
+)
+MAIL_QUEUE_MESSAGES = metrics.gauge("mail_queue_messages", "Messages in the outbound mail queue by status.", ["status"])
+MAIL_QUEUE_OLDEST_PENDING = metrics.gauge(
+    "mail_queue_oldest_pending_age_seconds", "Age of the oldest message due for delivery."
+)
+CAMPAIGN_LEADS = metrics.gauge("campaign_leads", "Lead counts of the latest campaign job.", ["state"])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage long-lived resources for the lifetime of the application."""
+    if isinstance(lead_store, SQLiteLeadStore) and os.path.exists(settings.CSV_FILE_PATH):
+        # Seed an empty database from the CSV so existing deployments keep their leads
+        if await asyncio.to_thread(lead_store.count_leads) == 0:
+            imported = await asyncio.to_thread(lead_store.import_csv, settings.CSV_FILE_PATH)
+            print(f"Imported {imported} lead(s) from {settings.CSV_FILE_PATH} into {lead_store.file_path}")
+    await llm_service.startup()
+    if mail_queue is not None:
+        await mail_queue.start()
+    yield
+    await campaign_jobs.shutdown()
+    if mail_queue is not None:
+        await mail_queue.stop()
+        mail_queue.close()
+    await llm_service.shutdown()
+    await asyncio.to_thread(mail_service.close)
+    if hasattr(lead_index, "close"):
+        lead_index.close()
+    if lead_index is not lead_store and hasattr(lead_store, "close"):
+        lead_store.close()
+
+
+app = FastAPI(title="AI Sales CRM", version="1.0.0", lifespan=lifespan)
 
 # Initialize services
-csv_service = CSVService(settings.CSV_FILE_PATH)
+lead_store = create_lead_store(
+    settings.LEAD_STORAGE_BACKEND,
+    settings.CSV_FILE_PATH,
+    settings.LEAD_DB_PATH or None,
+    settings.COLUMNAR_COMPRESSION,
+    settings.COLUMNAR_ROW_GROUP_SIZE
+)
+# Columnar files and the database answer queries themselves, a CSV file needs the sidecar index
+lead_index = LeadIndex(settings.CSV_FILE_PATH) if isinstance(lead_store, CSVService) else lead_store
 llm_service = LLMService()
-lead_scoring_service = LeadScoringService(llm_service)
-persona_agent = PersonaAgent(llm_service)
+confidence_gate = ConfidenceGate(settings.RULE_CONFIDENCE_THRESHOLD, settings.RULE_GATE_ENABLED)
+lead_scoring_service = LeadScoringService(llm_service, confidence_gate)
+persona_agent = PersonaAgent(llm_service, confidence_gate)
+lead_profiler = LeadProfiler(llm_service, persona_agent, lead_scoring_service, confidence_gate)
 email_agent = EmailAgent(llm_service)
 response_classifier = ResponseClassifier(llm_service)
 mail_service = MailService()
+mail_queue = None
+if settings.MAIL_QUEUE_ENABLED:
+    mail_queue = MailQueue(
+        mail_service,
+        settings.MAIL_QUEUE_PATH or os.path.join(settings.REPORTS_DIR, "mail_queue.sqlite3"),
+        workers=settings.MAIL_QUEUE_WORKERS,
+        max_attempts=settings.MAIL_QUEUE_MAX_ATTEMPTS,
+        retry_base_seconds=settings.MAIL_QUEUE_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.MAIL_QUEUE_RETRY_MAX_SECONDS,
+        domain_concurrency=settings.MAIL_DOMAIN_CONCURRENCY,
+        domain_per_minute=settings.MAIL_DOMAIN_PER_MINUTE,
+        retention_seconds=settings.MAIL_QUEUE_RETENTION_SECONDS
+    )
 report_generator = ReportGenerator(llm_service, settings.REPORTS_DIR)
+campaign_journal = CampaignJournal(
+    settings.JOURNAL_PATH or f"{settings.CSV_FILE_PATH}.journal.jsonl",
+    settings.JOURNAL_FSYNC_EVERY
+)
+campaign_jobs = CampaignJobManager()
 
 
 @app.get("/")
@@ -43,10 +128,14 @@ async def health():
     return {"status": "healthy"}
 
 
-async def process_lead(lead_data: dict) -> Lead:
-    """Process a single lead through the entire pipeline."""
-    # Create Lead object from CSV data
-    lead = Lead(
+def lead_from_row(row: dict) -> Lead:
+    """Create a Lead object from a processed CSV row."""
+    return Lead(**{**row, "name": row.get("name") or "", "email": row.get("email") or ""})
+
+
+def create_lead(lead_data: dict) -> Lead:
+    """Create a Lead object from CSV row data."""
+    return Lead(
         name=lead_data.get("name", ""),
         email=lead_data.get("email", ""),
         company=lead_data.get("company"),
@@ -54,94 +143,583 @@ async def process_lead(lead_data: dict) -> Lead:
         job_title=lead_data.get("job_title"),
         status=lead_data.get("status")
     )
-    
-    # Step 1: Enrich lead and assign persona
-    enrichment = await persona_agent.enrich_lead(lead)
+
+
+def apply_enrichment(lead: Lead, enrichment: dict) -> Lead:
+    """Copy enrichment results onto the lead."""
     lead.industry = enrichment["industry"]
     lead.job_title = enrichment["job_title"]
     lead.persona = enrichment["persona"]
-    
-    # Step 2: Score lead
-    scoring = await lead_scoring_service.score_lead(lead)
+    return lead
+
+
+def apply_scoring(lead: Lead, scoring: dict) -> Lead:
+    """Copy scoring results onto the lead."""
     lead.score = scoring["score"]
     lead.priority = scoring["priority"]
-    
-    # Step 3: Generate email
+    return lead
+
+
+def apply_classification(lead: Lead, classification: dict) -> Lead:
+    """Copy the response classification onto the lead."""
+    lead.response_status = classification["response_status"]
+    return lead
+
+
+async def enrich_lead_stage(lead: Lead) -> Lead:
+    """Enrich lead and assign persona."""
+    return apply_enrichment(lead, await persona_agent.enrich_lead(lead))
+
+
+async def score_lead_stage(lead: Lead) -> Lead:
+    """Score lead and derive its priority."""
+    return apply_scoring(lead, await lead_scoring_service.score_lead(lead))
+
+
+async def profile_lead_stage(lead_data: dict) -> Lead:
+    """Build the lead from its CSV row, then enrich and score it in one LLM call."""
+    lead = create_lead(lead_data)
+    profile = await lead_profiler.profile_lead(lead)
+    apply_enrichment(lead, profile)
+    return apply_scoring(lead, profile)
+
+
+async def generate_email_stage(lead: Lead) -> Lead:
+    """Generate the outreach email."""
     email_data = await email_agent.generate_email(lead)
     lead.email_subject = email_data["subject"]
     lead.email_body = email_data["body"]
-    
-    # Step 4: Classify response
-    classification = await response_classifier.classify_response(lead)
-    lead.response_status = classification["response_status"]
-    
-    # Step 5: Send email
-    if lead.email:
-        mail_service.send_email(
+    return lead
+
+
+async def classify_response_stage(lead: Lead) -> Lead:
+    """Classify the likely response."""
+    return apply_classification(lead, await response_classifier.classify_response(lead))
+
+
+async def send_email_stage(lead: Lead) -> Lead:
+    """Queue the generated email for delivery, or send it directly without a queue."""
+    if lead.email and mail_queue is not None:
+        # Background workers deliver it, so SMTP never holds up the campaign
+        await mail_queue.enqueue(
+            to_email=lead.email,
+            subject=lead.email_subject,
+            body=lead.email_body,
+            to_name=lead.name
+        )
+    elif lead.email:
+        await mail_service.send_email_async(
             to_email=lead.email,
             subject=lead.email_subject,
             body=lead.email_body,
             to_name=lead.name
         )
+    return lead
+
+
+async def ingest_and_enrich_stage(lead_data: dict) -> Lead:
+    """Build the lead from its CSV row and enrich it."""
+    return await enrich_lead_stage(create_lead(lead_data))
+
+
+async def ingest_and_enrich_batch_stage(leads_data: List[dict]) -> List:
+    """Build a batch of leads from their CSV rows and enrich them together."""
+    leads = []
+    for lead_data in leads_data:
+        try:
+            leads.append(create_lead(lead_data))
+        except Exception as e:
+            leads.append(e)
     
+    valid_leads = [lead for lead in leads if isinstance(lead, Lead)]
+    enrichments = iter(await persona_agent.enrich_leads(valid_leads))
+    return [
+        lead if isinstance(lead, Exception) else apply_enrichment(lead, next(enrichments))
+        for lead in leads
+    ]
+
+
+async def score_batch_stage(leads: List[Lead]) -> List[Lead]:
+    """Score a batch of leads together."""
+    scorings = await lead_scoring_service.score_leads(leads)
+    return [apply_scoring(lead, scoring) for lead, scoring in zip(leads, scorings)]
+
+
+async def classify_batch_stage(leads: List[Lead]) -> List[Lead]:
+    """Classify the likely responses of a batch of leads together."""
+    classifications = await response_classifier.classify_responses(leads)
+    return [apply_classification(lead, classification) for lead, classification in zip(leads, classifications)]
+
+
+async def process_lead(lead_data: dict) -> Lead:
+    """Process a single lead through the entire pipeline."""
+    if settings.FUSED_ENRICHMENT_SCORING:
+        lead = await profile_lead_stage(lead_data)
+    else:
+        lead = await ingest_and_enrich_stage(lead_data)
+        lead = await score_lead_stage(lead)
+    lead = await generate_email_stage(lead)
+    lead = await classify_response_stage(lead)
+    lead = await send_email_stage(lead)
     return lead
 
 
-@app.post("/campaign/process")
-async def process_campaign():
-    """Process all leads in the campaign."""
+def build_lead_pipeline(send_mail: bool = True) -> LeadPipeline:
+    """Build the staged campaign pipeline from settings, optionally without mail delivery."""
+    # Scoring, enrichment and classification can share one LLM request across several leads
+    batch_size = settings.LLM_BATCH_SIZE if settings.LLM_BATCH_ENABLED else 1
+    linger = settings.LLM_BATCH_LINGER_SECONDS
+    
+    if settings.FUSED_ENRICHMENT_SCORING:
+        # Enrichment and scoring share one round-trip per lead
+        profile_stages = [
+            PipelineStage("profile", profile_lead_stage, settings.ENRICHMENT_CONCURRENCY),
+        ]
+    else:
+        profile_stages = [
+            PipelineStage(
+                "enrichment", ingest_and_enrich_stage, settings.ENRICHMENT_CONCURRENCY,
+                batch_handler=ingest_and_enrich_batch_stage, batch_size=batch_size, batch_linger=linger
+            ),
+            PipelineStage(
+                "scoring", score_lead_stage, settings.SCORING_CONCURRENCY,
+                batch_handler=score_batch_stage, batch_size=batch_size, batch_linger=linger
+            ),
+        ]
+    
+    stages = profile_stages + [
+        PipelineStage("email", generate_email_stage, settings.EMAIL_CONCURRENCY),
+        PipelineStage(
+            "classification", classify_response_stage, settings.CLASSIFICATION_CONCURRENCY,
+            batch_handler=classify_batch_stage, batch_size=batch_size, batch_linger=linger
+        ),
+    ]
+    if send_mail:
+        stages.append(PipelineStage("mail", send_email_stage, settings.MAIL_CONCURRENCY))
+    
+    # Each stage runs its own worker pool so different leads are in different stages at once
+    return LeadPipeline(
+        stages,
+        queue_size=settings.PIPELINE_QUEUE_SIZE,
+        max_in_flight=settings.PIPELINE_MAX_IN_FLIGHT
+    )
+
+
+lead_pipeline = build_lead_pipeline()
+
+
+def lead_summary(lead: Lead) -> dict:
+    """Describe a lead for job events."""
+    return {
+        "name": lead.name,
+        "email": lead.email,
+        "company": lead.company,
+        "job_title": lead.job_title,
+        "score": lead.score,
+        "priority": lead.priority,
+        "persona": lead.persona,
+        "response_status": lead.response_status
+    }
+
+
+def write_chunk(writer, leads: List[Lead]):
+    """Write one chunk of processed leads, timing the store write."""
+    with LEAD_STORE_SECONDS.labels("write_chunk").time():
+        writer.write_leads(leads)
+
+
+async def run_campaign(job: CampaignJob, pipeline: Optional[LeadPipeline] = None, report: bool = True) -> dict:
+    """Process all leads in the campaign, reporting progress to the job."""
+    job.token_budget = llm_service.start_token_budget(settings.CAMPAIGN_TOKEN_BUDGET)
     try:
-        # Read leads from CSV
-        leads_data = csv_service.read_leads()
+        pipeline = pipeline or lead_pipeline
+        
+        # Stream leads from CSV in chunks so memory stays flat for large files
+        # Only the input columns are needed to build leads, columnar stores skip decoding the rest
+        chunks = metrics.timed_chunks(
+            lead_store.read_lead_chunks(settings.CSV_CHUNK_SIZE, INPUT_FIELDS),
+            LEAD_STORE_SECONDS.labels("read_chunk")
+        )
+        # Every chunk is read in a worker thread so the event loop keeps serving LLM and mail calls
+        first_chunk = await asyncio.to_thread(next, chunks, None)
         
-        if not leads_data:
+        if not first_chunk:
             raise HTTPException(status_code=404, detail="No leads found in CSV file")
         
-        # Process each lead
-        processed_leads = []
-        high_priority_count = 0
+        # Known up front so the job can report an ETA
+        job.total = await asyncio.to_thread(lead_store.count_leads)
         
-        for lead_data in leads_data:
-            if not lead_data.get("email"):
-                continue  # Skip leads without email
+        async def pending_leads():
+            chunk = first_chunk
+            while chunk is not None:
+                for lead_data in chunk:
+                    if lead_data.get("email"):  # Skip leads without email
+                        yield lead_data
+                chunk = await asyncio.to_thread(next, chunks, None)
+        
+        # Pick up where an interrupted run stopped
+        journal_state = await asyncio.to_thread(campaign_journal.load)
+        if journal_state:
+            print(f"Resuming campaign: {len(journal_state)} lead(s) found in the checkpoint journal")
+        first_stage = pipeline.stages[0].name
+        
+        def resume_lead(lead_data: dict):
+            entry = journal_state.get(lead_data.get("email"))
+            # Stage names differ between pipeline modes, only resume what this pipeline can continue
+            if entry is None or first_stage not in entry["stages"]:
+                return None
+            return Lead(**entry["lead"]), entry["stages"]
+        
+        def checkpoint(stage: str, item):
+            campaign_journal.record(stage, item.value)
+            job.stage_completed(stage)
             
-            try:
-                lead = await process_lead(lead_data)
-                processed_leads.append(lead)
+            # Alert on hot leads as soon as they are scored, not when the campaign ends
+            lead = item.value
+            if stage in ("scoring", "profile") and lead.priority == Priority.HIGH:
+                print(f"🚨 HIGH PRIORITY LEAD: {lead.name} ({lead.company}) - Score: {lead.score} - Persona: {lead.persona}")
+                job.publish("high_priority", lead_summary(lead))
+        
+        # Process leads through the staged pipeline
+        # Updated leads go to a temporary file that replaces the CSV only once complete
+        with campaign_journal, lead_store.open_writer() as writer:
+            output_chunk = []
+            async for item in pipeline.stream(pending_leads(), resume_lead, checkpoint):
+                if not item.ok:
+                    email = item.source.get('email', 'unknown')
+                    print(f"Error processing lead {email} ({item.failed_stage}): {str(item.error)}")
+                    job.lead_failed(item.failed_stage, email, item.error)
+                    continue
                 
-                # Track and log high priority leads
+                lead = item.value
+                output_chunk.append(lead)
+                job.lead_processed(lead)
                 if lead.priority == Priority.HIGH:
-                    high_priority_count += 1
-                    print(f"🚨 HIGH PRIORITY LEAD: {lead.name} ({lead.company}) - Score: {lead.score} - Persona: {lead.persona}")
-            except Exception as e:
-                print(f"Error processing lead {lead_data.get('email', 'unknown')}: {str(e)}")
-                continue
+                    job.high_priority += 1
+                job.publish("lead", lead_summary(lead))
+                
+                if len(output_chunk) >= settings.CSV_CHUNK_SIZE:
+                    write_chunk(writer, output_chunk)
+                    output_chunk = []
+            
+            write_chunk(writer, output_chunk)
+            # Wait for the journal writer off the event loop, the with block then finds it closed
+            await asyncio.to_thread(campaign_journal.close)
         
-        # Log summary
-        if high_priority_count > 0:
-            print(f"\n📊 Campaign Summary: {high_priority_count} high-priority lead(s) identified and processed with enhanced email templates.")
+        # Every completed lead is now in the CSV, the checkpoints are no longer needed
+        await asyncio.to_thread(campaign_journal.clear)
         
-        # Write updated leads back to CSV
-        csv_service.write_leads(processed_leads)
+        # Log summary
+        if job.high_priority > 0:
+            print(f"\n📊 Campaign Summary: {job.high_priority} high-priority lead(s) identified and processed with enhanced email templates.")
         
         # Generate campaign summary report
-        report_path = await report_generator.generate_report(processed_leads)
+        report_path = await report_generator.generate_report(job.stats) if report else None
+        
+        return {
+            "status": "success",
+            "leads_processed": job.processed,
+            "report_path": report_path,
+            "tokens": job.token_budget.to_dict(),
+            "message": f"Campaign processed successfully. {job.processed} leads processed."
+        }
+    finally:
+        llm_service.stop_token_budget()
+
+
+async def run_sharded_campaign(job: CampaignJob, shards: int) -> dict:
+    """Process the campaign in several worker processes, then merge their results.
+    
+    Leads are partitioned by email hash, each worker runs the pipeline on
+    its shard without sending mail, and the merged leads are queued for
+    delivery and written back here. Delivered mail is recorded in the
+    checkpoint journal, so a rerun after an interruption does not send it
+    again.
+    """
+    if shards <= 1:
+        return await run_campaign(job)
+    
+    job.token_budget = llm_service.start_token_budget(settings.CAMPAIGN_TOKEN_BUDGET)
+    try:
+        campaign = ShardedCampaign(shards, settings.SHARD_WORK_DIR or f"{settings.CSV_FILE_PATH}.shards")
+        rows = (row for chunk in lead_store.read_lead_chunks(settings.CSV_CHUNK_SIZE, INPUT_FIELDS) for row in chunk)
+        counts = await asyncio.to_thread(campaign.partition, rows)
+        job.total = sum(counts)
+        if not job.total:
+            campaign.cleanup()
+            raise HTTPException(status_code=404, detail="No leads found in CSV file")
+        
+        results = await campaign.run(job, counts)
+        campaign.merge_results(job, results)
+        
+        journal_state = await asyncio.to_thread(campaign_journal.load)
+        with campaign_journal, lead_store.open_writer() as writer:
+            rows = campaign.iter_output()
+            while True:
+                chunk = await asyncio.to_thread(list, itertools.islice(rows, settings.CSV_CHUNK_SIZE))
+                if not chunk:
+                    break
+                # Like run_campaign, leads whose mail failed are not written back
+                write_chunk(writer, await send_email_chunk(job, [lead_from_row(row) for row in chunk], journal_state))
+            await asyncio.to_thread(campaign_journal.close)
+        
+        await asyncio.to_thread(campaign_journal.clear)
+        campaign.cleanup()
+        
+        if job.high_priority > 0:
+            print(f"\n📊 Campaign Summary: {job.high_priority} high-priority lead(s) identified across {shards} shards.")
+        
+        report_path = await report_generator.generate_report(job.stats)
         
         return {
             "status": "success",
-            "leads_processed": len(processed_leads),
+            "leads_processed": job.processed,
+            "shards": shards,
             "report_path": report_path,
-            "message": f"Campaign processed successfully. {len(processed_leads)} leads processed."
+            "tokens": job.token_budget.to_dict(),
+            "message": f"Campaign processed successfully. {job.processed} leads processed."
+        }
+    finally:
+        llm_service.stop_token_budget()
+
+
+async def send_email_chunk(job: CampaignJob, leads: List[Lead], journal_state: dict) -> List[Lead]:
+    """Queue (or send) the generated emails of a chunk of merged leads, returning those that did not fail.
+    
+    Mail already recorded in the checkpoint journal by an interrupted run is not sent again.
+    """
+    async def deliver(lead: Lead):
+        entry = journal_state.get(lead.email)
+        if entry is None or "mail" not in entry["stages"]:
+            await send_email_stage(lead)
+            campaign_journal.record("mail", lead)
+    
+    outcomes = await asyncio.gather(*(deliver(lead) for lead in leads), return_exceptions=True)
+    delivered = []
+    for lead, outcome in zip(leads, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Error processing lead {lead.email} (mail): {str(outcome)}")
+            # The shard counted the lead as processed before its mail was sent
+            job.processed_lead_failed("mail", lead, outcome)
+            if lead.priority == Priority.HIGH:
+                job.high_priority -= 1
+        else:
+            job.stage_completed("mail")
+            delivered.append(lead)
+    return delivered
+
+
+@app.post("/campaign/process")
+async def process_campaign(wait: bool = False, shards: Optional[int] = Query(None, ge=1, le=64)):
+    """Start processing all leads in the campaign as a background job.
+    
+    With wait=true the request stays open and returns the campaign result.
+    With shards > 1 the leads are processed by that many worker processes.
+    """
+    shards = shards or settings.CAMPAIGN_SHARDS
+    try:
+        job = campaign_jobs.start(lambda job: run_sharded_campaign(job, shards))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if not wait:
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "job_id": job.id,
+            "status_url": f"/campaign/jobs/{job.id}",
+            "events_url": f"/campaign/jobs/{job.id}/events"
+        })
+    
+    # The job keeps running if the client goes away
+    await asyncio.shield(job.task)
+    if job.status == COMPLETED:
+        return job.result
+    if isinstance(job.error, HTTPException):
+        raise job.error
+    if job.status == CANCELLED:
+        raise HTTPException(status_code=409, detail="Campaign job was cancelled")
+    raise HTTPException(status_code=500, detail=f"Error processing campaign: {str(job.error)}")
+
+
+@app.get("/campaign/jobs")
+async def list_campaign_jobs():
+    """List recent campaign jobs."""
+    return [job.to_dict() for job in campaign_jobs.jobs.values()]
+
+
+@app.get("/campaign/jobs/{job_id}")
+async def get_campaign_job(job_id: str):
+    """Get the progress of a campaign job: per-stage counts, ETA and errors."""
+    job = campaign_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Campaign job not found")
+    return job.to_dict()
+
+
+@app.post("/campaign/jobs/{job_id}/cancel")
+async def cancel_campaign_job(job_id: str):
+    """Cancel a running campaign job; completed stages stay in the checkpoint journal."""
+    job = campaign_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Campaign job not found")
+    if not campaign_jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Campaign job is already {job.status}")
+    await asyncio.gather(job.task, return_exceptions=True)
+    return job.to_dict()
+
+
+@app.post("/campaign/jobs/{job_id}/report")
+async def generate_campaign_job_report(job_id: str, stream: bool = False):
+    """Regenerate the campaign report from the leads a job has processed so far.
+    
+    With stream=true the markdown is returned as it is generated.
+    """
+    job = campaign_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Campaign job not found")
+    if stream:
+        return StreamingResponse(
+            report_generator.stream_report(job.stats),
+            media_type="text/markdown; charset=utf-8",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    report_path = await report_generator.generate_report(job.stats)
+    return {"status": job.status, "leads_processed": job.processed, "report_path": report_path}
+
+
+@app.get("/campaign/jobs/{job_id}/events")
+async def stream_campaign_job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """Stream lead completions, high-priority leads and status changes as server-sent events."""
+    job = campaign_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Campaign job not found")
+    
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        job.events(after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/campaign/journal/compact")
+async def compact_campaign_journal():
+    """Merge the checkpoint journal of an interrupted campaign into the CSV."""
+    try:
+        leads = await asyncio.to_thread(campaign_journal.compact)
+        if leads:
+            await asyncio.to_thread(lead_store.update_leads, leads)
+        return {
+            "status": "success",
+            "leads_merged": len(leads),
+            "message": f"Merged {len(leads)} checkpointed lead(s) into the CSV."
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing campaign: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error compacting journal: {str(e)}")
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose counters and latency histograms in the Prometheus text format."""
+    # Point-in-time values are sampled on scrape rather than tracked on every change
+    limiter = llm_service.rate_limiter.stats()
+    LLM_CONCURRENCY_LIMIT.set(limiter["concurrency_limit"])
+    backends = llm_service.backends.stats()["backends"]
+    LLM_IN_FLIGHT.set(sum(
+        limiter["in_flight"]
+        for backend in backends
+        for limiter in (backend["rate_limiter"], *backend["model_rate_limiters"].values())
+    ))
+    for backend in backends:
+        LLM_BACKEND_HEALTH.labels(backend["name"]).set(backend["health"])
+        LLM_BACKEND_AVAILABLE.labels(backend["name"]).set(1 if backend["available"] else 0)
+    for stage in lead_pipeline.stages:
+        PIPELINE_QUEUE_DEPTH.labels(stage.name).set(0)
+    for stage, depth in lead_pipeline.queue_depths().items():
+        PIPELINE_QUEUE_DEPTH.labels(stage).set(depth)
+    if mail_queue is not None:
+        stats = await mail_queue.stats()
+        for status, count in stats["depth"].items():
+            MAIL_QUEUE_MESSAGES.labels(status).set(count)
+        MAIL_QUEUE_OLDEST_PENDING.set(stats["oldest_pending_age_seconds"] or 0)
+    if campaign_jobs.jobs:
+        job = next(reversed(campaign_jobs.jobs.values()))
+        for state, count in (("total", job.total or 0), ("processed", job.processed), ("failed", job.failed),
+                             ("high_priority", job.high_priority)):
+            CAMPAIGN_LEADS.labels(state).set(count)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/llm/stats")
+async def get_llm_stats():
+    """Get LLM cache, rate limiter and rule confidence gate counters."""
+    return {**llm_service.stats(), "rule_gate": confidence_gate.stats()}
+
+
+@app.get("/mail/stats")
+async def get_mail_stats():
+    """Get SMTP delivery counters and throughput."""
+    return mail_service.stats()
+
+
+@app.get("/mail/queue")
+async def get_mail_queue():
+    """Get outbound queue depth, delivery latency and dead letter counts."""
+    if mail_queue is None:
+        raise HTTPException(status_code=404, detail="Mail queue is disabled")
+    return await mail_queue.stats()
+
+
+@app.get("/mail/queue/dead")
+async def get_dead_letters(limit: int = 100):
+    """Get the most recent messages that could not be delivered."""
+    if mail_queue is None:
+        raise HTTPException(status_code=404, detail="Mail queue is disabled")
+    return await mail_queue.dead_letters(limit)
+
+
+@app.post("/mail/queue/dead/retry")
+async def retry_dead_letters():
+    """Queue every dead-lettered message for delivery again."""
+    if mail_queue is None:
+        raise HTTPException(status_code=404, detail="Mail queue is disabled")
+    count = await mail_queue.requeue_dead_letters()
+    return {
+        "status": "success",
+        "requeued": count,
+        "message": f"Requeued {count} dead-lettered message(s)."
+    }
+
+
+@app.post("/leads/import")
+async def import_leads():
+    """Upsert the leads of the CSV file into the SQLite store."""
+    if not isinstance(lead_store, SQLiteLeadStore):
+        raise HTTPException(status_code=400, detail="Import requires LEAD_STORAGE_BACKEND=sqlite")
+    try:
+        count = await asyncio.to_thread(lead_store.import_csv, settings.CSV_FILE_PATH)
+        return {"status": "success", "imported": count, "message": f"Imported {count} lead(s) from CSV."}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing leads: {str(e)}")
+
+
+@app.post("/leads/export")
+async def export_leads():
+    """Write the leads of the SQLite store to the CSV file."""
+    if not isinstance(lead_store, SQLiteLeadStore):
+        raise HTTPException(status_code=400, detail="Export requires LEAD_STORAGE_BACKEND=sqlite")
+    try:
+        count = await asyncio.to_thread(lead_store.export_csv, settings.CSV_FILE_PATH)
+        return {"status": "success", "exported": count, "message": f"Exported {count} lead(s) to CSV."}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting leads: {str(e)}")
 
 
 @app.get("/leads")
 async def get_leads():
     """Get all leads from CSV."""
     try:
-        leads_data = csv_service.read_leads()
+        leads_data = await asyncio.to_thread(lambda: list(lead_index.iter_leads()))
         return {"leads": leads_data, "count": len(leads_data)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading leads: {str(e)}")
@@ -151,11 +729,8 @@ async def get_leads():
 async def get_high_priority_leads():
     """Get all high-priority leads from CSV."""
     try:
-        leads_data = csv_service.read_leads()
-        high_priority_leads = [
-            lead for lead in leads_data 
-            if lead.get("priority", "").lower() == "high"
-        ]
+        # Served from the sidecar index, only the matching rows are read
+        high_priority_leads = await asyncio.to_thread(lambda: list(lead_index.iter_leads(priority="high")))
         return {
             "high_priority_leads": high_priority_leads,
             "count": len(high_priority_leads),
@@ -165,6 +740,40 @@ async def get_high_priority_leads():
         raise HTTPException(status_code=500, detail=f"Error reading leads: {str(e)}")
 
 
+@app.get("/leads/query")
+async def query_leads(
+    priority: Optional[str] = None,
+    persona: Optional[str] = None,
+    email: Optional[str] = None,
+    min_score: Optional[int] = Query(None, ge=1, le=10),
+    max_score: Optional[int] = Query(None, ge=1, le=10),
+    sort: str = "score_desc",
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_body: bool = False
+):
+    """Query leads with filters, score ordering and cursor pagination.
+    
+    Email bodies are left out unless include_body=true or fields asks for them.
+    """
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+    else:
+        selected = [field for field in FIELDNAMES if include_body or field != "email_body"]
+    
+    try:
+        return await asyncio.to_thread(
+            lead_index.query_leads,
+            priority=priority, persona=persona, email=email, min_score=min_score, max_score=max_score,
+            sort=sort, limit=limit, cursor=cursor, fields=selected
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying leads: {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
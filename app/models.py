@@ -1,9 +1,15 @@
 """Data models for the AI Sales CRM."""
-from typing import Optional
-from pydantic import BaseModel, EmailStr
+import re
+from typing import Literal, Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from enum import Enum
 
 
+def enum_value(value):
+    """Return the value of an enum member, or any other value unchanged."""
+    return value.value if isinstance(value, Enum) else value
+
+
 class Priority(str, Enum):
     """Lead priority levels."""
     HIGH = "High"
@@ -49,3 +55,62 @@ class CampaignSummary(BaseModel):
     average_score: float
     summary_text: str
 
+
+# LLM response schemas, one per task. Field descriptions double as the
+# placeholders of the repair prompt that re-asks for invalid fields.
+
+def _coerce_score(value):
+    """Accept scores written as "8", "8/10" or 8.0."""
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(\.\d+)?", value)
+        return round(float(match.group())) if match else value
+    if isinstance(value, float):
+        return round(value)
+    return value
+
+
+class ScoringResponse(BaseModel):
+    """LLM output of lead scoring."""
+    score: int = Field(ge=1, le=10, description="<number 1-10>")
+    reasoning: Optional[str] = Field(None, description="<brief explanation of the score>")
+    
+    _coerce_score = field_validator("score", mode="before")(_coerce_score)
+
+
+class EnrichmentResponse(BaseModel):
+    """LLM output of lead enrichment."""
+    industry: Optional[str] = Field(None, description="<inferred or original industry>")
+    job_title: Optional[str] = Field(None, description="<inferred or original job title>")
+    persona: str = Field(min_length=1, description="<buyer persona category>")
+    reasoning: Optional[str] = Field(None, description="<brief explanation of enrichment decisions>")
+
+
+class ProfileResponse(EnrichmentResponse):
+    """LLM output of fused enrichment and scoring."""
+    score: int = Field(ge=1, le=10, description="<number 1-10>")
+    
+    _coerce_score = field_validator("score", mode="before")(_coerce_score)
+
+
+class EmailResponse(BaseModel):
+    """LLM output of email generation."""
+    subject: str = Field(min_length=1, description="<email subject line>")
+    body: str = Field(min_length=1, description="<email body text>")
+
+
+class ClassificationResponse(BaseModel):
+    """LLM output of response classification."""
+    response_status: Literal["Interested", "Not Interested", "Follow Up"] = Field(
+        description="<Interested|Not Interested|Follow Up>"
+    )
+    reasoning: Optional[str] = Field(None, description="<brief explanation of the classification>")
+    
+    @field_validator("response_status", mode="before")
+    @classmethod
+    def _normalize_status(cls, value):
+        """Accept spelling variants such as "not_interested" or "follow-up"."""
+        if not isinstance(value, str):
+            return value
+        key = re.sub(r"[\s_-]+", " ", value).strip().lower()
+        return {"interested": "Interested", "not interested": "Not Interested",
+                "follow up": "Follow Up", "followup": "Follow Up"}.get(key, value)
@@ -0,0 +1,230 @@
+"""Background campaign jobs with progress tracking and event streams."""
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.services.campaign_stats import CampaignStats
+from app.services.token_budget import TokenBudget
+
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = {COMPLETED, FAILED, CANCELLED}
+
+
+class CampaignJob:
+    """Progress and event history of a single campaign run.
+    
+    Events are kept in a bounded history and fanned out to every
+    subscriber, so a client that connects late (or reconnects with the
+    last event id it saw) still receives what it missed.
+    """
+    
+    def __init__(self, history_size: int = 1000, max_errors: int = 50):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.total: Optional[int] = None
+        self.processed = 0
+        self.failed = 0
+        self.high_priority = 0
+        self.stage_counts: Dict[str, int] = {}
+        self.stage_failures: Dict[str, int] = {}
+        self.errors: deque = deque(maxlen=max_errors)
+        self.stats = CampaignStats()
+        self.token_budget: Optional[TokenBudget] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[Exception] = None
+        self.task: Optional[asyncio.Task] = None
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: List[asyncio.Queue] = []
+        self._next_event_id = 1
+        self.dropped_events = 0
+    
+    @property
+    def finished(self) -> bool:
+        """Whether the job has stopped running."""
+        return self.status in FINISHED_STATES
+    
+    def publish(self, event: str, data: Dict):
+        """Record an event and push it to every subscriber."""
+        message = (self._next_event_id, event, data)
+        self._next_event_id += 1
+        self._history.append(message)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client must not hold up the campaign
+                self.dropped_events += 1
+    
+    def stage_completed(self, stage: str):
+        """Count a lead finishing a stage."""
+        self.stage_counts[stage] = self.stage_counts.get(stage, 0) + 1
+    
+    def lead_processed(self, lead):
+        """Count a lead that completed every stage."""
+        self.processed += 1
+        self.stats.add(lead)
+    
+    def lead_failed(self, stage: str, email: Optional[str], error: Exception):
+        """Count a lead that failed and remember the error."""
+        self.failed += 1
+        self.stage_failures[stage] = self.stage_failures.get(stage, 0) + 1
+        self.errors.append({"email": email, "stage": stage, "error": str(error)})
+    
+    def processed_lead_failed(self, stage: str, lead, error: Exception):
+        """Move a lead already counted as processed to the failed leads."""
+        self.processed -= 1
+        self.stats.remove(lead)
+        self.lead_failed(stage, lead.email, error)
+    
+    def set_status(self, status: str):
+        """Move the job to a new state and notify subscribers."""
+        self.status = status
+        now = time.time()
+        if status == RUNNING:
+            self.started_at = now
+        elif status in FINISHED_STATES:
+            self.finished_at = now
+        self.publish("status", {"status": status})
+    
+    def eta_seconds(self) -> Optional[float]:
+        """Estimate the remaining run time from the throughput so far."""
+        if self.status != RUNNING or not self.total or not self.started_at:
+            return None
+        done = self.processed + self.failed
+        if done <= 0:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed / done * max(0, self.total - done), 1)
+    
+    def to_dict(self) -> Dict:
+        """Return the job progress as a JSON-serialisable dict."""
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else None,
+            "total": self.total,
+            "processed": self.processed,
+            "failed": self.failed,
+            "high_priority": self.high_priority,
+            "statistics": self.stats.snapshot(),
+            "tokens": self.token_budget.to_dict() if self.token_budget is not None else None,
+            "stages": {
+                stage: {"completed": count, "failed": self.stage_failures.get(stage, 0)}
+                for stage, count in self.stage_counts.items()
+            },
+            "eta_seconds": self.eta_seconds(),
+            "errors": list(self.errors),
+            "result": self.result
+        }
+    
+    async def events(self, last_event_id: int = 0, queue_size: int = 1000,
+                     keepalive: float = 15.0) -> AsyncIterator[str]:
+        """Yield server-sent events, starting after the given event id."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        backlog = [message for message in self._history if message[0] > last_event_id]
+        self._subscribers.append(queue)
+        try:
+            for message in backlog:
+                yield self._format_event(*message)
+            last_sent = backlog[-1][0] if backlog else last_event_id
+            
+            while not (self.finished and queue.empty()):
+                try:
+                    message = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                if message[0] <= last_sent:
+                    continue
+                last_sent = message[0]
+                yield self._format_event(*message)
+        finally:
+            self._subscribers.remove(queue)
+    
+    @staticmethod
+    def _format_event(event_id: int, event: str, data: Dict) -> str:
+        """Encode an event in the text/event-stream format."""
+        return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class CampaignJobManager:
+    """Run campaigns as background jobs, one at a time."""
+    
+    def __init__(self, max_jobs: int = 20):
+        self.max_jobs = max(1, max_jobs)
+        self.jobs: "OrderedDict[str, CampaignJob]" = OrderedDict()
+    
+    def active_job(self) -> Optional[CampaignJob]:
+        """Return the job that is currently queued or running, if any."""
+        for job in self.jobs.values():
+            if not job.finished:
+                return job
+        return None
+    
+    def get(self, job_id: str) -> Optional[CampaignJob]:
+        """Look up a job by id."""
+        return self.jobs.get(job_id)
+    
+    def start(self, runner: Callable[[CampaignJob], Awaitable[Dict]]) -> CampaignJob:
+        """Create a job and run it in the background."""
+        if self.active_job() is not None:
+            raise RuntimeError("A campaign job is already running")
+        
+        job = CampaignJob()
+        self.jobs[job.id] = job
+        # Forget the oldest finished jobs
+        while len(self.jobs) > self.max_jobs:
+            oldest = next(iter(self.jobs.values()))
+            if not oldest.finished:
+                break
+            self.jobs.popitem(last=False)
+        
+        job.task = asyncio.create_task(self._run(job, runner))
+        return job
+    
+    async def _run(self, job: CampaignJob, runner: Callable[[CampaignJob], Awaitable[Dict]]):
+        """Drive a job through its lifecycle."""
+        job.set_status(RUNNING)
+        try:
+            job.result = await runner(job)
+            job.set_status(COMPLETED)
+        except asyncio.CancelledError:
+            job.set_status(CANCELLED)
+        except Exception as e:
+            job.error = e
+            job.errors.append({"email": None, "stage": None, "error": str(getattr(e, "detail", e))})
+            job.set_status(FAILED)
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a running job; returns False when it already finished."""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished or job.task is None:
+            return False
+        job.task.cancel()
+        if job.status == QUEUED:
+            # The task never started, so it cannot record the cancellation itself
+            job.set_status(CANCELLED)
+        return True
+    
+    async def shutdown(self):
+        """Cancel any running job and wait for it to stop."""
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.finished]
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+        await asyncio.gather(*tasks, return_exceptions=True)
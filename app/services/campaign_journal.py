@@ -0,0 +1,139 @@
+"""Crash-safe checkpoint journal for campaign processing."""
+import json
+import os
+import queue
+import threading
+from typing import Dict, List, Optional
+from app.models import Lead
+
+
+class CampaignJournal:
+    """Append-only JSONL journal of completed lead stages.
+    
+    Every time a lead finishes a pipeline stage, a line with the stage name
+    and a snapshot of the lead is appended. After a crash, replaying the
+    journal tells which stages each lead (keyed by email) has already been
+    through, so a restarted campaign only runs the remaining work.
+    
+    Lines are written and synced by a writer thread, so recording a stage
+    never waits for the disk.
+    """
+    
+    def __init__(self, path: str, fsync_every: int = 20):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._file = None
+        self._unsynced = 0
+        self._lines: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        self._error: Optional[Exception] = None
+    
+    def load(self) -> Dict[str, Dict]:
+        """Replay the journal into {email: {"stages": set, "lead": dict}}."""
+        state: Dict[str, Dict] = {}
+        if not os.path.exists(self.path):
+            return state
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    continue
+                
+                entry = state.setdefault(record["email"], {"stages": set(), "lead": None})
+                entry["stages"].update(record["stages"])
+                entry["lead"] = record["lead"]
+        return state
+    
+    def open(self):
+        """Open the journal for appending."""
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._error = None
+            self._lines = queue.Queue()
+            self._writer = threading.Thread(target=self._write_lines, name="campaign-journal", daemon=True)
+            self._writer.start()
+    
+    def _write_lines(self):
+        """Append queued lines until close() sends None, then sync."""
+        try:
+            while True:
+                line = self._lines.get()
+                if line is None:
+                    break
+                self._file.write(line)
+                self._unsynced += 1
+                if self.fsync_every > 0 and self._unsynced >= self.fsync_every:
+                    self._sync()
+            self._sync()
+        except Exception as e:
+            print(f"Error writing checkpoint journal {self.path}: {str(e)}")
+            self._error = e
+    
+    def _sync(self):
+        """Flush buffered lines to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+    
+    def record(self, stage: str, lead: Lead):
+        """Record that a lead completed a stage."""
+        self.open()
+        if self._error is not None:
+            raise self._error
+        # Serialised now, later stages keep changing the lead
+        record = {"email": lead.email, "stages": [stage], "lead": lead.model_dump(mode="json")}
+        self._lines.put(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    def close(self):
+        """Write the queued lines, sync and close the journal."""
+        if self._file is not None:
+            self._lines.put(None)
+            self._writer.join()
+            self._file.close()
+            self._file = None
+            self._lines = None
+            self._writer = None
+    
+    def clear(self):
+        """Remove the journal once its contents are reflected in the lead file."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def compact(self) -> List[Lead]:
+        """Rewrite the journal with one line per lead and return the latest snapshots.
+        
+        The rewritten journal replaces the old one atomically, so a crash
+        during compaction never loses recorded progress.
+        """
+        self.close()
+        state = self.load()
+        if not state:
+            return []
+        
+        temp_path = f"{self.path}.compact"
+        leads = []
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for email, entry in state.items():
+                lead = Lead(**entry["lead"])
+                leads.append(lead)
+                record = {"email": email, "stages": sorted(entry["stages"]), "lead": entry["lead"]}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        return leads
+    
+    def __enter__(self) -> "CampaignJournal":
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
@@ -0,0 +1,250 @@
+"""Sharded campaign execution across worker processes.
+
+The coordinator partitions the leads by a hash of their email into one
+CSV file per shard, then runs the regular campaign pipeline on each shard
+in its own Python process, so rule scoring, prompt building, JSON parsing
+and CSV work use every core. Settings are read from the environment when
+app.config is imported, which is how each worker gets its own input file
+and its share of the LLM rate limits.
+
+Usage:
+    python -m app.services.campaign_shards --shards 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import zlib
+from typing import Dict, Iterable, Iterator, List
+
+from app.config import settings
+from app.services.campaign_jobs import CampaignJob
+from app.services.campaign_stats import CampaignStats
+from app.services.csv_service import CSVService, LeadCSVWriter
+
+
+EVENT_PREFIX = "@@shard-event "
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def shard_of(email: str, shards: int) -> int:
+    """Return the shard a lead belongs to; the same email always lands on the same shard."""
+    return zlib.crc32(email.strip().lower().encode("utf-8")) % shards
+
+
+def split_limit(value: int, shards: int) -> int:
+    """Return one worker's share of a global limit (0 stays unlimited)."""
+    if value <= 0:
+        return value
+    return max(1, value // shards)
+
+
+class ShardedCampaign:
+    """Run one campaign as several worker processes and collect their results."""
+    
+    def __init__(self, shards: int, work_dir: str):
+        self.shards = max(1, shards)
+        self.work_dir = work_dir
+    
+    def shard_dir(self, index: int) -> str:
+        """Directory holding the input, output, journal and result of a shard."""
+        return os.path.join(self.work_dir, f"shard-{index}")
+    
+    def shard_path(self, index: int) -> str:
+        """CSV file a shard reads its leads from and writes its results to."""
+        return os.path.join(self.shard_dir(index), "leads.csv")
+    
+    def worker_environment(self, index: int) -> Dict[str, str]:
+        """Environment of a worker process: its own files and its share of the LLM limits."""
+        env = dict(os.environ)
+        env.update({
+            "CSV_FILE_PATH": self.shard_path(index),
+            "LEAD_STORAGE_BACKEND": "csv",
+            "JOURNAL_PATH": f"{self.shard_path(index)}.journal.jsonl",
+            # The coordinator owns the mail queue and sends once the shards are merged
+            "MAIL_QUEUE_ENABLED": "false",
+            "GROQ_REQUESTS_PER_MINUTE": str(split_limit(settings.GROQ_REQUESTS_PER_MINUTE, self.shards)),
+            "GROQ_TOKENS_PER_MINUTE": str(split_limit(settings.GROQ_TOKENS_PER_MINUTE, self.shards)),
+            "GROQ_SMALL_REQUESTS_PER_MINUTE": str(split_limit(settings.GROQ_SMALL_REQUESTS_PER_MINUTE, self.shards)),
+            "GROQ_SMALL_TOKENS_PER_MINUTE": str(split_limit(settings.GROQ_SMALL_TOKENS_PER_MINUTE, self.shards)),
+            "LLM_INITIAL_CONCURRENCY": str(split_limit(settings.LLM_INITIAL_CONCURRENCY, self.shards)),
+            "LLM_MIN_CONCURRENCY": str(min(settings.LLM_MIN_CONCURRENCY,
+                                           split_limit(settings.LLM_MAX_CONCURRENCY, self.shards))),
+            "LLM_MAX_CONCURRENCY": str(split_limit(settings.LLM_MAX_CONCURRENCY, self.shards)),
+            "LLM_MAX_CONNECTIONS": str(split_limit(settings.LLM_MAX_CONNECTIONS, self.shards)),
+            "CAMPAIGN_TOKEN_BUDGET": str(split_limit(settings.CAMPAIGN_TOKEN_BUDGET, self.shards)),
+            "PYTHONUNBUFFERED": "1",
+        })
+        return env
+    
+    def partition(self, rows: Iterable[Dict]) -> List[int]:
+        """Write every lead with an email to its shard's input file and return the shard sizes."""
+        counts = [0] * self.shards
+        writers = []
+        try:
+            for index in range(self.shards):
+                os.makedirs(self.shard_dir(index), exist_ok=True)
+                writers.append(LeadCSVWriter(self.shard_path(index)))
+            for row in rows:
+                email = row.get("email")
+                if not email:
+                    continue
+                index = shard_of(email, self.shards)
+                writers[index].write_row({k: (v or '') for k, v in row.items()})
+                counts[index] += 1
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+        for writer in writers:
+            writer.commit()
+        return counts
+    
+    async def _run_worker(self, index: int, job: CampaignJob, progress: Dict[int, Dict]) -> int:
+        """Run one shard in a worker process, relaying its progress to the job."""
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.services.campaign_shards", "--worker", self.shard_dir(index),
+            cwd=PROJECT_ROOT,
+            env=self.worker_environment(index),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=1024 * 1024
+        )
+        try:
+            async for line in process.stdout:
+                text = line.decode("utf-8", errors="replace").rstrip()
+                if not text.startswith(EVENT_PREFIX):
+                    print(f"[shard {index}] {text}")
+                    continue
+                
+                message = json.loads(text[len(EVENT_PREFIX):])
+                progress[index] = message
+                job.processed = sum(shard["processed"] for shard in progress.values())
+                job.failed = sum(shard["failed"] for shard in progress.values())
+                job.high_priority = sum(shard["high_priority"] for shard in progress.values())
+                if message["event"] in ("lead", "high_priority"):
+                    job.publish(message["event"], message["data"])
+            return await process.wait()
+        except asyncio.CancelledError:
+            # Completed stages stay in the shard's journal and are resumed by the next run
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            raise
+    
+    async def run(self, job: CampaignJob, counts: List[int]) -> List[Dict]:
+        """Run every non-empty shard and return their results."""
+        shards = [index for index, count in enumerate(counts) if count]
+        progress: Dict[int, Dict] = {}
+        tasks = [asyncio.create_task(self._run_worker(index, job, progress)) for index in shards]
+        try:
+            exit_codes = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        
+        failed = [index for index, code in zip(shards, exit_codes) if code != 0]
+        if failed:
+            raise RuntimeError(f"Campaign shard(s) {', '.join(map(str, failed))} failed")
+        
+        results = []
+        for index in shards:
+            with open(os.path.join(self.shard_dir(index), "result.json"), encoding="utf-8") as f:
+                results.append(json.load(f))
+        return results
+    
+    @staticmethod
+    def merge_results(job: CampaignJob, results: List[Dict]):
+        """Combine the counters, statistics, token usage and errors of every shard into the job."""
+        job.processed = sum(result["processed"] for result in results)
+        job.failed = sum(result["failed"] for result in results)
+        job.high_priority = sum(result["high_priority"] for result in results)
+        job.stats = CampaignStats()
+        for result in results:
+            job.stats.merge(CampaignStats.from_dict(result["stats"]))
+            for stage, count in result["stages"].items():
+                job.stage_counts[stage] = job.stage_counts.get(stage, 0) + count
+            for stage, count in result["stage_failures"].items():
+                job.stage_failures[stage] = job.stage_failures.get(stage, 0) + count
+            job.errors.extend(result["errors"])
+            if job.token_budget is not None:
+                job.token_budget.merge(result["tokens"])
+    
+    def iter_output(self) -> Iterator[Dict]:
+        """Yield the processed leads of every shard."""
+        for index in range(self.shards):
+            yield from CSVService(self.shard_path(index)).iter_leads()
+    
+    def cleanup(self):
+        """Remove the shard files."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class _WorkerJob(CampaignJob):
+    """Campaign job of a worker process that reports every event to the coordinator."""
+    
+    def publish(self, event: str, data: Dict):
+        super().publish(event, data)
+        message = {
+            "event": event,
+            "data": data,
+            "processed": self.processed,
+            "failed": self.failed,
+            "high_priority": self.high_priority
+        }
+        print(f"{EVENT_PREFIX}{json.dumps(message, ensure_ascii=False)}", flush=True)
+
+
+async def run_worker(shard_dir: str):
+    """Process one shard with the regular campaign pipeline, minus mail delivery."""
+    from app import main
+    
+    job = _WorkerJob()
+    async with main.lifespan(main.app):
+        await main.run_campaign(job, main.build_lead_pipeline(send_mail=False), report=False)
+    
+    result = {
+        "processed": job.processed,
+        "failed": job.failed,
+        "high_priority": job.high_priority,
+        "stages": job.stage_counts,
+        "stage_failures": job.stage_failures,
+        "errors": list(job.errors),
+        "stats": job.stats.to_dict(),
+        "tokens": job.token_budget.to_dict()
+    }
+    with open(os.path.join(shard_dir, "result.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    # Final counters, the last lead event may predate the last failure
+    job.publish("finished", {})
+
+
+async def run_coordinator(shards: int) -> Dict:
+    """Run a sharded campaign outside the API server."""
+    from app import main
+    
+    async with main.lifespan(main.app):
+        return await main.run_sharded_campaign(CampaignJob(), shards)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the lead campaign across several worker processes.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--worker", metavar="SHARD_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        asyncio.run(run_worker(args.worker))
+        return
+    
+    result = asyncio.run(run_coordinator(args.shards))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Streaming, mergeable campaign statistics."""
+import math
+from typing import Dict, Iterable, Optional
+from app.models import Lead, Priority, ResponseStatus, enum_value
+
+
+class CampaignStats:
+    """Campaign statistics updated one lead at a time.
+    
+    Keeps counters by priority, persona and response plus a histogram of
+    scores, so memory does not grow with the number of leads. Scores are
+    small integers, which makes the histogram an exact quantile sketch.
+    Two aggregates merge by adding their counters, which combines shards
+    or the parts of a resumed run.
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.priorities: Dict[str, int] = {}
+        self.personas: Dict[str, int] = {}
+        self.responses: Dict[str, int] = {}
+        self.score_histogram: Dict[int, int] = {}
+        self.score_count = 0
+        self.score_sum = 0
+    
+    @classmethod
+    def from_leads(cls, leads: Iterable[Lead]) -> "CampaignStats":
+        """Aggregate a sequence of leads."""
+        stats = cls()
+        for lead in leads:
+            stats.add(lead)
+        return stats
+    
+    @staticmethod
+    def _bump(counts: Dict, key, step: int):
+        """Change one counter, dropping it when it reaches zero."""
+        count = counts.get(key, 0) + step
+        if count:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+    
+    def _count(self, lead: Lead, step: int):
+        """Add step (1 or -1) to every counter the lead contributes to."""
+        self.total += step
+        if lead.priority:
+            self._bump(self.priorities, enum_value(lead.priority), step)
+        if lead.persona:
+            self._bump(self.personas, lead.persona, step)
+        if lead.response_status:
+            self._bump(self.responses, enum_value(lead.response_status), step)
+        if lead.score:
+            score = int(lead.score)
+            self._bump(self.score_histogram, score, step)
+            self.score_count += step
+            self.score_sum += score * step
+    
+    def add(self, lead: Lead):
+        """Count a processed lead."""
+        self._count(lead, 1)
+    
+    def remove(self, lead: Lead):
+        """Uncount a lead added before, e.g. by a shard, that failed afterwards."""
+        self._count(lead, -1)
+    
+    def merge(self, other: "CampaignStats") -> "CampaignStats":
+        """Add the counters of another aggregate to this one."""
+        self.total += other.total
+        for mine, theirs in ((self.priorities, other.priorities), (self.personas, other.personas),
+                             (self.responses, other.responses), (self.score_histogram, other.score_histogram)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        self.score_count += other.score_count
+        self.score_sum += other.score_sum
+        return self
+    
+    def __add__(self, other: "CampaignStats") -> "CampaignStats":
+        return CampaignStats().merge(self).merge(other)
+    
+    @property
+    def average_score(self) -> float:
+        """Mean score of the scored leads."""
+        return self.score_sum / self.score_count if self.score_count else 0.0
+    
+    def quantile(self, q: float) -> Optional[int]:
+        """Return the score at quantile q (0..1), or None when nothing was scored."""
+        if not self.score_count:
+            return None
+        rank = min(self.score_count, max(1, math.ceil(q * self.score_count)))
+        seen = 0
+        for score in sorted(self.score_histogram):
+            seen += self.score_histogram[score]
+            if seen >= rank:
+                return score
+        return max(self.score_histogram)
+    
+    def snapshot(self) -> Dict:
+        """Return the statistics used by the campaign report."""
+        response_breakdown = {status.value: 0 for status in ResponseStatus}
+        response_breakdown.update(self.responses)
+        return {
+            "total": self.total,
+            "high_priority": self.priorities.get(Priority.HIGH.value, 0),
+            "medium_priority": self.priorities.get(Priority.MEDIUM.value, 0),
+            "low_priority": self.priorities.get(Priority.LOW.value, 0),
+            "average_score": self.average_score,
+            "score_quantiles": {
+                "p25": self.quantile(0.25),
+                "p50": self.quantile(0.5),
+                "p75": self.quantile(0.75),
+                "p90": self.quantile(0.9),
+            },
+            "persona_distribution": dict(self.personas),
+            "response_breakdown": response_breakdown
+        }
+    
+    def to_dict(self) -> Dict:
+        """Return the raw counters as a JSON-serialisable dict."""
+        return {
+            "total": self.total,
+            "priorities": dict(self.priorities),
+            "personas": dict(self.personas),
+            "responses": dict(self.responses),
+            "score_histogram": {str(score): count for score, count in self.score_histogram.items()},
+            "score_count": self.score_count,
+            "score_sum": self.score_sum
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CampaignStats":
+        """Restore an aggregate saved with to_dict()."""
+        stats = cls()
+        stats.total = data.get("total", 0)
+        stats.priorities = dict(data.get("priorities", {}))
+        stats.personas = dict(data.get("personas", {}))
+        stats.responses = dict(data.get("responses", {}))
+        stats.score_histogram = {int(score): count for score, count in data.get("score_histogram", {}).items()}
+        stats.score_count = data.get("score_count", 0)
+        stats.score_sum = data.get("score_sum", 0)
+        return stats
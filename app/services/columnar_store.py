@@ -0,0 +1,477 @@
+"""Columnar (Parquet / Arrow IPC) lead storage.
+
+Requires the optional 'pyarrow' package. The store is picked by file
+extension, so pointing CSV_FILE_PATH at a .parquet, .arrow or .feather file
+switches the service to columnar I/O.
+
+Convert between formats with:
+    python -m app.services.columnar_store data/leads.csv data/leads.parquet
+"""
+import bisect
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.models import Lead, enum_value
+from app.services.csv_service import FIELDNAMES, apply_lead_update, lead_to_row
+from app.services.lead_index import build_lead_query, decode_cursor, page_cursor
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+PARQUET_EXTENSIONS = {".parquet", ".pq"}
+ARROW_EXTENSIONS = {".arrow", ".feather", ".ipc"}
+
+
+def is_columnar_path(file_path: str) -> bool:
+    """Whether the file extension selects the columnar store."""
+    return os.path.splitext(file_path)[1].lower() in PARQUET_EXTENSIONS | ARROW_EXTENSIONS
+
+
+def lead_schema() -> "pa.Schema":
+    """Arrow schema of a lead file: text columns plus a small integer score."""
+    return pa.schema([(field, pa.int8() if field == 'score' else pa.string()) for field in FIELDNAMES])
+
+
+def _text(value) -> Optional[str]:
+    """Convert a row value to plain text."""
+    value = enum_value(value)
+    return None if value is None else str(value).strip()
+
+
+def _normalize_table(table: "pa.Table") -> "pa.Table":
+    """Trim text columns, turn empty strings into nulls and cast to the lead schema."""
+    columns = []
+    for field in FIELDNAMES:
+        if field not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, pa.string()))
+            continue
+        column = pc.utf8_trim_whitespace(table.column(field).cast(pa.string()))
+        column = pc.if_else(pc.equal(column, ""), pa.scalar(None, pa.string()), column)
+        columns.append(column)
+    
+    score = columns[FIELDNAMES.index('score')]
+    try:
+        score = pc.cast(score, pa.int8())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Scores written as "7.0" or junk; parse them one by one
+        def parse(value):
+            try:
+                return int(float(value))
+            except (TypeError, ValueError):
+                return None
+        score = pa.array([parse(value) for value in score.to_pylist()], pa.int8())
+    columns[FIELDNAMES.index('score')] = score
+    return pa.Table.from_arrays(columns, schema=lead_schema())
+
+
+class ColumnarLeadWriter:
+    """Streaming columnar writer that atomically replaces the target file.
+    
+    Rows are buffered into record batches of row_group_size and written
+    compressed to a temporary file, which replaces the target on commit.
+    """
+    
+    def __init__(self, file_path: str, compression: str = "zstd", row_group_size: int = 50000):
+        self.file_path = file_path
+        self.rows_written = 0
+        self.row_group_size = max(1, row_group_size)
+        self._rows: List[Dict] = []
+        fd, self.temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(file_path) or ".",
+            prefix=f".{os.path.basename(file_path)}.",
+            suffix=".tmp"
+        )
+        os.close(fd)
+        schema = lead_schema()
+        if os.path.splitext(file_path)[1].lower() in PARQUET_EXTENSIONS:
+            self._writer = pq.ParquetWriter(self.temp_path, schema, compression=compression)
+        else:
+            self._sink = pa.OSFile(self.temp_path, "wb")
+            self._writer = pa.ipc.new_file(
+                self._sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression)
+            )
+    
+    def write_row(self, row: Dict):
+        """Append a raw row."""
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+    
+    def write_lead(self, lead: Lead):
+        """Append a single lead."""
+        self.write_row(lead_to_row(lead))
+    
+    def write_leads(self, leads: Iterable[Lead]):
+        """Append several leads."""
+        for lead in leads:
+            self.write_lead(lead)
+    
+    def write_table(self, table: "pa.Table"):
+        """Append an Arrow table that already has the lead schema."""
+        self._flush()
+        self._writer.write_table(table)
+        self.rows_written += table.num_rows
+    
+    def _flush(self):
+        """Write the buffered rows as one record batch."""
+        if not self._rows:
+            return
+        table = _normalize_table(pa.table({
+            field: pa.array([_text(row.get(field)) for row in self._rows], pa.string())
+            for field in FIELDNAMES
+        }))
+        self._writer.write_table(table)
+        self.rows_written += len(self._rows)
+        self._rows = []
+    
+    def _close(self):
+        """Finish the file footer and close the output."""
+        self._writer.close()
+        if hasattr(self, "_sink"):
+            self._sink.close()
+    
+    def commit(self):
+        """Sync the temporary file and move it over the target."""
+        self._flush()
+        self._close()
+        with open(self.temp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(self.temp_path, self.file_path)
+    
+    def abort(self):
+        """Discard the temporary file, leaving the target untouched."""
+        try:
+            self._close()
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+    
+    def __enter__(self) -> "ColumnarLeadWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+class ColumnarLeadStore:
+    """Lead storage in a compressed Parquet or Arrow IPC file.
+    
+    Offers the same surface as CSVService. Reads are column-projected, so a
+    campaign only decodes the columns it needs to build leads, and files
+    are written compressed through ColumnarLeadWriter.
+    """
+    
+    def __init__(self, file_path: str, compression: str = "zstd", row_group_size: int = 50000):
+        if pa is None:
+            raise ImportError(f"Reading {file_path} requires the 'pyarrow' package (pip install pyarrow)")
+        self.file_path = file_path
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.parquet = os.path.splitext(file_path)[1].lower() in PARQUET_EXTENSIONS
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def _iter_batches(self, columns: Optional[List[str]] = None,
+                      batch_size: int = 1000) -> Iterator["pa.RecordBatch"]:
+        """Yield record batches with only the requested columns decoded."""
+        if not os.path.exists(self.file_path):
+            return
+        
+        if self.parquet:
+            parquet_file = pq.ParquetFile(self.file_path)
+            available = parquet_file.schema_arrow.names
+            selected = [column for column in (columns or FIELDNAMES) if column in available]
+            yield from parquet_file.iter_batches(batch_size=batch_size, columns=selected)
+            return
+        
+        # IPC files are memory-mapped, so unselected columns are never touched
+        with pa.memory_map(self.file_path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            available = reader.schema.names
+            selected = [column for column in (columns or FIELDNAMES) if column in available]
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index).select(selected)
+                for offset in range(0, batch.num_rows, batch_size):
+                    yield batch.slice(offset, batch_size)
+    
+    @staticmethod
+    def _batch_rows(batch, columns: Optional[List[str]] = None) -> List[Dict[str, Optional[str]]]:
+        """Convert a record batch or table into CSVService-style row dicts."""
+        names = columns or FIELDNAMES
+        values = []
+        for name in names:
+            if name not in batch.schema.names:
+                values.append([None] * batch.num_rows)
+                continue
+            column = batch.column(name).to_pylist()
+            if name == 'score':
+                column = [str(value) if value is not None else None for value in column]
+            values.append(column)
+        return [dict(zip(names, row)) for row in zip(*values)]
+    
+    def read_table(self, columns: Optional[List[str]] = None) -> "pa.Table":
+        """Read the whole file as an Arrow table, projected to the given columns."""
+        batches = list(self._iter_batches(columns, batch_size=max(1, self.row_group_size)))
+        if not batches:
+            schema = lead_schema()
+            return schema.empty_table().select(columns or FIELDNAMES)
+        return pa.Table.from_batches(batches)
+    
+    def iter_leads(self, columns: Optional[List[str]] = None,
+                   priority: Optional[str] = None) -> Iterator[Dict[str, Optional[str]]]:
+        """Yield leads (optionally of one priority) one row at a time."""
+        for chunk in self.read_lead_chunks(columns=columns):
+            for row in chunk:
+                if priority and (row.get('priority') or '').lower() != priority.lower():
+                    continue
+                yield row
+    
+    def read_lead_chunks(self, chunk_size: int = 1000,
+                         columns: Optional[List[str]] = None) -> Iterator[List[Dict[str, Optional[str]]]]:
+        """Yield leads in chunks of at most chunk_size rows, decoding only the given columns."""
+        for batch in self._iter_batches(columns, chunk_size):
+            if batch.num_rows:
+                yield self._batch_rows(batch, columns)
+    
+    def count_leads(self) -> int:
+        """Count the leads with an email address, reading only the email column."""
+        total = 0
+        for batch in self._iter_batches(['email'], batch_size=65536):
+            total += pc.sum(pc.greater(pc.utf8_length(batch.column('email')), 0)).as_py() or 0
+        return total
+    
+    def read_leads(self) -> List[Dict[str, Optional[str]]]:
+        """Read all leads."""
+        return list(self.iter_leads())
+    
+    def open_writer(self) -> ColumnarLeadWriter:
+        """Open a streaming writer that replaces the file when committed."""
+        return ColumnarLeadWriter(self.file_path, self.compression, self.row_group_size)
+    
+    def write_leads(self, leads: List[Lead]):
+        """Write leads to the file."""
+        with self.open_writer() as writer:
+            writer.write_leads(leads)
+    
+    def update_leads(self, updated_leads: List[Lead]):
+        """Update existing leads, rewriting the file batch by batch."""
+        lead_map = {lead.email: lead for lead in updated_leads}
+        with self.open_writer() as writer:
+            for chunk in self.read_lead_chunks(self.row_group_size):
+                for row in chunk:
+                    email = (row.get('email') or '').strip()
+                    if email in lead_map:
+                        apply_lead_update(row, lead_map[email])
+                    writer.write_row(row)
+    
+    def _scan(self, columns: List[str],
+              wanted: Optional[Callable[[int, int, Optional[object]], bool]] = None) -> Iterator[Tuple[int, "pa.Table"]]:
+        """Yield (row id of the first row, table) per row group, decoding only the given columns.
+        
+        wanted(first row id, row count, Parquet row group metadata or None)
+        may rule out a row group before it is read.
+        """
+        if not os.path.exists(self.file_path):
+            return
+        
+        if self.parquet:
+            parquet_file = pq.ParquetFile(self.file_path)
+            selected = [column for column in columns if column in parquet_file.schema_arrow.names]
+            first_row = 0
+            for index in range(parquet_file.num_row_groups):
+                metadata = parquet_file.metadata.row_group(index)
+                if wanted is None or wanted(first_row, metadata.num_rows, metadata):
+                    yield first_row, parquet_file.read_row_group(index, columns=selected)
+                first_row += metadata.num_rows
+            return
+        
+        with pa.memory_map(self.file_path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            selected = [column for column in columns if column in reader.schema.names]
+            first_row = 0
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                if wanted is None or wanted(first_row, batch.num_rows, None):
+                    yield first_row, pa.Table.from_batches([batch.select(selected)])
+                first_row += batch.num_rows
+    
+    @staticmethod
+    def _score_range(metadata) -> Optional[Tuple[int, int]]:
+        """Lowest and highest score of a Parquet row group from its statistics, unscored rows as -1."""
+        if metadata is None:
+            return None
+        for index in range(metadata.num_columns):
+            column = metadata.column(index)
+            if column.path_in_schema != 'score':
+                continue
+            statistics = column.statistics
+            if statistics is None or not statistics.has_min_max or not statistics.has_null_count:
+                return None
+            low, high = statistics.min, statistics.max
+            return (-1 if statistics.null_count else low), high
+        return None
+    
+    def _take_rows(self, row_ids: List[int]) -> List[Dict[str, Optional[str]]]:
+        """Read the rows with the given ids, decoding only the row groups that hold them."""
+        needed = sorted(set(row_ids))
+        
+        def holds_needed(first_row, num_rows, metadata):
+            position = bisect.bisect_left(needed, first_row)
+            return position < len(needed) and needed[position] < first_row + num_rows
+        
+        rows = {}
+        for first_row, table in self._scan(FIELDNAMES, holds_needed):
+            local = [row_id - first_row for row_id in needed if first_row <= row_id < first_row + table.num_rows]
+            for row_id, row in zip([first_row + index for index in local], self._batch_rows(table.take(local))):
+                rows[row_id] = row
+        return [rows[row_id] for row_id in row_ids]
+    
+    def query_leads(
+        self,
+        priority: Optional[str] = None,
+        persona: Optional[str] = None,
+        email: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        sort: str = "score_desc",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """Return one page of leads matching the filters, plus the cursor of the next page.
+        
+        Only the filter columns are decoded while matching, and Parquet row
+        groups whose score statistics (or, for the row sort, position) rule
+        them out are skipped. Full rows are read for the page alone.
+        """
+        # Validates the sort and cursor the same way the indexed backends do
+        build_lead_query(priority, persona, email, min_score, max_score, sort, cursor)
+        values = decode_cursor(cursor) if cursor else None
+        
+        # Score bounds a row group must overlap, including the cursor's
+        low = min_score
+        high = max_score
+        if values and sort == "score_desc":
+            high = values[0] if high is None else min(high, values[0])
+        elif values and sort == "score_asc":
+            low = values[0] if low is None else max(low, values[0])
+        
+        def may_match(first_row, num_rows, metadata):
+            if values and sort == "row" and first_row + num_rows <= values[0] + 1:
+                return False
+            scores = self._score_range(metadata)
+            if scores is None:
+                return True
+            return (low is None or scores[1] >= low) and (high is None or scores[0] <= high)
+        
+        sort_keys = [("score", "descending" if sort == "score_desc" else "ascending"), ("row_id", "ascending")]
+        best = None
+        for first_row, table in self._scan(['priority', 'persona', 'email', 'score'], may_match):
+            row_ids = pa.arange(first_row, first_row + table.num_rows)
+            scores = pc.fill_null(table.column('score'), -1)
+            mask = pa.repeat(pa.scalar(True), table.num_rows)
+            for column, value in (("priority", priority), ("persona", persona), ("email", email)):
+                if value:
+                    mask = pc.and_(mask, pc.equal(pc.utf8_lower(table.column(column)), value.strip().lower()))
+            if min_score is not None:
+                mask = pc.and_(mask, pc.greater_equal(scores, min_score))
+            if max_score is not None:
+                mask = pc.and_(mask, pc.less_equal(scores, max_score))
+            if values:
+                if sort == "row":
+                    mask = pc.and_(mask, pc.greater(row_ids, values[0]))
+                else:
+                    beyond = pc.less if sort == "score_desc" else pc.greater
+                    mask = pc.and_(mask, pc.or_(
+                        beyond(scores, values[0]),
+                        pc.and_(pc.equal(scores, values[0]), pc.greater(row_ids, values[1]))
+                    ))
+            
+            matches = pa.table({"row_id": row_ids, "score": scores}).filter(pc.fill_null(mask, False))
+            best = matches if best is None else pa.concat_tables([best, matches])
+            if sort == "row":
+                # File order, the first limit + 1 matches are the page
+                if best.num_rows > limit:
+                    break
+                continue
+            # Only the best limit + 1 matches so far can make the page
+            if best.num_rows > limit + 1:
+                best = best.take(pc.select_k_unstable(best, limit + 1, sort_keys))
+        
+        if best is not None and sort != "row":
+            best = best.sort_by(sort_keys)
+        page = best.slice(0, limit + 1).to_pylist() if best is not None else []
+        has_more = len(page) > limit
+        page = page[:limit]
+        
+        rows = self._take_rows([match["row_id"] for match in page]) if page else []
+        if fields:
+            rows = [{key: row.get(key) for key in fields} for row in rows]
+        
+        next_cursor = page_cursor(sort, page[-1]["row_id"], page[-1]["score"]) if has_more else None
+        return {"leads": rows, "count": len(rows), "next_cursor": next_cursor}
+    
+    def import_csv(self, csv_path: str) -> int:
+        """Convert a CSV file into this store with the native Arrow CSV reader."""
+        read_options = pa_csv.ReadOptions(block_size=16 << 20)
+        parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+        # Keep every column as text so values such as zip codes are not reinterpreted
+        header = pa_csv.open_csv(csv_path, read_options=read_options, parse_options=parse_options).schema.names
+        convert_options = pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=True
+        )
+        reader = pa_csv.open_csv(csv_path, read_options=read_options, parse_options=parse_options,
+                                 convert_options=convert_options)
+        with self.open_writer() as writer:
+            for batch in reader:
+                writer.write_table(_normalize_table(pa.Table.from_batches([batch])))
+            return writer.rows_written
+    
+    def export_csv(self, csv_path: str) -> int:
+        """Write all leads to a CSV file with the native Arrow CSV writer."""
+        table = self.read_table()
+        temp_path = f"{csv_path}.tmp"
+        pa_csv.write_csv(table, temp_path, write_options=pa_csv.WriteOptions(quoting_style="needed"))
+        os.replace(temp_path, csv_path)
+        return table.num_rows
+    
+    def stats(self) -> Dict:
+        """Return the store size."""
+        return {"indexed_rows": self.count_leads(), "path": self.file_path}
+
+
+def main():
+    """Convert a lead file between CSV and columnar formats, picked by extension."""
+    if len(sys.argv) != 3:
+        print("Usage: python -m app.services.columnar_store <source> <target>")
+        sys.exit(2)
+    source, target = sys.argv[1:]
+    if is_columnar_path(target) and not is_columnar_path(source):
+        count = ColumnarLeadStore(target).import_csv(source)
+    elif is_columnar_path(source) and not is_columnar_path(target):
+        count = ColumnarLeadStore(source).export_csv(target)
+    elif is_columnar_path(source):
+        with ColumnarLeadStore(target).open_writer() as writer:
+            writer.write_table(ColumnarLeadStore(source).read_table())
+            count = writer.rows_written
+    else:
+        print("At least one of the files must be .parquet, .arrow or .feather")
+        sys.exit(2)
+    print(f"Converted {count} lead(s) from {source} to {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Confidence gating for skipping LLM calls on confident rule-based results."""
+from typing import Dict
+
+
+class ConfidenceGate:
+    """Decide per stage whether a rule-based result is good enough on its own.
+    
+    Every decision is counted so the skipped/called ratio of each stage can
+    be used to tune the threshold.
+    """
+    
+    def __init__(self, threshold: float, enabled: bool = True):
+        self.threshold = threshold
+        self.enabled = enabled
+        self.counts: Dict[str, Dict[str, int]] = {}
+    
+    def should_skip(self, stage: str, confidence: float) -> bool:
+        """Return True when the LLM call for this stage can be skipped."""
+        skip = self.enabled and confidence >= self.threshold
+        counts = self.counts.setdefault(stage, {"skipped": 0, "called": 0})
+        counts["skipped" if skip else "called"] += 1
+        return skip
+    
+    def stats(self) -> Dict:
+        """Return skipped/called counts and the skip ratio per stage."""
+        stages = {}
+        for stage, counts in self.counts.items():
+            total = counts["skipped"] + counts["called"]
+            stages[stage] = {
+                **counts,
+                "skip_ratio": round(counts["skipped"] / total, 4) if total else 0.0
+            }
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "stages": stages
+        }
@@ -1,8 +1,113 @@
 """CSV service for reading and writing leads."""
 import csv
 import os
-from typing import List, Dict, Optional
-from app.models import Lead, Priority, ResponseStatus
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.models import Lead
+
+
+# Define all possible columns
+FIELDNAMES = [
+    'name', 'email', 'company', 'industry', 'job_title', 'status',
+    'score', 'priority', 'persona', 'email_subject', 'email_body', 'response_status'
+]
+
+# Columns a campaign needs to build a lead; columnar stores read only these
+INPUT_FIELDS = ['name', 'email', 'company', 'industry', 'job_title', 'status']
+
+
+class LeadCSVWriter:
+    """Streaming CSV writer that atomically replaces the target file.
+    
+    Rows go to a temporary file next to the target, which only replaces the
+    target once everything has been written and synced to disk. A crash or
+    error mid-write leaves the original file untouched.
+    """
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.rows_written = 0
+        fd, self.temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(file_path) or ".",
+            prefix=f".{os.path.basename(file_path)}.",
+            suffix=".tmp"
+        )
+        self._file = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES)
+        self._writer.writeheader()
+    
+    def write_row(self, row: Dict):
+        """Append a raw row."""
+        self._writer.writerow(row)
+        self.rows_written += 1
+    
+    def write_lead(self, lead: Lead):
+        """Append a lead."""
+        self.write_row(lead_to_row(lead))
+    
+    def write_leads(self, leads: Iterable[Lead]):
+        """Append a chunk of leads."""
+        for lead in leads:
+            self.write_lead(lead)
+    
+    def commit(self):
+        """Flush the temporary file and atomically move it over the target."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.temp_path, self.file_path)
+    
+    def abort(self):
+        """Discard everything written so far."""
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+    
+    def __enter__(self) -> "LeadCSVWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def lead_to_row(lead: Lead) -> Dict:
+    """Convert a lead into a CSV row."""
+    return {
+        'name': lead.name,
+        'email': lead.email,
+        'company': lead.company or '',
+        'industry': lead.industry or '',
+        'job_title': lead.job_title or '',
+        'status': lead.status or '',
+        'score': lead.score or '',
+        'priority': lead.priority or '',
+        'persona': lead.persona or '',
+        'email_subject': lead.email_subject or '',
+        'email_body': lead.email_body or '',
+        'response_status': lead.response_status or ''
+    }
+
+
+def apply_lead_update(row: Dict, lead: Lead) -> Dict:
+    """Patch a stored row with the AI-generated fields of a lead."""
+    row.update({
+        'score': str(lead.score) if lead.score else '',
+        'priority': lead.priority or '',
+        'persona': lead.persona or '',
+        'email_subject': lead.email_subject or '',
+        'email_body': lead.email_body or '',
+        'response_status': lead.response_status or ''
+    })
+    # Also update any enriched fields
+    if lead.industry:
+        row['industry'] = lead.industry
+    if lead.job_title:
+        row['job_title'] = lead.job_title
+    return row
 
 
 class CSVService:
@@ -16,88 +121,57 @@ class CSVService:
         """Ensure the directory exists."""
         os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
     
-    def read_leads(self) -> List[Dict[str, Optional[str]]]:
-        """Read leads from CSV file."""
+    def iter_leads(self, columns: Optional[List[str]] = None) -> Iterator[Dict[str, Optional[str]]]:
+        """Yield leads from the CSV file one row at a time, optionally only the given columns."""
         if not os.path.exists(self.file_path):
-            return []
+            return
         
-        leads = []
-        with open(self.file_path, 'r', encoding='utf-8') as f:
+        with open(self.file_path, 'r', encoding='utf-8', newline='') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 # Clean up the row data
-                cleaned_row = {k.strip(): (v.strip() if v else None) for k, v in row.items()}
-                leads.append(cleaned_row)
-        
-        return leads
+                row = {k.strip(): (v.strip() if v else None) for k, v in row.items() if k is not None}
+                yield {k: row.get(k) for k in columns} if columns else row
+    
+    def read_lead_chunks(self, chunk_size: int = 1000,
+                         columns: Optional[List[str]] = None) -> Iterator[List[Dict[str, Optional[str]]]]:
+        """Yield leads from the CSV file in chunks of at most chunk_size rows."""
+        chunk = []
+        for row in self.iter_leads(columns):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def count_leads(self) -> int:
+        """Count the leads with an email address in the CSV file."""
+        return sum(1 for row in self.iter_leads() if row.get('email'))
+    
+    def read_leads(self) -> List[Dict[str, Optional[str]]]:
+        """Read leads from CSV file."""
+        return list(self.iter_leads())
+    
+    def open_writer(self) -> LeadCSVWriter:
+        """Open a streaming writer that replaces the CSV file when committed."""
+        self._ensure_directory()
+        return LeadCSVWriter(self.file_path)
     
     def write_leads(self, leads: List[Lead]):
         """Write leads to CSV file."""
-        self._ensure_directory()
-        
-        # Define all possible columns
-        fieldnames = [
-            'name', 'email', 'company', 'industry', 'job_title', 'status',
-            'score', 'priority', 'persona', 'email_subject', 'email_body', 'response_status'
-        ]
-        
-        with open(self.file_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for lead in leads:
-                row = {
-                    'name': lead.name,
-                    'email': lead.email,
-                    'company': lead.company or '',
-                    'industry': lead.industry or '',
-                    'job_title': lead.job_title or '',
-                    'status': lead.status or '',
-                    'score': lead.score or '',
-                    'priority': lead.priority or '',
-                    'persona': lead.persona or '',
-                    'email_subject': lead.email_subject or '',
-                    'email_body': lead.email_body or '',
-                    'response_status': lead.response_status or ''
-                }
-                writer.writerow(row)
+        with self.open_writer() as writer:
+            writer.write_leads(leads)
     
     def update_leads(self, updated_leads: List[Lead]):
         """Update existing CSV with new lead data."""
-        existing_leads = self.read_leads()
-        
         # Create a mapping of email to lead data
         lead_map = {lead.email: lead for lead in updated_leads}
         
-        # Update existing leads
-        updated_rows = []
-        for row in existing_leads:
-            email = row.get('email', '').strip()
-            if email in lead_map:
-                lead = lead_map[email]
-                row.update({
-                    'score': str(lead.score) if lead.score else '',
-                    'priority': lead.priority or '',
-                    'persona': lead.persona or '',
-                    'email_subject': lead.email_subject or '',
-                    'email_body': lead.email_body or '',
-                    'response_status': lead.response_status or ''
-                })
-                # Also update any enriched fields
-                if lead.industry:
-                    row['industry'] = lead.industry
-                if lead.job_title:
-                    row['job_title'] = lead.job_title
-            updated_rows.append(row)
-        
-        # Write back to CSV
-        fieldnames = [
-            'name', 'email', 'company', 'industry', 'job_title', 'status',
-            'score', 'priority', 'persona', 'email_subject', 'email_body', 'response_status'
-        ]
-        
-        with open(self.file_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(updated_rows)
-
+        # Stream existing rows into a new file, patching the updated ones
+        with self.open_writer() as writer:
+            for row in self.iter_leads():
+                email = (row.get('email') or '').strip()
+                if email in lead_map:
+                    apply_lead_update(row, lead_map[email])
+                writer.write_row({k: (v or '') for k, v in row.items() if k in FIELDNAMES})
@@ -1,6 +1,6 @@
 """Email generation service."""
 from typing import Dict
-from app.models import Lead, Priority
+from app.models import EmailResponse, Lead, Priority
 from app.services.llm_service import LLMService
 from app.utils.prompts import EMAIL_GENERATION_PROMPT
 
@@ -28,7 +28,10 @@ class EmailAgent:
         )
         
         try:
-            result = await self.llm_service.generate_json(prompt)
+            result = await self.llm_service.generate_json(
+                prompt, task="email", required_keys=("subject", "body"), schema=EmailResponse,
+                priority=lead.priority
+            )
             
             subject = result.get("subject", "Partnership Opportunity")
             body = result.get("body", "Hello, I'd like to discuss a potential partnership opportunity.")
@@ -0,0 +1,341 @@
+"""Persistent sidecar index for random access queries over the leads CSV."""
+import base64
+import csv
+import io
+import json
+import mmap
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+INDEX_VERSION = 1
+
+SORTS = {
+    "score_desc": ("score DESC, row_id ASC", "(score < ? OR (score = ? AND row_id > ?))"),
+    "score_asc": ("score ASC, row_id ASC", "(score > ? OR (score = ? AND row_id > ?))"),
+    "row": ("row_id ASC", "row_id > ?"),
+}
+
+
+def encode_cursor(values: List) -> str:
+    """Encode keyset pagination values as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> List:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def page_cursor(sort: str, row_id: int, score: int) -> str:
+    """Return the cursor that continues a page ending at the given row."""
+    return encode_cursor([row_id] if sort == "row" else [score, row_id])
+
+
+def build_lead_query(
+    priority: Optional[str],
+    persona: Optional[str],
+    email: Optional[str],
+    min_score: Optional[int],
+    max_score: Optional[int],
+    sort: str,
+    cursor: Optional[str]
+) -> Tuple[str, List, str]:
+    """Build the WHERE clause, its parameters and the ORDER BY clause of a lead query.
+    
+    The queried table needs row_id, email, priority, persona and score
+    columns, with unscored rows stored as -1.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(SORTS)}")
+    order_by, after = SORTS[sort]
+    
+    conditions, params = [], []
+    for column, value in (("priority", priority), ("persona", persona), ("email", email)):
+        if value:
+            conditions.append(f"{column} = ?")
+            params.append(value.strip().lower())
+    if min_score is not None:
+        conditions.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        conditions.append("score <= ?")
+        params.append(max_score)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != (1 if sort == "row" else 2):
+            raise ValueError("Cursor does not match the requested sort")
+        conditions.append(after)
+        params.extend(values if sort == "row" else [values[0], values[0], values[1]])
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params, order_by
+
+
+class LeadIndex:
+    """Byte-offset index of the leads CSV stored in a SQLite sidecar file.
+    
+    The index keeps the offset and length of every row together with the
+    columns used for filtering (email, priority, persona, score), so queries
+    read only the matching rows through a memory map instead of parsing the
+    whole file. It is rebuilt whenever the CSV's mtime or size changes.
+    """
+    
+    def __init__(self, csv_path: str, index_path: Optional[str] = None):
+        self.csv_path = csv_path
+        self.index_path = index_path or f"{csv_path}.index.sqlite3"
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._file = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._header: List[str] = []
+        self.builds = 0
+    
+    def _csv_signature(self) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of the CSV file, or None when it does not exist."""
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    @staticmethod
+    def _row_boundaries(data: mmap.mmap) -> Iterator[Tuple[int, int]]:
+        """Yield (offset, length) of every CSV record, keeping quoted newlines inside their record."""
+        size = len(data)
+        start = 0
+        position = 0
+        in_quotes = False
+        while position < size:
+            newline = data.find(b"\n", position)
+            end = size if newline < 0 else newline + 1
+            # An odd number of quotes on a line means a quoted field continues on the next one
+            if data[position:end].count(b'"') % 2:
+                in_quotes = not in_quotes
+            position = end
+            if not in_quotes:
+                yield start, end - start
+                start = end
+        if start < size:
+            yield start, size - start
+    
+    @staticmethod
+    def _parse_row(raw: bytes, header: List[str]) -> Dict[str, Optional[str]]:
+        """Parse one CSV record into a cleaned-up row dict."""
+        values = next(csv.reader(io.StringIO(raw.decode("utf-8"), newline="")), [])
+        return {
+            key.strip(): (value.strip() or None)
+            for key, value in zip(header, values)
+        }
+    
+    @staticmethod
+    def _score(value: Optional[str]) -> int:
+        """Parse a score column, using -1 for unscored rows so they sort last."""
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return -1
+    
+    def _build(self, data: Optional[mmap.mmap], signature: Tuple[int, int]):
+        """Scan the mapped CSV and write a fresh sidecar index next to it."""
+        temp_path = f"{self.index_path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        
+        db = sqlite3.connect(temp_path)
+        try:
+            db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            db.execute(
+                "CREATE TABLE rows (row_id INTEGER PRIMARY KEY, offset INTEGER NOT NULL, length INTEGER NOT NULL, "
+                "email TEXT, priority TEXT, persona TEXT, score INTEGER NOT NULL)"
+            )
+            
+            header: List[str] = []
+            boundaries = self._row_boundaries(data) if data is not None else iter(())
+            first = next(boundaries, None)
+            if first is not None:
+                header = next(csv.reader([data[first[0]:first[0] + first[1]].decode("utf-8-sig")]))
+            
+            batch = []
+            for row_id, (offset, length) in enumerate(boundaries):
+                row = self._parse_row(data[offset:offset + length], header)
+                if not any(row.values()):
+                    continue
+                batch.append((
+                    row_id, offset, length, (row.get("email") or "").lower() or None,
+                    (row.get("priority") or "").lower() or None,
+                    (row.get("persona") or "").lower() or None,
+                    self._score(row.get("score"))
+                ))
+                if len(batch) >= 10000:
+                    db.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                    batch = []
+            db.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            
+            # Secondary indexes are cheaper to create after the bulk insert
+            db.execute("CREATE INDEX idx_rows_email ON rows (email)")
+            db.execute("CREATE INDEX idx_rows_priority ON rows (priority, score, row_id)")
+            db.execute("CREATE INDEX idx_rows_persona ON rows (persona, score, row_id)")
+            db.execute("CREATE INDEX idx_rows_score ON rows (score, row_id)")
+            db.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", str(INDEX_VERSION)),
+                ("mtime_ns", str(signature[0])),
+                ("size", str(signature[1])),
+                ("header", json.dumps(header)),
+            ])
+            db.commit()
+        finally:
+            db.close()
+        
+        os.replace(temp_path, self.index_path)
+        self.builds += 1
+    
+    def _read_meta(self, db: sqlite3.Connection) -> Optional[Dict[str, str]]:
+        """Read the metadata of an index file, or None when it is unreadable."""
+        try:
+            return dict(db.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.DatabaseError:
+            return None
+    
+    def _close_handles(self):
+        """Release the index connection and the CSV memory map."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._signature = None
+    
+    def _ensure_current(self) -> bool:
+        """Make sure the index matches the CSV on disk; returns False when there is no CSV."""
+        signature = self._csv_signature()
+        if signature is not None and signature == self._signature:
+            return True
+        
+        self._close_handles()
+        if signature is None:
+            return False
+        
+        # Take the signature from the open handle so the map and the index describe the same file
+        self._file = open(self.csv_path, "rb")
+        stat = os.fstat(self._file.fileno())
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature[1]:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        # Reuse a sidecar left by a previous process when it still matches
+        db = sqlite3.connect(self.index_path, check_same_thread=False) if os.path.exists(self.index_path) else None
+        meta = self._read_meta(db) if db is not None else None
+        if meta is None or meta.get("version") != str(INDEX_VERSION) or \
+                (int(meta["mtime_ns"]), int(meta["size"])) != signature:
+            if db is not None:
+                db.close()
+            self._build(self._mmap, signature)
+            db = sqlite3.connect(self.index_path, check_same_thread=False)
+            meta = self._read_meta(db)
+        
+        self._db = db
+        self._header = json.loads(meta["header"])
+        self._signature = signature
+        return True
+    
+    def refresh(self):
+        """Rebuild the index if the CSV changed since it was built."""
+        with self._lock:
+            self._ensure_current()
+    
+    def _read_rows(self, locations: List[Tuple[int, int]]) -> List[Dict[str, Optional[str]]]:
+        """Read and parse rows at the given byte locations."""
+        return [self._parse_row(self._mmap[offset:offset + length], self._header) for offset, length in locations]
+    
+    def query_leads(
+        self,
+        priority: Optional[str] = None,
+        persona: Optional[str] = None,
+        email: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        sort: str = "score_desc",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """Return one page of leads matching the filters, plus the cursor of the next page."""
+        where, params, order_by = build_lead_query(priority, persona, email, min_score, max_score, sort, cursor)
+        with self._lock:
+            if not self._ensure_current():
+                return {"leads": [], "count": 0, "next_cursor": None}
+            rows = self._db.execute(
+                f"SELECT row_id, offset, length, score FROM rows {where} ORDER BY {order_by} LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+            page = rows[:limit]
+            leads = self._read_rows([(offset, length) for _, offset, length, _ in page])
+        
+        if fields:
+            leads = [{key: lead.get(key) for key in fields} for lead in leads]
+        
+        next_cursor = None
+        if len(rows) > limit and page:
+            row_id, _, _, score = page[-1]
+            next_cursor = page_cursor(sort, row_id, score)
+        return {"leads": leads, "count": len(leads), "next_cursor": next_cursor}
+    
+    def iter_leads(self, priority: Optional[str] = None) -> Iterator[Dict[str, Optional[str]]]:
+        """Yield all leads (optionally of one priority) in file order.
+        
+        Freshness is checked once: the iteration keeps its own index
+        connection and memory map, so a CSV replaced while it runs does not
+        mix rows of the old and the new file.
+        """
+        with self._lock:
+            if not self._ensure_current():
+                return
+            db = sqlite3.connect(self.index_path, check_same_thread=False)
+            data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._mmap is not None else None
+            header = self._header
+        
+        page_size = 1000
+        try:
+            cursor = None
+            while True:
+                where, params, order_by = build_lead_query(priority, None, None, None, None, "row", cursor)
+                rows = db.execute(
+                    f"SELECT row_id, offset, length FROM rows {where} ORDER BY {order_by} LIMIT ?",
+                    (*params, page_size)
+                ).fetchall()
+                for _, offset, length in rows:
+                    yield self._parse_row(data[offset:offset + length], header)
+                if len(rows) < page_size:
+                    return
+                cursor = page_cursor("row", rows[-1][0], None)
+        finally:
+            db.close()
+            if data is not None:
+                data.close()
+    
+    def stats(self) -> Dict:
+        """Return index freshness and size information."""
+        with self._lock:
+            if not self._ensure_current():
+                return {"indexed_rows": 0, "builds": self.builds, "index_path": self.index_path}
+            count = self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        return {"indexed_rows": count, "builds": self.builds, "index_path": self.index_path}
+    
+    def close(self):
+        """Release the index connection and the memory map."""
+        with self._lock:
+            self._close_handles()
@@ -0,0 +1,108 @@
+"""Fused lead enrichment and scoring service."""
+from typing import Dict, Optional
+from app.models import Lead, ProfileResponse
+from app.services.llm_service import LLMService
+from app.services.confidence_gate import ConfidenceGate
+from app.services.persona_agent import PersonaAgent
+from app.services.lead_scoring import LeadScoringService
+from app.services.token_budget import TokenBudgetExceeded
+from app.utils.prompts import LEAD_PROFILE_PROMPT
+
+
+class LeadProfiler:
+    """Service for enriching and scoring a lead with a single LLM call."""
+    
+    def __init__(
+        self,
+        llm_service: LLMService,
+        persona_agent: PersonaAgent,
+        lead_scoring_service: LeadScoringService,
+        confidence_gate: Optional[ConfidenceGate] = None
+    ):
+        self.llm_service = llm_service
+        self.persona_agent = persona_agent
+        self.lead_scoring_service = lead_scoring_service
+        self.confidence_gate = confidence_gate
+    
+    async def _profile_with_two_calls(self, lead: Lead) -> Dict:
+        """Enrich and then score the lead with separate LLM calls."""
+        enrichment = await self.persona_agent.enrich_lead(lead)
+        enriched_lead = lead.model_copy(update={
+            "industry": enrichment["industry"],
+            "job_title": enrichment["job_title"],
+            "persona": enrichment["persona"]
+        })
+        scoring = await self.lead_scoring_service.score_lead(enriched_lead)
+        return {
+            "industry": enrichment["industry"],
+            "job_title": enrichment["job_title"],
+            "persona": enrichment["persona"],
+            "score": scoring["score"],
+            "priority": scoring["priority"],
+            "reasoning": f"{enrichment['reasoning']} {scoring['reasoning']}"
+        }
+    
+    async def profile_lead(self, lead: Lead) -> Dict:
+        """Enrich, assign persona and score a lead in one round-trip.
+        
+        The same merge rules as the separate services apply: the
+        deterministic persona wins over "Other", and the final score blends
+        the rule-based score of the enriched lead with the LLM score. If the
+        fused answer is unusable, the lead goes through the two-call path
+        instead. Once the campaign token budget is spent, the lead keeps its
+        rule-based results; other errors of the request are raised.
+        """
+        persona = self.persona_agent.map_persona_from_title(lead.job_title or "")
+        base_score = self.lead_scoring_service.calculate_base_score(lead)
+        
+        # Skip the call only when both rule-based results are confident
+        if self.confidence_gate is not None:
+            confidence = min(
+                self.persona_agent.persona_confidence(lead, persona),
+                self.lead_scoring_service.score_confidence(base_score)
+            )
+            if self.confidence_gate.should_skip("profile", confidence):
+                enrichment = self.persona_agent.skipped_llm_enrichment(lead, persona)
+                scoring = self.lead_scoring_service.skipped_llm_result(base_score)
+                return {**enrichment, "score": scoring["score"], "priority": scoring["priority"]}
+        
+        prompt = LEAD_PROFILE_PROMPT.format(
+            name=lead.name or "Unknown",
+            email=lead.email or "Unknown",
+            company=lead.company or "Unknown",
+            industry=lead.industry or "Unknown",
+            job_title=lead.job_title or "Unknown",
+            status=lead.status or "Unknown",
+            suggested_persona=persona,
+            base_score=base_score
+        )
+        
+        try:
+            result = await self.llm_service.generate_json(prompt, task="profile", schema=ProfileResponse)
+            enrichment = self.persona_agent.merge_enrichment(lead, persona, result)
+            
+            # Scoring rules apply to the enriched industry and title
+            enriched_lead = lead.model_copy(update={
+                "industry": enrichment["industry"],
+                "job_title": enrichment["job_title"]
+            })
+            enriched_base_score = self.lead_scoring_service.calculate_base_score(enriched_lead)
+            scoring = self.lead_scoring_service.merge_llm_score(enriched_base_score, result)
+        except TokenBudgetExceeded as e:
+            # No request fits the budget any more, so the two-call path would be refused too
+            enrichment = self.persona_agent.deterministic_enrichment(lead, persona, e)
+            scoring = self.lead_scoring_service.rule_based_score(base_score, e)
+            return {**enrichment, "score": scoring["score"], "priority": scoring["priority"]}
+        except ValueError:
+            # The answer could not be parsed or validated; transport errors
+            # propagate instead of costing two more calls
+            return await self._profile_with_two_calls(lead)
+        
+        return {
+            "industry": enrichment["industry"],
+            "job_title": enrichment["job_title"],
+            "persona": enrichment["persona"],
+            "score": scoring["score"],
+            "priority": scoring["priority"],
+            "reasoning": enrichment["reasoning"]
+        }
@@ -1,50 +1,29 @@
 """Lead scoring service."""
-from typing import Dict
-from app.models import Lead, Priority
+import asyncio
+from typing import Dict, List, Optional
+from app.config import settings
+from app.models import Lead, Priority, ScoringResponse
 from app.services.llm_service import LLMService
-from app.utils.prompts import LEAD_SCORING_PROMPT
+from app.services.confidence_gate import ConfidenceGate
+from app.utils.batching import plan_batches
+from app.utils.lead_rules import calculate_base_score
+from app.utils.prompts import LEAD_SCORING_PROMPT, LEAD_SCORING_BATCH_PROMPT, LEAD_SCORING_BATCH_ITEM
+
+
+# Expected completion size of one lead entry in a batch response
+BATCH_OUTPUT_TOKENS_PER_LEAD = 80
 
 
 class LeadScoringService:
     """Service for scoring leads using rule-based logic and LLM enhancement."""
     
-    def __init__(self, llm_service: LLMService):
+    def __init__(self, llm_service: LLMService, confidence_gate: Optional[ConfidenceGate] = None):
         self.llm_service = llm_service
+        self.confidence_gate = confidence_gate
     
-    def _calculate_base_score(self, lead: Lead) -> int:
+    def calculate_base_score(self, lead: Lead) -> int:
         """Calculate base score using rule-based logic."""
-        score = 5  # Base score
-        
-        job_title = (lead.job_title or "").lower()
-        industry = (lead.industry or "").lower()
-        company = (lead.company or "").strip()
-        
-        # Job title scoring (decision-making authority)
-        if any(title in job_title for title in ["ceo", "founder", "president", "owner"]):
-            score += 3
-        elif any(title in job_title for title in ["cto", "cfo", "coo", "vp", "vice president"]):
-            score += 2
-        elif any(title in job_title for title in ["director", "head of", "chief"]):
-            score += 1
-        elif any(title in job_title for title in ["manager", "lead"]):
-            score += 0
-        else:
-            score -= 1  # Unknown or lower-level roles
-        
-        # Industry scoring (high-value industries)
-        high_value_industries = ["technology", "finance", "healthcare", "pharmaceutical", "aerospace"]
-        if any(ind in industry for ind in high_value_industries):
-            score += 1
-        
-        # Company presence (having a company name is better)
-        if company and company != "Unknown":
-            score += 1
-        
-        # Status scoring
-        if lead.status and "active" in (lead.status or "").lower():
-            score += 1
-        
-        return max(1, min(10, score))
+        return calculate_base_score(lead.job_title, lead.industry, lead.company, lead.status)
     
     def _derive_priority(self, score: int) -> Priority:
         """Derive priority from score."""
@@ -55,11 +34,81 @@ class LeadScoringService:
         else:
             return Priority.LOW
     
+    def _blend_scores(self, base_score: int, llm_score: int) -> int:
+        """Blend base score (70%) with LLM score (30%) for stability."""
+        return max(1, min(10, int(base_score * 0.7 + llm_score * 0.3)))
+    
+    def score_confidence(self, base_score: int) -> float:
+        """Estimate how likely the rule-based priority survives LLM refinement.
+        
+        The LLM is asked to adjust the base score, so plausible answers lie
+        within two points of it. The confidence is the share of those answers
+        whose blended score keeps the priority of the base score.
+        """
+        base_priority = self._derive_priority(base_score)
+        candidates = range(max(1, base_score - 2), min(10, base_score + 2) + 1)
+        stable = sum(
+            1 for llm_score in candidates
+            if self._derive_priority(self._blend_scores(base_score, llm_score)) == base_priority
+        )
+        return stable / len(candidates)
+    
+    def _should_skip_llm(self, base_score: int) -> bool:
+        """Whether the scoring LLM call can be skipped for this base score."""
+        if self.confidence_gate is None:
+            return False
+        return self.confidence_gate.should_skip("scoring", self.score_confidence(base_score))
+    
+    def skipped_llm_result(self, base_score: int) -> Dict:
+        """Result used when the rule-based score is confident enough."""
+        return {
+            "score": base_score,
+            "priority": self._derive_priority(base_score),
+            "reasoning": f"Base score: {base_score}, LLM refinement skipped"
+        }
+    
+    def merge_llm_score(self, base_score: int, result: Dict) -> Dict:
+        """Blend the LLM refined score with the rule-based score."""
+        # Get LLM score, but use base_score as fallback
+        llm_score = result.get("score")
+        if llm_score is not None:
+            try:
+                final_score = self._blend_scores(base_score, int(llm_score))
+            except (ValueError, TypeError):
+                final_score = base_score
+        else:
+            final_score = base_score
+        
+        final_score = max(1, min(10, final_score))
+        
+        # Derive priority from score (not from LLM)
+        priority = self._derive_priority(final_score)
+        
+        return {
+            "score": final_score,
+            "priority": priority,
+            "reasoning": result.get("reasoning", f"Base score: {base_score}, Refined: {final_score}")
+        }
+    
+    def rule_based_score(self, base_score: int, error: Exception) -> Dict:
+        """Fallback result when the LLM refinement is unavailable."""
+        priority = self._derive_priority(base_score)
+        return {
+            "score": base_score,
+            "priority": priority,
+            "reasoning": f"Rule-based scoring applied. Error: {str(error)}"
+        }
+    
     async def score_lead(self, lead: Lead) -> Dict:
         """Score a lead using rule-based logic with LLM refinement."""
         # Calculate base score using rules
-        base_score = self._calculate_base_score(lead)
-        
+        base_score = self.calculate_base_score(lead)
+        if self._should_skip_llm(base_score):
+            return self.skipped_llm_result(base_score)
+        return await self._refine_score(lead, base_score)
+    
+    async def _refine_score(self, lead: Lead, base_score: int) -> Dict:
+        """Refine a base score with one LLM call, falling back to the base score."""
         # Use LLM to refine the score based on context
         prompt = LEAD_SCORING_PROMPT.format(
             name=lead.name or "Unknown",
@@ -72,36 +121,79 @@ class LeadScoringService:
         )
         
         try:
-            result = await self.llm_service.generate_json(prompt)
-            
-            # Get LLM score, but use base_score as fallback
-            llm_score = result.get("score")
-            if llm_score is not None:
-                try:
-                    llm_score = int(llm_score)
-                    # Blend base score (70%) with LLM score (30%) for stability
-                    final_score = int(base_score * 0.7 + llm_score * 0.3)
-                except (ValueError, TypeError):
-                    final_score = base_score
-            else:
-                final_score = base_score
-            
-            final_score = max(1, min(10, final_score))
-            
-            # Derive priority from score (not from LLM)
-            priority = self._derive_priority(final_score)
-            
-            return {
-                "score": final_score,
-                "priority": priority,
-                "reasoning": result.get("reasoning", f"Base score: {base_score}, Refined: {final_score}")
-            }
+            result = await self.llm_service.generate_json(prompt, task="scoring", schema=ScoringResponse)
+            return self.merge_llm_score(base_score, result)
         except Exception as e:
             # Fallback to rule-based scoring
-            priority = self._derive_priority(base_score)
-            return {
-                "score": base_score,
-                "priority": priority,
-                "reasoning": f"Rule-based scoring applied. Error: {str(e)}"
-            }
-
+            return self.rule_based_score(base_score, e)
+    
+    async def score_leads(self, leads: List[Lead]) -> List[Dict]:
+        """Score several leads, sending them to the LLM in batches.
+        
+        Leads whose base score is confident skip the LLM entirely. Leads
+        missing from a batch response are retried individually; when a
+        whole batch call fails its leads fall back to rule-based scoring.
+        """
+        base_scores = [self.calculate_base_score(lead) for lead in leads]
+        results: List[Optional[Dict]] = [None] * len(leads)
+        
+        # Confident rule-based scores never reach the LLM
+        pending = []
+        for index, base_score in enumerate(base_scores):
+            if self._should_skip_llm(base_score):
+                results[index] = self.skipped_llm_result(base_score)
+            else:
+                pending.append(index)
+        
+        items = [
+            LEAD_SCORING_BATCH_ITEM.format(
+                lead_id=f"L{index + 1}",
+                name=leads[index].name or "Unknown",
+                email=leads[index].email or "Unknown",
+                company=leads[index].company or "Unknown",
+                industry=leads[index].industry or "Unknown",
+                job_title=leads[index].job_title or "Unknown",
+                status=leads[index].status or "Unknown",
+                base_score=base_scores[index]
+            )
+            for index in pending
+        ]
+        
+        batches = plan_batches(
+            [self.llm_service.estimate_tokens(item) for item in items],
+            max_batch_size=settings.LLM_BATCH_SIZE,
+            token_budget=settings.LLM_BATCH_TOKEN_BUDGET,
+            overhead_tokens=self.llm_service.estimate_tokens(LEAD_SCORING_BATCH_PROMPT),
+            output_tokens_per_item=BATCH_OUTPUT_TOKENS_PER_LEAD
+        )
+        missing = []
+        for batch in batches:
+            prompt = LEAD_SCORING_BATCH_PROMPT.format(
+                count=len(batch),
+                leads="\n\n".join(items[position] for position in batch)
+            )
+            try:
+                batch_results = await self.llm_service.generate_json_batch(
+                    prompt,
+                    task="scoring",
+                    max_tokens=BATCH_OUTPUT_TOKENS_PER_LEAD * len(batch),
+                    schema=ScoringResponse
+                )
+            except Exception as e:
+                for position in batch:
+                    index = pending[position]
+                    results[index] = self.rule_based_score(base_scores[index], e)
+                continue
+            
+            for position in batch:
+                index = pending[position]
+                result = batch_results.get(f"L{index + 1}")
+                if result is None:
+                    missing.append(index)
+                else:
+                    results[index] = self.merge_llm_score(base_scores[index], result)
+        
+        retried = await asyncio.gather(*(self._refine_score(leads[index], base_scores[index]) for index in missing))
+        for index, result in zip(missing, retried):
+            results[index] = result
+        return results
@@ -0,0 +1,296 @@
+"""Lead storage backends behind the CSVService interface."""
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from app.models import Lead, enum_value
+from app.services.columnar_store import ColumnarLeadStore, is_columnar_path
+from app.services.csv_service import FIELDNAMES, CSVService, LeadCSVWriter, lead_to_row
+from app.services.lead_index import build_lead_query, page_cursor
+
+
+_UPSERT_COLUMNS = [field for field in FIELDNAMES if field != 'email']
+
+_UPSERT_SQL = (
+    f"INSERT INTO leads ({', '.join(FIELDNAMES)}) VALUES ({', '.join('?' * len(FIELDNAMES))}) "
+    f"ON CONFLICT(email) DO UPDATE SET {', '.join(f'{field} = excluded.{field}' for field in _UPSERT_COLUMNS)}"
+)
+
+
+def _to_record(row: Dict) -> Optional[tuple]:
+    """Convert a CSV-style row into a leads table record, or None when it has no email."""
+    email = (row.get('email') or '').strip()
+    if not email:
+        return None
+    record = []
+    for field in FIELDNAMES:
+        value = enum_value(row.get(field))
+        value = str(value).strip() if value is not None else ''
+        if field == 'score':
+            try:
+                record.append(int(float(value)))
+            except ValueError:
+                record.append(-1)
+        else:
+            record.append(value or None)
+    return tuple(record)
+
+
+def _to_row(record: tuple) -> Dict[str, Optional[str]]:
+    """Convert a leads table record into the row dict returned by CSVService."""
+    row = dict(zip(FIELDNAMES, record))
+    row['score'] = str(row['score']) if row['score'] is not None and row['score'] >= 0 else None
+    return row
+
+
+class SQLiteLeadWriter:
+    """Writer that upserts leads into the SQLite store, keyed on email.
+    
+    Mirrors LeadCSVWriter. Every write_leads() call commits as one
+    transaction on a dedicated connection, so readers keep working during a
+    long campaign; leads that are never written keep their stored values.
+    """
+    
+    def __init__(self, store: "SQLiteLeadStore", batch_size: int = 1000):
+        self.rows_written = 0
+        self.batch_size = max(1, batch_size)
+        self._db = store.connect()
+        self._pending: List[tuple] = []
+    
+    def write_row(self, row: Dict):
+        """Queue a raw row, upserting the queue once it reaches the batch size."""
+        record = _to_record(row)
+        if record is not None:
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+    
+    def write_lead(self, lead: Lead):
+        """Queue a single lead."""
+        self.write_row(lead_to_row(lead))
+    
+    def write_leads(self, leads: Iterable[Lead]):
+        """Upsert several leads in one transaction."""
+        for lead in leads:
+            self.write_lead(lead)
+        self.flush()
+    
+    def flush(self):
+        """Upsert the queued rows."""
+        if not self._pending:
+            return
+        with self._db:
+            self._db.executemany(_UPSERT_SQL, self._pending)
+        self.rows_written += len(self._pending)
+        self._pending = []
+    
+    def commit(self):
+        """Upsert the remaining rows and close the connection."""
+        try:
+            self.flush()
+        finally:
+            self._db.close()
+    
+    def abort(self):
+        """Drop the rows that were not flushed yet and close the connection."""
+        self._pending = []
+        self._db.close()
+    
+    def __enter__(self) -> "SQLiteLeadWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+class SQLiteLeadStore:
+    """Lead storage in an embedded SQLite database.
+    
+    Offers the same read/write/update surface as CSVService plus indexed
+    queries, so updating a few leads touches only their rows instead of
+    rewriting the whole file. The database runs in WAL mode, so readers are
+    never blocked by a writer and concurrent writers are serialised.
+    """
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = self.connect()
+        columns = ", ".join(
+            "score INTEGER NOT NULL DEFAULT -1" if field == 'score' else
+            "email TEXT NOT NULL UNIQUE COLLATE NOCASE" if field == 'email' else
+            f"{field} TEXT COLLATE NOCASE" if field in ('priority', 'persona') else
+            f"{field} TEXT"
+            for field in FIELDNAMES
+        )
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS leads (row_id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_leads_priority ON leads (priority, score, row_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_leads_persona ON leads (persona, score, row_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_leads_score ON leads (score, row_id)")
+        self._db.commit()
+    
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the lead database."""
+        db = sqlite3.connect(self.file_path, check_same_thread=False, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+    
+    def _select(self, where: str = "", params: Iterable = (), order_by: str = "row_id ASC",
+                limit: Optional[int] = None) -> List[tuple]:
+        """Fetch raw records including row_id."""
+        sql = f"SELECT row_id, {', '.join(FIELDNAMES)} FROM leads {where} ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return self._db.execute(sql, tuple(params)).fetchall()
+    
+    def iter_leads(self, columns: Optional[List[str]] = None, priority: Optional[str] = None,
+                   page_size: int = 1000) -> Iterator[Dict[str, Optional[str]]]:
+        """Yield leads (optionally of one priority) in insertion order, one page at a time."""
+        last_row_id = 0
+        while True:
+            conditions, params = ["row_id > ?"], [last_row_id]
+            if priority:
+                conditions.append("priority = ?")
+                params.append(priority)
+            records = self._select(f"WHERE {' AND '.join(conditions)}", params, limit=page_size)
+            for record in records:
+                row = _to_row(record[1:])
+                yield {k: row.get(k) for k in columns} if columns else row
+            if len(records) < page_size:
+                return
+            last_row_id = records[-1][0]
+    
+    def read_lead_chunks(self, chunk_size: int = 1000,
+                         columns: Optional[List[str]] = None) -> Iterator[List[Dict[str, Optional[str]]]]:
+        """Yield leads in chunks of at most chunk_size rows."""
+        chunk = []
+        for row in self.iter_leads(columns, page_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def count_leads(self) -> int:
+        """Count the stored leads."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+    
+    def read_leads(self) -> List[Dict[str, Optional[str]]]:
+        """Read all leads."""
+        return list(self.iter_leads())
+    
+    def open_writer(self) -> SQLiteLeadWriter:
+        """Open a writer that upserts leads keyed on email."""
+        return SQLiteLeadWriter(self)
+    
+    def write_leads(self, leads: List[Lead]):
+        """Replace all stored leads."""
+        records = [record for record in (_to_record(lead_to_row(lead)) for lead in leads) if record is not None]
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM leads")
+            self._db.executemany(_UPSERT_SQL, records)
+    
+    def update_leads(self, updated_leads: List[Lead]):
+        """Update existing leads in place."""
+        updates = []
+        for lead in updated_leads:
+            updates.append((
+                lead.score if lead.score else -1,
+                lead.priority or None,
+                lead.persona or None,
+                lead.email_subject or None,
+                lead.email_body or None,
+                lead.response_status or None,
+                # Enriched fields only overwrite when present
+                lead.industry or None,
+                lead.job_title or None,
+                lead.email
+            ))
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE leads SET score = ?, priority = ?, persona = ?, email_subject = ?, email_body = ?, "
+                "response_status = ?, industry = COALESCE(?, industry), job_title = COALESCE(?, job_title) "
+                "WHERE email = ?",
+                updates
+            )
+    
+    def query_leads(
+        self,
+        priority: Optional[str] = None,
+        persona: Optional[str] = None,
+        email: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        sort: str = "score_desc",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """Return one page of leads matching the filters, plus the cursor of the next page."""
+        where, params, order_by = build_lead_query(priority, persona, email, min_score, max_score, sort, cursor)
+        records = self._select(where, params, order_by, limit + 1)
+        page = records[:limit]
+        leads = [_to_row(record[1:]) for record in page]
+        if fields:
+            leads = [{key: lead.get(key) for key in fields} for lead in leads]
+        
+        next_cursor = None
+        if len(records) > limit and page:
+            last = page[-1]
+            next_cursor = page_cursor(sort, last[0], last[1 + FIELDNAMES.index('score')])
+        return {"leads": leads, "count": len(leads), "next_cursor": next_cursor}
+    
+    def import_csv(self, csv_path: str) -> int:
+        """Upsert every lead of a CSV file and return how many rows were imported."""
+        writer = self.open_writer()
+        with writer:
+            for row in CSVService(csv_path).iter_leads():
+                writer.write_row(row)
+        return writer.rows_written
+    
+    def export_csv(self, csv_path: str) -> int:
+        """Write all stored leads to a CSV file and return how many rows were exported."""
+        with LeadCSVWriter(csv_path) as writer:
+            for row in self.iter_leads():
+                writer.write_row({k: (v or '') for k, v in row.items()})
+            return writer.rows_written
+    
+    def stats(self) -> Dict:
+        """Return the store size."""
+        return {"indexed_rows": self.count_leads(), "path": self.file_path}
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+
+LeadStore = Union[CSVService, ColumnarLeadStore, SQLiteLeadStore]
+
+
+def create_lead_store(backend: str, csv_path: str, db_path: Optional[str] = None,
+                      compression: str = "zstd", row_group_size: int = 50000) -> LeadStore:
+    """Create the lead storage backend selected in settings ("csv" or "sqlite").
+    
+    With the file backend, a .parquet, .arrow or .feather path selects the
+    columnar store instead of CSV.
+    """
+    backend = backend.strip().lower()
+    if backend == "csv":
+        if is_columnar_path(csv_path):
+            return ColumnarLeadStore(csv_path, compression, row_group_size)
+        return CSVService(csv_path)
+    if backend == "sqlite":
+        return SQLiteLeadStore(db_path or f"{os.path.splitext(csv_path)[0]}.sqlite3")
+    raise ValueError(f"Unknown lead storage backend '{backend}', expected 'csv' or 'sqlite'")
@@ -0,0 +1,189 @@
+"""OpenAI-compatible chat completion backends with health and latency tracking."""
+import json
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from app.utils.rate_limiter import RateLimiter
+
+
+# Weight of the latest outcome in a backend's health score
+HEALTH_SMOOTHING = 0.2
+# Backends below this health score are tried after the healthy ones
+DEGRADED_HEALTH = 0.5
+
+
+class LLMBackend:
+    """One OpenAI-compatible chat completions endpoint.
+    
+    The health score is a moving average of request outcomes. Recent
+    latencies are kept per kind of request (e.g. per task) and set the
+    delay before a hedged duplicate is sent. After several consecutive
+    failures the backend cools down and is only tried when no other
+    backend is left; one more failure after the cool-down starts another.
+    """
+    
+    def __init__(self, name: str, api_url: str, model: Optional[str], rate_limiter: RateLimiter,
+                 api_key: Optional[str] = None, api_key_setting: Optional[str] = None,
+                 failure_threshold: int = 3, cooldown_seconds: float = 30.0,
+                 latency_window: int = 200, min_latency_samples: int = 20,
+                 model_rate_limiters: Optional[Dict[str, RateLimiter]] = None):
+        self.name = name
+        self.api_url = api_url
+        # None keeps the model chosen for the request
+        self.model = model
+        self.rate_limiter = rate_limiter
+        # Providers such as Groq limit each model separately
+        self.model_rate_limiters = dict(model_rate_limiters or {})
+        self.api_key = api_key
+        # Setting that must hold the API key, None for endpoints that need no authentication
+        self.api_key_setting = api_key_setting
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.latency_window = latency_window
+        self.min_latency_samples = max(1, min_latency_samples)
+        
+        self.health = 1.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.hedge_wins = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+    
+    @property
+    def available(self) -> bool:
+        """Whether the backend is not cooling down after repeated failures."""
+        return time.monotonic() >= self.cooldown_until
+    
+    def headers(self) -> Dict:
+        """Return the request headers, failing early without a required API key."""
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        elif self.api_key_setting:
+            raise ValueError(f"{self.api_key_setting} is not set in environment variables")
+        return headers
+    
+    def rate_limiter_for(self, model: Optional[str]) -> RateLimiter:
+        """Return the rate limiter that applies to requests for a model."""
+        return self.model_rate_limiters.get(model, self.rate_limiter)
+    
+    def prepare(self, payload: Dict) -> Dict:
+        """Adapt a chat completion payload to this backend's model."""
+        return {**payload, "model": self.model} if self.model else payload
+    
+    def record_success(self, kind: str, seconds: float):
+        """Count a successful request and remember its latency."""
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.health += HEALTH_SMOOTHING * (1.0 - self.health)
+        samples = self._latencies.get(kind)
+        if samples is None:
+            samples = self._latencies[kind] = deque(maxlen=self.latency_window)
+        samples.append(seconds)
+    
+    def record_failure(self):
+        """Count a failed request, starting a cool-down after too many in a row."""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.health -= HEALTH_SMOOTHING * self.health
+        if self.consecutive_failures >= self.failure_threshold:
+            self.cooldown_until = time.monotonic() + self.cooldown_seconds
+    
+    def latency_percentile(self, kind: str, percentile: float) -> Optional[float]:
+        """Return a percentile of recent latencies, or None before enough samples."""
+        samples = self._latencies.get(kind)
+        if not samples or len(samples) < self.min_latency_samples:
+            return None
+        ordered = sorted(samples)
+        index = math.ceil(percentile / 100 * len(ordered)) - 1
+        return ordered[min(len(ordered) - 1, max(0, index))]
+    
+    def to_dict(self) -> Dict:
+        """Return the backend state as a JSON-serialisable dict."""
+        return {
+            "name": self.name,
+            "url": self.api_url,
+            "model": self.model,
+            "health": round(self.health, 4),
+            "available": self.available,
+            "successes": self.successes,
+            "failures": self.failures,
+            "hedge_wins": self.hedge_wins,
+            "rate_limiter": self.rate_limiter.stats(),
+            "model_rate_limiters": {
+                model: rate_limiter.stats() for model, rate_limiter in self.model_rate_limiters.items()
+            }
+        }
+
+
+class LLMBackendPool:
+    """Ordered set of backends with the hedging policy applied across them.
+    
+    The first configured backend is the primary. Requests go to the
+    healthiest available backend in configuration order; when it has not
+    answered within the configured percentile of its recent latencies for
+    the same kind of request, a duplicate goes to the next one.
+    """
+    
+    def __init__(self, backends: List[LLMBackend], hedging: bool = True,
+                 hedge_percentile: float = 95.0, hedge_delay: float = 2.0):
+        if not backends:
+            raise ValueError("At least one LLM backend is required")
+        self.backends = backends
+        self.hedging = hedging and len(backends) > 1
+        self.hedge_percentile = hedge_percentile
+        # Used until a backend has enough latency samples
+        self.hedge_delay_seconds = hedge_delay
+    
+    @property
+    def primary(self) -> LLMBackend:
+        """The first configured backend."""
+        return self.backends[0]
+    
+    def ordered(self) -> List[LLMBackend]:
+        """Backends in the order to try them, cooling down and degraded ones last."""
+        return sorted(
+            self.backends,
+            key=lambda backend: (not backend.available, backend.health < DEGRADED_HEALTH)
+        )
+    
+    def hedge_delay(self, backend: LLMBackend, kind: str) -> float:
+        """Seconds to wait for a backend before sending a duplicate elsewhere."""
+        delay = backend.latency_percentile(kind, self.hedge_percentile)
+        return self.hedge_delay_seconds if delay is None else delay
+    
+    def stats(self) -> Dict:
+        """Return the hedging policy and the state of every backend."""
+        return {
+            "hedging": self.hedging,
+            "hedge_percentile": self.hedge_percentile,
+            "backends": [backend.to_dict() for backend in self.backends]
+        }
+
+
+def parse_backend_specs(spec: str) -> List[Dict]:
+    """Parse LLM_BACKENDS, a JSON list of {"name", "url", "model", "api_key"} objects.
+    
+    "model" defaults to the primary model and "api_key" may be left out
+    for endpoints without authentication.
+    """
+    if not spec.strip():
+        return []
+    
+    entries = json.loads(spec)
+    if not isinstance(entries, list):
+        raise ValueError("LLM_BACKENDS must be a JSON list")
+    specs = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("url"):
+            raise ValueError(f"LLM_BACKENDS entry {index} needs a \"url\"")
+        specs.append({
+            "name": str(entry.get("name") or f"backend{index + 1}"),
+            "url": entry["url"],
+            "model": entry.get("model"),
+            "api_key": entry.get("api_key")
+        })
+    return specs
@@ -0,0 +1,238 @@
+"""Content-addressed cache for LLM completions."""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class LLMCache:
+    """Two-tier LLM response cache.
+    
+    Completions are keyed on a hash of the request (model, messages and
+    sampling parameters). A bounded in-memory LRU sits in front of a SQLite
+    file that survives restarts; disk entries expire after a TTL and the
+    least recently used ones are evicted above a size limit. Concurrent
+    requests for the same key share a single upstream call.
+    """
+    
+    def __init__(self, path: Optional[str], memory_entries: int = 1024,
+                 ttl_seconds: float = 7 * 24 * 3600, max_disk_entries: int = 100000):
+        self.path = path
+        self.memory_entries = max(0, memory_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes_since_eviction = 0
+        
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        
+        if path:
+            self._open_database()
+    
+    def _open_database(self):
+        """Open the on-disk tier and create its schema."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+        self._db.commit()
+    
+    @staticmethod
+    def make_key(request: Dict) -> str:
+        """Hash a request description into a cache key."""
+        encoded = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    def _expired(self, created_at: float) -> bool:
+        """Whether an entry created at the given time is past its TTL."""
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+    
+    def _get_memory(self, key: str) -> Optional[str]:
+        """Look up a key in the in-memory tier."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        
+        value, created_at = entry
+        if self._expired(created_at):
+            del self._memory[key]
+            return None
+        
+        self._memory.move_to_end(key)
+        return value
+    
+    def _put_memory(self, key: str, value: str, created_at: float):
+        """Store a value in the in-memory tier, evicting the least recently used entry."""
+        if self.memory_entries <= 0:
+            return
+        
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+    
+    def _get_disk(self, key: str) -> Optional[tuple]:
+        """Look up a key in the on-disk tier."""
+        if self._db is None:
+            return None
+        
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            if self._expired(row[1]):
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            
+            self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row
+    
+    def _put_disk(self, key: str, value: str, created_at: float):
+        """Store a value in the on-disk tier and evict old entries when it grows too large."""
+        if self._db is None:
+            return
+        
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, created_at, created_at)
+            )
+            self._writes_since_eviction += 1
+            
+            # Counting rows is not free, so only check the size every few writes
+            if self._writes_since_eviction >= 100:
+                self._writes_since_eviction = 0
+                self._evict_disk()
+            self._db.commit()
+    
+    def _evict_disk(self):
+        """Drop expired entries and trim the table to the size limit."""
+        if self.ttl_seconds > 0:
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        
+        if self.max_disk_entries > 0:
+            count = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            if count > self.max_disk_entries:
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_disk_entries,)
+                )
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached value for a key, or None (counted as a miss)."""
+        value = self._get_memory(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+        
+        row = await asyncio.to_thread(self._get_disk, key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._put_memory(key, row[0], row[1])
+        return row[0]
+    
+    async def put(self, key: str, value: str):
+        """Store a value computed outside get_or_compute(), e.g. a streamed completion."""
+        created_at = time.time()
+        await asyncio.to_thread(self._put_disk, key, value, created_at)
+        self._put_memory(key, value, created_at)
+    
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached value for a key, computing and storing it on a miss.
+        
+        Concurrent calls for the same key share one computation. When the
+        caller running it is cancelled, the others are not: the next one
+        in line computes the value instead.
+        """
+        while True:
+            value = self._get_memory(key)
+            if value is not None:
+                self.memory_hits += 1
+                return value
+            
+            # An identical request is already running, wait for its result
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    # This caller was cancelled itself
+                    raise
+                self.coalesced -= 1
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            row = await asyncio.to_thread(self._get_disk, key)
+            if row is not None:
+                self.disk_hits += 1
+                value, created_at = row
+            else:
+                self.misses += 1
+                value = await compute()
+                created_at = time.time()
+                await asyncio.to_thread(self._put_disk, key, value, created_at)
+            
+            self._put_memory(key, value, created_at)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # Waiters see the cancelled future and retry, one of them takes over
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters."""
+        hits = self.memory_hits + self.disk_hits + self.coalesced
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory)
+        }
+    
+    def close(self):
+        """Close the on-disk tier."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
@@ -1,13 +1,99 @@
 """LLM service using Groq API."""
 import json
+import os
 import asyncio
-from typing import Dict, Optional
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type
 import httpx
+from pydantic import BaseModel, ValidationError
 from app.config import settings
+from app.models import enum_value
+from app.services.llm_backends import LLMBackend, LLMBackendPool, parse_backend_specs
+from app.services.llm_cache import LLMCache
+from app.services.model_routing import ModelRouter
+from app.services.token_budget import TokenBudget, TokenBudgetExceeded
+from app.utils import metrics
+from app.utils.json_repair import parse_json_objects
+from app.utils.json_stream import IncrementalJSONObject
+from app.utils.prompts import JSON_REPAIR_PROMPT
+from app.utils.rate_limiter import RateLimiter
+
+
+LLM_GENERATE_SECONDS = metrics.histogram(
+    "llm_generate_duration_seconds",
+    "Duration of generate() calls per task, including cache lookups, rate limiting and retries.",
+    ["task"]
+)
+LLM_REQUEST_SECONDS = metrics.histogram(
+    "llm_request_duration_seconds", "Duration of chat completion HTTP requests.", ["task", "status"]
+)
+LLM_REQUESTS = metrics.counter(
+    "llm_requests_total", "Chat completion HTTP requests by task and HTTP status (or error).", ["task", "status"]
+)
+LLM_FIRST_TOKEN_SECONDS = metrics.histogram(
+    "llm_time_to_first_token_seconds", "Time from sending a streamed request to its first content delta.", ["task"]
+)
+LLM_RETRIES = metrics.counter("llm_retries_total", "Retried chat completion requests.", ["task", "reason"])
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "Tokens reported in the usage field of chat completions.", ["task", "type"]
+)
+LLM_STRUCTURED_OUTPUT = metrics.counter(
+    "llm_structured_output_total", "Schema-validated responses by outcome (valid, repaired, failed).", ["task", "outcome"]
+)
+LLM_HEDGES = metrics.counter(
+    "llm_hedged_requests_total", "Duplicate requests sent because the previous backend was slow.", ["task", "backend"]
+)
+LLM_FAILOVERS = metrics.counter(
+    "llm_failovers_total", "Requests moved to another backend after a failure.", ["task", "backend"]
+)
+LLM_BACKEND_WINS = metrics.counter(
+    "llm_backend_wins_total", "Requests answered by each backend, hedged or not.", ["backend", "hedged"]
+)
+LLM_MODEL_ROUTES = metrics.counter(
+    "llm_model_routes_total", "Model chosen for LLM calls by task and lead priority.", ["task", "priority", "model"]
+)
+LLM_BUDGET_REFUSALS = metrics.counter(
+    "llm_budget_refusals_total", "Requests skipped because the campaign token budget was exhausted.", ["task"]
+)
+
+
+class GenerationProfile:
+    """Sampling parameters for one kind of completion."""
+    
+    def __init__(self, max_tokens: int, temperature: float, stop: Sequence[str] = ()):
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.stop = tuple(stop)
+    
+    def apply(self, payload: Dict, max_tokens: Optional[int] = None) -> Dict:
+        """Set the sampling parameters of a chat completion payload."""
+        payload["temperature"] = self.temperature
+        payload["max_tokens"] = max_tokens or self.max_tokens
+        if self.stop:
+            payload["stop"] = list(self.stop)
+        return payload
+
+
+# Output caps are charged against the tokens/minute limit up front, keep them close to what each task needs
+GENERATION_PROFILES = {
+    "scoring": GenerationProfile(settings.LLM_MAX_TOKENS_SCORING, 0.2),
+    "enrichment": GenerationProfile(settings.LLM_MAX_TOKENS_ENRICHMENT, 0.2),
+    "profile": GenerationProfile(settings.LLM_MAX_TOKENS_PROFILE, 0.2),
+    # Simulated replies are meant to vary between runs
+    "classification": GenerationProfile(settings.LLM_MAX_TOKENS_CLASSIFICATION, 0.7),
+    "email": GenerationProfile(settings.LLM_MAX_TOKENS_EMAIL, 0.7),
+    # The prompt asks for a single paragraph
+    "summary": GenerationProfile(settings.LLM_MAX_TOKENS_SUMMARY, 0.5, stop=("\n\n",)),
+    # Re-asks for a few invalid fields of another task's response
+    "repair": GenerationProfile(settings.LLM_MAX_TOKENS_REPAIR, 0.0),
+}
+
+DEFAULT_PROFILE = GenerationProfile(settings.LLM_DEFAULT_MAX_TOKENS, 0.7)
 
 
 class LLMService:
-    """Service for interacting with Groq LLM API."""
+    """Service for interacting with Groq LLM API (and optional fallback backends)."""
     
     def __init__(self):
         self.api_key = settings.GROQ_API_KEY
@@ -15,72 +101,734 @@ class LLMService:
         self.api_url = settings.GROQ_API_URL
         self.max_retries = settings.MAX_RETRIES
         self.timeout = settings.REQUEST_TIMEOUT
+        self.max_connections = settings.LLM_MAX_CONNECTIONS
+        self.max_keepalive_connections = settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+        self.keepalive_expiry = settings.LLM_KEEPALIVE_EXPIRY
+        self.http2 = settings.LLM_HTTP2
+        self.warmup_connections = settings.LLM_WARMUP_CONNECTIONS
+        self._client: Optional[httpx.AsyncClient] = None
+        self.max_rate_limit_retries = settings.MAX_RATE_LIMIT_RETRIES
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=settings.GROQ_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.GROQ_TOKENS_PER_MINUTE,
+            initial_concurrency=settings.LLM_INITIAL_CONCURRENCY,
+            min_concurrency=settings.LLM_MIN_CONCURRENCY,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY
+        )
+        self.small_model = settings.GROQ_SMALL_MODEL
+        self.router = ModelRouter(
+            settings.LLM_MODEL_ROUTES,
+            default_model=self.model,
+            aliases={"large": self.model, "small": self.small_model}
+        )
+        self.backends = self._create_backends()
+        self.token_budget: Optional[TokenBudget] = None
+        self.streaming = settings.LLM_STREAMING_ENABLED
+        self.json_mode = settings.LLM_JSON_MODE
+        self.repair_enabled = settings.LLM_REPAIR_ENABLED
+        self.structured_output: Dict[str, Dict[str, int]] = {}
+        self.cache_tasks = {task.strip() for task in settings.LLM_CACHE_TASKS.split(",") if task.strip()}
+        self.cache: Optional[LLMCache] = None
+        if settings.LLM_CACHE_ENABLED:
+            self.cache = LLMCache(
+                path=settings.LLM_CACHE_PATH or os.path.join(settings.REPORTS_DIR, "llm_cache.sqlite3"),
+                memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                max_disk_entries=settings.LLM_CACHE_MAX_DISK_ENTRIES
+            )
     
-    def _extract_json(self, text: str) -> Dict:
-        """Extract JSON from LLM response text."""
-        # Try to find JSON in the response
-        text = text.strip()
+    def _create_backends(self) -> LLMBackendPool:
+        """Build the backend pool: Groq first, then the endpoints listed in LLM_BACKENDS."""
+        health = {
+            "failure_threshold": settings.LLM_BACKEND_FAILURE_THRESHOLD,
+            "cooldown_seconds": settings.LLM_BACKEND_COOLDOWN_SECONDS,
+            "latency_window": settings.LLM_HEDGE_WINDOW,
+            "min_latency_samples": settings.LLM_HEDGE_MIN_SAMPLES
+        }
+        model_rate_limiters = {}
+        if self.small_model != self.model:
+            model_rate_limiters[self.small_model] = RateLimiter(
+                requests_per_minute=settings.GROQ_SMALL_REQUESTS_PER_MINUTE,
+                tokens_per_minute=settings.GROQ_SMALL_TOKENS_PER_MINUTE,
+                initial_concurrency=settings.LLM_INITIAL_CONCURRENCY,
+                min_concurrency=settings.LLM_MIN_CONCURRENCY,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY
+            )
+        # Groq serves whichever model a request is routed to
+        backends = [LLMBackend(
+            "groq", self.api_url, None, self.rate_limiter,
+            api_key=self.api_key, api_key_setting="GROQ_API_KEY",
+            model_rate_limiters=model_rate_limiters, **health
+        )]
+        for spec in parse_backend_specs(settings.LLM_BACKENDS):
+            # Self-hosted servers publish no rate limits, only the adaptive concurrency applies
+            rate_limiter = RateLimiter(
+                requests_per_minute=0,
+                tokens_per_minute=0,
+                initial_concurrency=settings.LLM_INITIAL_CONCURRENCY,
+                min_concurrency=settings.LLM_MIN_CONCURRENCY,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY
+            )
+            backends.append(LLMBackend(
+                spec["name"], spec["url"], spec["model"] or self.model, rate_limiter,
+                api_key=spec["api_key"], **health
+            ))
+        return LLMBackendPool(
+            backends,
+            hedging=settings.LLM_HEDGE_ENABLED,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_delay=settings.LLM_HEDGE_DELAY_SECONDS
+        )
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Roughly estimate the token count of a text (about 4 characters per token)."""
+        return len(text) // 4 + 1
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client shared by all requests."""
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("LLM_HTTP2 is enabled but the 'h2' package is not installed, falling back to HTTP/1.1")
+                http2 = False
         
-        # Remove markdown code blocks if present
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    async def startup(self):
+        """Open the shared HTTP client and warm up its connection pool."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        await self.warm_up()
+    
+    async def warm_up(self):
+        """Open connections ahead of the first request to absorb TCP/TLS setup."""
+        if self.warmup_connections <= 0:
+            return
         
-        text = text.strip()
+        async def _open_connection(backend: LLMBackend):
+            origin = httpx.URL(backend.api_url).copy_with(path="/", query=None)
+            try:
+                await self.client.head(origin, timeout=min(5, self.timeout))
+            except Exception as e:
+                print(f"LLM connection warm-up failed for {backend.name}: {str(e)}")
         
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            # Try to find JSON object in the text
-            start = text.find('{')
-            end = text.rfind('}') + 1
-            if start >= 0 and end > start:
-                return json.loads(text[start:end])
-            raise
+        # Concurrent requests force the pool to open separate connections
+        await asyncio.gather(*(
+            _open_connection(backend)
+            for backend in self.backends.backends
+            for _ in range(self.warmup_connections)
+        ))
+    
+    async def shutdown(self):
+        """Close the shared HTTP client and the response cache."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.cache is not None:
+            self.cache.close()
+    
+    def stats(self) -> Dict:
+        """Return cache, rate limiter, backend, routing, token budget and structured output counters."""
+        structured_output = {}
+        for task, counts in self.structured_output.items():
+            total = sum(counts.values())
+            structured_output[task] = {
+                **counts,
+                "failure_rate": round(counts.get("failed", 0) / total, 4) if total else 0.0
+            }
+        return {
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "rate_limiter": self.rate_limiter.stats(),
+            "backends": self.backends.stats(),
+            "model_routing": self.router.stats(),
+            "token_budget": self.token_budget.to_dict() if self.token_budget is not None else None,
+            "structured_output": structured_output
+        }
+    
+    def start_token_budget(self, limit: int = 0) -> TokenBudget:
+        """Start counting the tokens of a campaign, refusing requests beyond the limit (0 = unlimited)."""
+        self.token_budget = TokenBudget(limit)
+        return self.token_budget
+    
+    def stop_token_budget(self):
+        """Stop charging requests to the campaign token budget."""
+        self.token_budget = None
     
-    async def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        """Generate text using Groq API."""
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY is not set in environment variables")
+    def _extract_json(self, text: str) -> Dict:
+        """Extract JSON from LLM response text."""
+        objects = parse_json_objects(text)
+        if not objects:
+            raise ValueError("No JSON object found in LLM response")
         
+        # Models sometimes split one answer across several objects, the first value of a key wins
+        data: Dict = {}
+        for item in objects:
+            for key, value in item.items():
+                data.setdefault(key, value)
+        return data
+    
+    def _build_payload(self, prompt: str, system_prompt: Optional[str], task: Optional[str],
+                       max_tokens: Optional[int], json_mode: bool = False, priority: Optional[str] = None) -> Dict:
+        """Build a chat completion request with the routed model and the task's generation profile."""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        priority = enum_value(priority) or None
+        model = self.router.route(task, priority)
+        LLM_MODEL_ROUTES.labels(task or "other", priority or "any", model).inc()
+        payload = GENERATION_PROFILES.get(task, DEFAULT_PROFILE).apply(
+            {"model": model, "messages": messages},
+            max_tokens
+        )
+        if json_mode and self.json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        task: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        priority: Optional[str] = None
+    ) -> str:
+        """Generate text using Groq API.
         
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 1000
-        }
+        The model is routed by task and lead priority (LLM_MODEL_ROUTES).
+        Sampling parameters come from the task's generation profile, an
+        explicit max_tokens overrides its output cap. json_mode asks the
+        provider for a JSON object (when LLM_JSON_MODE is on). Responses
+        for tasks listed in LLM_CACHE_TASKS are served from the cache.
+        """
+        payload = self._build_payload(prompt, system_prompt, task, max_tokens, json_mode, priority)
+        
+        with LLM_GENERATE_SECONDS.labels(task or "other").time():
+            if self.cache is not None and task in self.cache_tasks:
+                key = self.cache.make_key(payload)
+                return await self.cache.get_or_compute(key, lambda: self._complete(payload, task))
+            return await self._complete(payload, task)
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        task: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        priority: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield the generated text as it arrives.
+        
+        A cache hit is yielded in one piece and a fully streamed completion
+        is stored for cached tasks. With LLM_STREAMING_ENABLED off the whole
+        completion is yielded at once.
+        """
+        if not self.streaming:
+            yield await self.generate(prompt, system_prompt, task, max_tokens, priority=priority)
+            return
+        
+        payload = self._build_payload(prompt, system_prompt, task, max_tokens, priority=priority)
+        cached = self.cache is not None and task in self.cache_tasks
+        if cached:
+            key = self.cache.make_key(payload)
+            value = await self.cache.get(key)
+            if value is not None:
+                yield value
+                return
+        
+        parts = []
+        async with aclosing(self._stream(payload, task)) as deltas:
+            async for delta in deltas:
+                parts.append(delta)
+                yield delta
+        if cached:
+            await self.cache.put(key, "".join(parts))
+    
+    def _reserve_tokens(self, payload: Dict, task: str) -> Tuple[int, int]:
+        """Estimate a request's prompt and worst-case tokens and reserve them in the campaign budget."""
+        prompt_tokens = sum(self.estimate_tokens(message["content"]) for message in payload["messages"])
+        estimated_tokens = prompt_tokens + payload["max_tokens"]
+        if self.token_budget is not None:
+            try:
+                self.token_budget.reserve(estimated_tokens, task)
+            except TokenBudgetExceeded:
+                LLM_BUDGET_REFUSALS.labels(task).inc()
+                raise
+        return prompt_tokens, estimated_tokens
+    
+    def _record_usage(self, budget: Optional[TokenBudget], task: str, estimated_tokens: int,
+                      prompt_tokens: int, completion_tokens: int, rate_limiter: RateLimiter):
+        """Charge the tokens a request used to the metrics, the budget and the rate limiter."""
+        LLM_TOKENS.labels(task, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(task, "completion").inc(completion_tokens)
+        if budget is not None:
+            budget.settle(estimated_tokens, prompt_tokens, completion_tokens, task)
+        # The limiter charged the worst case, give back what the completion did not use
+        rate_limiter.tokens.refund(estimated_tokens - prompt_tokens - completion_tokens)
+    
+    async def _hedged(self, task: str, kind: str,
+                      attempt: Callable[[LLMBackend, bool], Awaitable[Any]],
+                      discard: Optional[Callable[[Any], Awaitable[None]]] = None) -> Tuple[LLMBackend, Any]:
+        """Run attempt(backend, last) across the backends and return the first result.
         
-        for attempt in range(self.max_retries):
+        The best backend goes first. A duplicate goes to the next backend
+        once the running attempt exceeds its hedge delay for this kind of
+        request, and right away when an attempt fails. The losing attempts
+        are cancelled; results that arrive together with the winner are
+        passed to discard().
+        """
+        candidates = self.backends.ordered()
+        running: Dict[asyncio.Task, Tuple[LLMBackend, float]] = {}
+        hedge_at: Optional[float] = None
+        error: Optional[BaseException] = None
+        
+        def launch():
+            nonlocal hedge_at
+            backend = candidates.pop(0)
+            started = time.perf_counter()
+            running[asyncio.create_task(attempt(backend, not candidates))] = (backend, started)
+            hedge_at = started + self.backends.hedge_delay(backend, kind) if self.backends.hedging else None
+        
+        launch()
+        try:
+            while running:
+                timeout = None
+                if candidates and hedge_at is not None:
+                    timeout = max(0.0, hedge_at - time.perf_counter())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    LLM_HEDGES.labels(task, candidates[0].name).inc()
+                    launch()
+                    continue
+                
+                winner = None
+                for finished in done:
+                    backend, started = running.pop(finished)
+                    if finished.exception() is not None:
+                        backend.record_failure()
+                        error = finished.exception()
+                        continue
+                    if winner is not None:
+                        if discard is not None:
+                            await discard(finished.result())
+                        continue
+                    backend.record_success(kind, time.perf_counter() - started)
+                    winner = (backend, finished.result())
+                
+                if winner is not None:
+                    hedged = bool(running) or len(done) > 1
+                    if hedged:
+                        winner[0].hedge_wins += 1
+                    LLM_BACKEND_WINS.labels(winner[0].name, str(hedged).lower()).inc()
+                    return winner
+                if candidates and not running:
+                    LLM_FAILOVERS.labels(task, candidates[0].name).inc()
+                    launch()
+            raise error
+        finally:
+            for pending in running:
+                pending.cancel()
+            if running:
+                results = await asyncio.gather(*running, return_exceptions=True)
+                if discard is not None:
+                    for result in results:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+    
+    async def _complete(self, payload: Dict, task: Optional[str] = None) -> str:
+        """Send a chat completion request and return the generated text."""
+        task = task or "other"
+        budget = self.token_budget
+        prompt_tokens, estimated_tokens = self._reserve_tokens(payload, task)
+        try:
+            backend, data = await self._hedged(
+                task, f"{task}:{payload['model']}",
+                lambda backend, last: self._request_completion(
+                    backend, payload, estimated_tokens, task, self.max_retries if last else 1
+                )
+            )
+        except BaseException:
+            if budget is not None:
+                budget.release(estimated_tokens)
+            raise
+        
+        content = data["choices"][0]["message"]["content"]
+        # Fall back to estimates for providers that do not report usage
+        usage = data.get("usage") or {}
+        self._record_usage(
+            budget, task, estimated_tokens,
+            usage.get("prompt_tokens") or prompt_tokens,
+            usage.get("completion_tokens") or self.estimate_tokens(content or ""),
+            backend.rate_limiter_for(payload["model"])
+        )
+        return content
+    
+    async def _request_completion(self, backend: LLMBackend, payload: Dict, estimated_tokens: int,
+                                  task: Optional[str] = None, max_attempts: Optional[int] = None) -> Dict:
+        """Send a chat completion request to one backend with rate limiting and retries.
+        
+        With other backends left to fail over to, max_attempts is 1 so a
+        failing backend is given up on after its first error.
+        """
+        task = task or "other"
+        max_attempts = max_attempts or self.max_retries
+        headers = backend.headers()
+        rate_limiter = backend.rate_limiter_for(payload["model"])
+        payload = backend.prepare(payload)
+        attempt = 0
+        rate_limit_retries = 0
+        while True:
+            taken_tokens = await rate_limiter.acquire(estimated_tokens)
+            rate_limited = False
+            cancelled = False
+            status = "error"
+            started = time.perf_counter()
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        self.api_url,
-                        headers=headers,
-                        json=payload
-                    )
+                response = await self.client.post(
+                    backend.api_url,
+                    headers=headers,
+                    json=payload
+                )
+                status = str(response.status_code)
+                rate_limiter.update_from_headers(response.headers)
+                if response.status_code == 429:
+                    rate_limited = True
+                    rate_limiter.on_rate_limited(response.headers)
+                response.raise_for_status()
+                return response.json()
+            except asyncio.CancelledError:
+                # The provider may have processed a cancelled attempt (e.g. a losing hedge), its tokens stay charged
+                cancelled = True
+                raise
+            except Exception as e:
+                # Each attempt reserved its own tokens; a failed one used none of them
+                rate_limiter.tokens.refund(taken_tokens)
+                if rate_limited and rate_limit_retries < self.max_rate_limit_retries:
+                    # The limiter already holds back new requests until the provider resets
+                    rate_limit_retries += 1
+                    LLM_RETRIES.labels(task, "rate_limited").inc()
+                    continue
+                
+                attempt += 1
+                if attempt >= max_attempts:
+                    raise Exception(f"Failed to generate after {attempt} attempts on {backend.name}: {str(e)}")
+                LLM_RETRIES.labels(task, "error").inc()
+                await asyncio.sleep(1 * attempt)  # Linear backoff for non rate limit errors
+            finally:
+                LLM_REQUESTS.labels(task, status).inc()
+                LLM_REQUEST_SECONDS.labels(task, status).observe(time.perf_counter() - started)
+                await rate_limiter.release(rate_limited, adjust=not cancelled)
+    
+    async def _stream(self, payload: Dict, task: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a chat completion and yield its content deltas.
+        
+        Backends are hedged and failed over like _complete(), on the time
+        to the first delta. Closing the iterator early closes the response,
+        so the provider stops generating. Usage comes from the final chunk
+        when the provider reports it, otherwise it is estimated from the
+        text received.
+        """
+        task = task or "other"
+        payload = {**payload, "stream": True}
+        budget = self.token_budget
+        prompt_tokens, estimated_tokens = self._reserve_tokens(payload, task)
+        
+        async def open_stream(backend: LLMBackend, last: bool):
+            usage: Dict = {}
+            deltas = self._stream_backend(
+                backend, payload, task, estimated_tokens, usage, self.max_retries if last else 1
+            )
+            try:
+                first = await deltas.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except BaseException:
+                await deltas.aclose()
+                raise
+            return deltas, first, usage
+        
+        async def close_stream(opened):
+            await opened[0].aclose()
+        
+        backend = None
+        deltas = None
+        usage: Dict = {}
+        parts = []
+        try:
+            backend, (deltas, first, usage) = await self._hedged(
+                task, f"{task}:{payload['model']}:first_token", open_stream, discard=close_stream
+            )
+            if first is not None:
+                parts.append(first)
+                yield first
+                async for delta in deltas:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            if deltas is not None:
+                await deltas.aclose()
+            if backend is not None and (parts or usage):
+                self._record_usage(
+                    budget, task, estimated_tokens,
+                    usage.get("prompt_tokens") or prompt_tokens,
+                    usage.get("completion_tokens") or self.estimate_tokens("".join(parts)),
+                    backend.rate_limiter_for(payload["model"])
+                )
+            elif budget is not None:
+                budget.release(estimated_tokens)
+    
+    async def _stream_backend(self, backend: LLMBackend, payload: Dict, task: str, estimated_tokens: int,
+                              usage: Dict, max_attempts: int) -> AsyncIterator[str]:
+        """Stream a chat completion from one backend, filling usage when it is reported.
+        
+        Failed attempts are retried like _request_completion() until the
+        first delta has been yielded.
+        """
+        headers = backend.headers()
+        rate_limiter = backend.rate_limiter_for(payload["model"])
+        payload = backend.prepare(payload)
+        received = False
+        attempt = 0
+        rate_limit_retries = 0
+        while True:
+            taken_tokens = await rate_limiter.acquire(estimated_tokens)
+            rate_limited = False
+            cancelled = False
+            status = "error"
+            started = time.perf_counter()
+            try:
+                async with self.client.stream("POST", backend.api_url, headers=headers, json=payload) as response:
+                    status = str(response.status_code)
+                    rate_limiter.update_from_headers(response.headers)
+                    if response.status_code == 429:
+                        rate_limited = True
+                        rate_limiter.on_rate_limited(response.headers)
+                    if response.is_error:
+                        await response.aread()
                     response.raise_for_status()
-                    data = response.json()
-                    return data["choices"][0]["message"]["content"]
+                    
+                    if response.headers.get("content-type", "").startswith("application/json"):
+                        # The provider ignored "stream", hand out the whole completion at once
+                        data = json.loads(await response.aread())
+                        usage.update(data.get("usage") or {})
+                        content = data["choices"][0]["message"]["content"] or ""
+                        if content:
+                            received = True
+                            yield content
+                        return
+                    
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        # Groq reports usage under x_groq in the final chunk, OpenAI under usage
+                        usage.update(chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or {})
+                        for choice in chunk.get("choices") or []:
+                            delta = (choice.get("delta") or {}).get("content")
+                            if not delta:
+                                continue
+                            if not received:
+                                LLM_FIRST_TOKEN_SECONDS.labels(task).observe(time.perf_counter() - started)
+                                received = True
+                            yield delta
+                return
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
             except Exception as e:
-                if attempt == self.max_retries - 1:
-                    raise Exception(f"Failed to generate after {self.max_retries} attempts: {str(e)}")
-                await asyncio.sleep(1 * (attempt + 1))  # Exponential backoff
-    
-    async def generate_json(self, prompt: str, system_prompt: Optional[str] = None) -> Dict:
-        """Generate and parse JSON response from LLM."""
-        response_text = await self.generate(prompt, system_prompt)
-        return self._extract_json(response_text)
+                if received:
+                    # Text already handed to the caller cannot be taken back
+                    raise
+                rate_limiter.tokens.refund(taken_tokens)
+                if rate_limited and rate_limit_retries < self.max_rate_limit_retries:
+                    rate_limit_retries += 1
+                    LLM_RETRIES.labels(task, "rate_limited").inc()
+                    continue
+                
+                attempt += 1
+                if attempt >= max_attempts:
+                    raise Exception(f"Failed to generate after {attempt} attempts on {backend.name}: {str(e)}")
+                LLM_RETRIES.labels(task, "error").inc()
+                await asyncio.sleep(1 * attempt)
+            finally:
+                LLM_REQUESTS.labels(task, status).inc()
+                LLM_REQUEST_SECONDS.labels(task, status).observe(time.perf_counter() - started)
+                await rate_limiter.release(rate_limited, adjust=not cancelled)
+    
+    async def generate_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        task: Optional[str] = None,
+        required_keys: Sequence[str] = (),
+        schema: Optional[Type[BaseModel]] = None,
+        priority: Optional[str] = None
+    ) -> Dict:
+        """Generate and parse JSON response from LLM.
+        
+        With required keys and streaming enabled, the response is parsed
+        while it streams and the request is closed as soon as every
+        required key holds a complete value. With a schema, the result is
+        validated and invalid or missing fields are re-asked once.
+        """
+        if self.streaming and required_keys:
+            response_text = await self._generate_json_stream(
+                prompt, system_prompt, task, required_keys, priority, json_mode=schema is not None
+            )
+        else:
+            response_text = await self.generate(
+                prompt, system_prompt, task, json_mode=schema is not None, priority=priority
+            )
+        
+        if schema is None:
+            return self._extract_json(response_text)
+        return await self._validate_structured(prompt, system_prompt, task, schema, response_text, priority)
+    
+    async def _generate_json_stream(self, prompt: str, system_prompt: Optional[str], task: Optional[str],
+                                    required_keys: Sequence[str], priority: Optional[str] = None,
+                                    json_mode: bool = False) -> str:
+        """Stream a JSON completion and return its text once the required keys are complete."""
+        payload = self._build_payload(prompt, system_prompt, task, None, json_mode, priority)
+        # Providers do not stream in JSON mode, the incremental parser copes with surrounding text instead
+        request = {key: value for key, value in payload.items() if key != "response_format"}
+        
+        async def stream_json() -> str:
+            parser = IncrementalJSONObject(required_keys)
+            async with aclosing(self._stream(request, task)) as deltas:
+                async for delta in deltas:
+                    if parser.feed(delta) is not None:
+                        # Leaving the loop closes the stream, trailing tokens are never generated
+                        return parser.json_text
+            return parser.json_text or parser.text
+        
+        with LLM_GENERATE_SECONDS.labels(task or "other").time():
+            if self.cache is not None and task in self.cache_tasks:
+                # Keyed on the payload generate() sends in the same mode, so both share cache entries
+                return await self.cache.get_or_compute(self.cache.make_key(payload), stream_json)
+            return await stream_json()
+    
+    def _record_structured(self, task: Optional[str], outcome: str):
+        """Count the outcome of parsing and validating one structured response."""
+        task = task or "other"
+        counts = self.structured_output.setdefault(task, {"valid": 0, "repaired": 0, "failed": 0})
+        counts[outcome] += 1
+        LLM_STRUCTURED_OUTPUT.labels(task, outcome).inc()
+    
+    @staticmethod
+    def _invalid_fields(error: ValidationError) -> List[str]:
+        """Top-level fields named in a validation error, in order."""
+        fields = []
+        for item in error.errors():
+            if item["loc"] and item["loc"][0] not in fields:
+                fields.append(item["loc"][0])
+        return fields
+    
+    async def _validate_structured(self, prompt: str, system_prompt: Optional[str], task: Optional[str],
+                                   schema: Type[BaseModel], response_text: str,
+                                   priority: Optional[str] = None) -> Dict:
+        """Validate a response against its schema, repairing invalid fields with one short request."""
+        try:
+            data = self._extract_json(response_text)
+        except ValueError:
+            data = {}
+        try:
+            result = schema.model_validate(data)
+            self._record_structured(task, "valid")
+            # Unset optional fields are left out so callers keep their defaults
+            return result.model_dump(exclude_none=True)
+        except ValidationError as e:
+            error = e
+        
+        if not self.repair_enabled:
+            self._record_structured(task, "failed")
+            raise ValueError(f"Invalid {task or 'LLM'} response: {error}")
+        
+        fields = self._invalid_fields(error)
+        problems = "\n".join(
+            f"- {item['loc'][0]}: {item['msg']}" for item in error.errors() if item["loc"]
+        )
+        placeholders = []
+        for name in fields:
+            field = schema.model_fields[name]
+            description = field.description or "<value>"
+            # Numbers go unquoted, like in the task prompts
+            placeholders.append(f'    "{name}": {description}' if field.annotation is int else f'    "{name}": "{description}"')
+        repair_prompt = JSON_REPAIR_PROMPT.format(prompt=prompt, problems=problems, fields=",\n".join(placeholders))
+        
+        try:
+            repaired = self._extract_json(
+                await self.generate(repair_prompt, system_prompt, task="repair", json_mode=True, priority=priority)
+            )
+            # Only the fields that were asked for replace the original answer
+            merged = {**data, **{name: repaired[name] for name in fields if name in repaired}}
+            result = schema.model_validate(merged)
+        except Exception as e:
+            self._record_structured(task, "failed")
+            raise ValueError(f"Invalid {task or 'LLM'} response after repair: {e}")
+        self._record_structured(task, "repaired")
+        return result.model_dump(exclude_none=True)
+    
+    def _extract_batch_results(self, text: str) -> Dict[str, Dict]:
+        """Extract per-item results keyed by id from a batch response.
+        
+        When the response is malformed or truncated, every item object
+        that can still be decoded is returned.
+        """
+        items = []
+        for data in parse_json_objects(text):
+            if isinstance(data.get("results"), list):
+                items.extend(data["results"])
+            else:
+                # A broken wrapper leaves the item objects themselves
+                items.append(data)
+        
+        results = {}
+        for item in items:
+            if isinstance(item, dict) and item.get("id") is not None:
+                results[str(item["id"]).strip()] = item
+        return results
+    
+    async def generate_json_batch(self, prompt: str, task: Optional[str] = None, max_tokens: Optional[int] = None,
+                                  schema: Optional[Type[BaseModel]] = None) -> Dict[str, Dict]:
+        """Generate a batch response and return its items keyed by id.
+        
+        With a schema, items that fail validation are left out so the
+        caller retries those leads alone.
+        """
+        response_text = await self.generate(prompt, task=task, max_tokens=max_tokens, json_mode=schema is not None)
+        results = self._extract_batch_results(response_text)
+        if schema is None:
+            return results
+        
+        valid = {}
+        for item_id, item in results.items():
+            try:
+                valid[item_id] = {"id": item_id, **schema.model_validate(item).model_dump(exclude_none=True)}
+                self._record_structured(task, "valid")
+            except ValidationError:
+                self._record_structured(task, "failed")
+        return valid
 
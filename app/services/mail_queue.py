@@ -0,0 +1,320 @@
+"""Durable outbound mail queue with background delivery workers."""
+import asyncio
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from app.services.mail_service import MailService
+from app.utils import metrics
+from app.utils.rate_limiter import TokenBucket
+
+
+PENDING = "pending"
+INFLIGHT = "inflight"
+SENT = "sent"
+DEAD = "dead"
+
+MAIL_QUEUE_ATTEMPTS = metrics.counter(
+    "mail_queue_delivery_attempts_total", "Queued delivery attempts by outcome (sent, retried, dead).", ["outcome"]
+)
+MAIL_QUEUE_DELIVERY_SECONDS = metrics.histogram(
+    "mail_queue_delivery_latency_seconds", "Time from enqueueing a message to its successful delivery.",
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 21600.0)
+)
+
+
+class MailQueue:
+    """Persistent outbound queue drained by background workers.
+    
+    Messages are stored in SQLite before delivery, so a slow or failing
+    SMTP server never holds up the campaign and nothing is lost on a
+    restart. Failed sends are retried with exponential backoff and moved to
+    the dead letters after the last attempt or on a permanent SMTP error.
+    Deliveries are capped per recipient domain, both in concurrency and in
+    messages per minute.
+    """
+    
+    def __init__(self, mail_service: MailService, path: str, workers: int = 4, max_attempts: int = 5,
+                 retry_base_seconds: float = 30, retry_max_seconds: float = 3600,
+                 domain_concurrency: int = 2, domain_per_minute: float = 0,
+                 retention_seconds: float = 7 * 24 * 3600, poll_interval: float = 1.0):
+        self.mail_service = mail_service
+        self.path = path
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.domain_concurrency = domain_concurrency
+        self.domain_per_minute = domain_per_minute
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._domain_active: Dict[str, int] = {}
+        self._domain_buckets: Dict[str, TokenBucket] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        
+        self.delivered = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        
+        self._open_database()
+    
+    def _open_database(self):
+        """Open the queue database, create its schema and recover interrupted deliveries."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS mail_queue ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, to_email TEXT NOT NULL, to_name TEXT, "
+            "subject TEXT NOT NULL, body TEXT NOT NULL, domain TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, enqueued_at REAL NOT NULL, "
+            "sent_at REAL, last_error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_mail_queue_due ON mail_queue (status, next_attempt_at)")
+        
+        # Deliveries cut short by a shutdown or crash are attempted again
+        self._db.execute("UPDATE mail_queue SET status = ? WHERE status = ?", (PENDING, INFLIGHT))
+        if self.retention_seconds > 0:
+            self._db.execute(
+                "DELETE FROM mail_queue WHERE status = ? AND sent_at < ?",
+                (SENT, time.time() - self.retention_seconds)
+            )
+        self._db.commit()
+    
+    @staticmethod
+    def _domain(email: str) -> str:
+        """Return the lowercased recipient domain of an address."""
+        return email.rsplit("@", 1)[-1].strip().lower()
+    
+    def _insert(self, to_email: str, subject: str, body: str, to_name: Optional[str]) -> int:
+        """Store a new pending message and return its id."""
+        now = time.time()
+        with self._db_lock:
+            cursor = self._db.execute(
+                "INSERT INTO mail_queue (to_email, to_name, subject, body, domain, status, next_attempt_at, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (to_email, to_name, subject, body, self._domain(to_email), PENDING, now, now)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+    
+    async def enqueue(self, to_email: str, subject: str, body: str, to_name: Optional[str] = None) -> int:
+        """Queue an email for background delivery and return its id."""
+        message_id = await asyncio.to_thread(self._insert, to_email, subject, body, to_name)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return message_id
+    
+    def _claim(self) -> Optional[tuple]:
+        """Mark the next due message of a domain below its concurrency cap as in flight."""
+        with self._db_lock:
+            busy = []
+            if self.domain_concurrency > 0:
+                busy = [domain for domain, active in self._domain_active.items() if active >= self.domain_concurrency]
+            placeholders = ",".join("?" * len(busy))
+            row = self._db.execute(
+                "SELECT id, to_email, to_name, subject, body, domain, attempts, enqueued_at FROM mail_queue "
+                f"WHERE status = ? AND next_attempt_at <= ? AND domain NOT IN ({placeholders}) "
+                "ORDER BY next_attempt_at, id LIMIT 1",
+                (PENDING, time.time(), *busy)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            self._db.execute("UPDATE mail_queue SET status = ? WHERE id = ?", (INFLIGHT, row[0]))
+            self._db.commit()
+            self._domain_active[row[5]] = self._domain_active.get(row[5], 0) + 1
+            return row
+    
+    def _finish(self, message_id: int, domain: str, status: str, attempts: int,
+                next_attempt_at: float, error: Optional[str]):
+        """Record the outcome of a delivery attempt and free the domain slot."""
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE mail_queue SET status = ?, attempts = ?, next_attempt_at = ?, sent_at = ?, last_error = ? "
+                "WHERE id = ?",
+                (status, attempts, next_attempt_at, time.time() if status == SENT else None, error, message_id)
+            )
+            self._db.commit()
+            self._domain_active[domain] -= 1
+            if self._domain_active[domain] <= 0:
+                del self._domain_active[domain]
+    
+    def _bucket(self, domain: str) -> TokenBucket:
+        """Return the per-minute rate bucket of a recipient domain."""
+        bucket = self._domain_buckets.get(domain)
+        if bucket is None:
+            bucket = self._domain_buckets[domain] = TokenBucket(self.domain_per_minute)
+        return bucket
+    
+    def _retry_delay(self, attempts: int) -> float:
+        """Exponential backoff before the next attempt."""
+        return min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+    
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        """Whether the SMTP server rejected the message for good (5xx)."""
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(code >= 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code >= 500
+        return False
+    
+    async def _deliver(self, row: tuple):
+        """Attempt one delivery and schedule a retry or dead-letter it on failure."""
+        message_id, to_email, to_name, subject, body, domain, attempts, enqueued_at = row
+        attempts += 1
+        try:
+            await self._bucket(domain).acquire()
+            await self.mail_service.deliver_async(to_email, subject, body, to_name)
+        except Exception as e:
+            if attempts >= self.max_attempts or self._is_permanent(e):
+                self.dead_lettered += 1
+                MAIL_QUEUE_ATTEMPTS.labels(DEAD).inc()
+                print(f"Dead-lettering email to {to_email} after {attempts} attempt(s): {str(e)}")
+                status, next_attempt_at = DEAD, time.time()
+            else:
+                self.retried += 1
+                MAIL_QUEUE_ATTEMPTS.labels("retried").inc()
+                status, next_attempt_at = PENDING, time.time() + self._retry_delay(attempts)
+            await asyncio.to_thread(self._finish, message_id, domain, status, attempts, next_attempt_at, str(e))
+            return
+        
+        self.delivered += 1
+        MAIL_QUEUE_ATTEMPTS.labels(SENT).inc()
+        MAIL_QUEUE_DELIVERY_SECONDS.observe(time.time() - enqueued_at)
+        await asyncio.to_thread(self._finish, message_id, domain, SENT, attempts, time.time(), None)
+    
+    async def _worker(self):
+        """Deliver due messages until the queue is stopped."""
+        while not self._stopping:
+            row = await asyncio.to_thread(self._claim)
+            if row is None:
+                # Nothing due, or every domain with due mail is at its cap
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            
+            await self._deliver(row)
+            # A freed domain slot may unblock messages other workers skipped
+            self._wakeup.set()
+    
+    async def start(self):
+        """Start the background delivery workers."""
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self, timeout: float = 30):
+        """Let the workers finish their current delivery, then stop them."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._tasks:
+            _, running = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def close(self):
+        """Close the queue database."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+    
+    def _query_stats(self) -> Dict:
+        """Read queue depth and delivery latency from the database."""
+        now = time.time()
+        with self._db_lock:
+            depth = dict(self._db.execute("SELECT status, COUNT(*) FROM mail_queue GROUP BY status").fetchall())
+            due, oldest = self._db.execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM mail_queue WHERE status = ? AND next_attempt_at <= ?",
+                (PENDING, now)
+            ).fetchone()
+            latencies = [
+                row[0] for row in self._db.execute(
+                    "SELECT sent_at - enqueued_at FROM mail_queue WHERE status = ? ORDER BY sent_at DESC LIMIT 1000",
+                    (SENT,)
+                )
+            ]
+        
+        latencies.sort()
+        
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 3)
+        
+        return {
+            "depth": {status: depth.get(status, 0) for status in (PENDING, INFLIGHT, SENT, DEAD)},
+            "due": due,
+            "oldest_pending_age_seconds": round(now - oldest, 3) if oldest is not None else None,
+            "latency_seconds": {
+                "average": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 3) if latencies else None
+            }
+        }
+    
+    async def stats(self) -> Dict:
+        """Return queue depth, delivery latency and worker counters."""
+        stats = await asyncio.to_thread(self._query_stats)
+        stats.update({
+            "workers": len(self._tasks),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "active_domains": dict(self._domain_active)
+        })
+        return stats
+    
+    def _list_dead(self, limit: int) -> List[Dict]:
+        """Read the most recent dead letters."""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT id, to_email, subject, attempts, last_error, enqueued_at FROM mail_queue "
+                "WHERE status = ? ORDER BY id DESC LIMIT ?",
+                (DEAD, limit)
+            ).fetchall()
+        return [
+            {"id": row[0], "to_email": row[1], "subject": row[2], "attempts": row[3],
+             "last_error": row[4], "enqueued_at": row[5]}
+            for row in rows
+        ]
+    
+    async def dead_letters(self, limit: int = 100) -> List[Dict]:
+        """Return the most recent dead-lettered messages."""
+        return await asyncio.to_thread(self._list_dead, limit)
+    
+    def _requeue(self) -> int:
+        """Move every dead letter back to pending with a fresh attempt budget."""
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE mail_queue SET status = ?, attempts = 0, next_attempt_at = ? WHERE status = ?",
+                (PENDING, time.time(), DEAD)
+            )
+            self._db.commit()
+            return cursor.rowcount
+    
+    async def requeue_dead_letters(self) -> int:
+        """Queue all dead letters for delivery again and return how many were requeued."""
+        count = await asyncio.to_thread(self._requeue)
+        if count and self._wakeup is not None:
+            self._wakeup.set()
+        return count
@@ -1,13 +1,37 @@
 """Email sending service using SMTP."""
+import asyncio
+import queue
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Dict, Optional
 from app.config import settings
+from app.utils import metrics
+
+
+SMTP_SEND_SECONDS = metrics.histogram("smtp_send_duration_seconds", "Duration of SMTP deliveries.", ["outcome"])
+SMTP_CONNECTIONS = metrics.counter("smtp_connections_opened_total", "SMTP sessions opened by the pool.")
+SMTP_RECONNECTS = metrics.counter("smtp_reconnects_total", "Stale pooled SMTP sessions that were reopened.")
+
+
+class _PooledConnection:
+    """A persistent SMTP session and the number of messages sent on it."""
+    
+    def __init__(self):
+        self.server: Optional[smtplib.SMTP] = None
+        self.messages = 0
 
 
 class MailService:
-    """Service for sending emails via SMTP."""
+    """Service for sending emails via SMTP.
+    
+    Messages are sent over a small pool of persistent SMTP connections that
+    are reused across messages. Every connection is owned by one thread of
+    a dedicated executor, so the async path never blocks the event loop.
+    """
     
     def __init__(self):
         self.host = settings.SMTP_HOST
@@ -16,6 +40,100 @@ class MailService:
         self.password = settings.SMTP_PASSWORD
         self.from_email = settings.SMTP_FROM_EMAIL
         self.from_name = settings.SMTP_FROM_NAME
+        self.pool_size = max(1, settings.SMTP_POOL_SIZE)
+        self.max_messages_per_connection = settings.SMTP_MAX_MESSAGES_PER_CONNECTION
+        self.timeout = settings.SMTP_TIMEOUT
+        self._pool: "queue.Queue[_PooledConnection]" = queue.Queue()
+        for _ in range(self.pool_size):
+            self._pool.put(_PooledConnection())
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self.sent = 0
+        self.failed = 0
+        self.connections_opened = 0
+        self.reconnects = 0
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Return the thread pool that owns the SMTP connections, creating it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="smtp")
+        return self._executor
+    
+    def _build_message(self, to_email: str, subject: str, body: str, to_name: Optional[str] = None) -> MIMEMultipart:
+        """Create the MIME message for an outreach email."""
+        msg = MIMEMultipart()
+        msg['From'] = f"{self.from_name} <{self.from_email}>"
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+    
+    def _connect(self, connection: _PooledConnection):
+        """Open (or reopen) the SMTP session of a pooled connection."""
+        self._disconnect(connection)
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        connection.server = server
+        with self._stats_lock:
+            self.connections_opened += 1
+        SMTP_CONNECTIONS.inc()
+    
+    def _disconnect(self, connection: _PooledConnection):
+        """Close the SMTP session of a pooled connection, ignoring errors."""
+        if connection.server is not None:
+            try:
+                connection.server.quit()
+            except Exception:
+                try:
+                    connection.server.close()
+                except Exception:
+                    pass
+        connection.server = None
+        connection.messages = 0
+    
+    def _send_on(self, connection: _PooledConnection, msg: MIMEMultipart):
+        """Send a message on a pooled connection, reconnecting once if the session went stale."""
+        if connection.server is None:
+            self._connect(connection)
+        
+        try:
+            connection.server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server may have dropped an idle session; retry on a fresh one
+            with self._stats_lock:
+                self.reconnects += 1
+            SMTP_RECONNECTS.inc()
+            self._connect(connection)
+            connection.server.send_message(msg)
+        
+        connection.messages += 1
+        if self.max_messages_per_connection > 0 and connection.messages >= self.max_messages_per_connection:
+            self._disconnect(connection)
+    
+    def deliver(self, to_email: str, subject: str, body: str, to_name: Optional[str] = None):
+        """Send an email over a pooled connection, raising on failure."""
+        msg = self._build_message(to_email, subject, body, to_name)
+        connection = self._pool.get()
+        started = time.perf_counter()
+        try:
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+            self._send_on(connection, msg)
+        except Exception:
+            self._disconnect(connection)
+            with self._stats_lock:
+                self.failed += 1
+            SMTP_SEND_SECONDS.labels("failed").observe(time.perf_counter() - started)
+            raise
+        finally:
+            self._pool.put(connection)
+        
+        with self._stats_lock:
+            self.sent += 1
+        SMTP_SEND_SECONDS.labels("sent").observe(time.perf_counter() - started)
     
     def send_email(
         self,
@@ -26,23 +144,54 @@ class MailService:
     ) -> bool:
         """Send an email via SMTP."""
         try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add body
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Send email
-            with smtplib.SMTP(self.host, self.port) as server:
-                if self.user and self.password:
-                    server.login(self.user, self.password)
-                server.send_message(msg)
-            
+            self.deliver(to_email, subject, body, to_name)
             return True
         except Exception as e:
             print(f"Error sending email to {to_email}: {str(e)}")
             return False
-
+    
+    async def send_email_async(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        to_name: Optional[str] = None
+    ) -> bool:
+        """Send an email from async code without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.send_email, to_email, subject, body, to_name
+        )
+    
+    async def deliver_async(self, to_email: str, subject: str, body: str, to_name: Optional[str] = None):
+        """Send an email from async code over a pooled connection, raising on failure."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.deliver, to_email, subject, body, to_name)
+    
+    def stats(self) -> Dict:
+        """Return delivery counters and throughput since the first message."""
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "pool_size": self.pool_size,
+            "messages_per_second": round(self.sent / elapsed, 2) if elapsed > 0 else 0.0
+        }
+    
+    def close(self):
+        """Close all pooled SMTP connections and stop the executor."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        
+        connections = []
+        while True:
+            try:
+                connections.append(self._pool.get_nowait())
+            except queue.Empty:
+                break
+        for connection in connections:
+            self._disconnect(connection)
+            self._pool.put(connection)
@@ -0,0 +1,68 @@
+"""Choice of the model for each LLM request by task and lead priority."""
+from typing import Dict, Optional, Tuple
+from app.models import enum_value
+
+
+class ModelRouter:
+    """Route table mapping (task, lead priority) to a model.
+    
+    Routes are written as comma-separated "task=model" or
+    "task:priority=model" entries, e.g. "email:High=large,email=small".
+    A priority-specific route wins over the task's route, which wins over
+    the "*" and "*:priority" routes; requests without any route use the
+    default model. "large" and "small" stand for the configured models,
+    any other value is used as a model name as is.
+    """
+    
+    def __init__(self, routes: str, default_model: str, aliases: Optional[Dict[str, str]] = None):
+        self.default_model = default_model
+        self.aliases = dict(aliases or {})
+        self.routes = self.parse_routes(routes)
+        self.counts: Dict[Tuple[str, str, str], int] = {}
+    
+    def parse_routes(self, spec: str) -> Dict[Tuple[str, Optional[str]], str]:
+        """Parse a route table into {(task, priority or None): model}."""
+        routes = {}
+        for entry in spec.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            key, separator, model = entry.partition("=")
+            if not separator or not key.strip() or not model.strip():
+                raise ValueError(f"Invalid model route '{entry}', expected task=model or task:priority=model")
+            task, _, priority = key.partition(":")
+            model = model.strip()
+            routes[(task.strip().lower(), priority.strip().lower() or None)] = self.aliases.get(model, model)
+        return routes
+    
+    def model_for(self, task: Optional[str], priority: Optional[str] = None) -> str:
+        """Return the model for a task, optionally for a lead of the given priority."""
+        task = (task or "other").lower()
+        priority = enum_value(priority)
+        priority = str(priority).lower() if priority else None
+        for key in ((task, priority), (task, None), ("*", priority), ("*", None)):
+            model = self.routes.get(key)
+            if model is not None:
+                return model
+        return self.default_model
+    
+    def route(self, task: Optional[str], priority: Optional[str] = None) -> str:
+        """Pick the model for a request and count the decision."""
+        model = self.model_for(task, priority)
+        key = (task or "other", enum_value(priority) or "any", model)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return model
+    
+    def stats(self) -> Dict:
+        """Return the route table and how many requests took each route."""
+        return {
+            "default_model": self.default_model,
+            "routes": {
+                f"{task}:{priority}" if priority else task: model
+                for (task, priority), model in self.routes.items()
+            },
+            "requests": [
+                {"task": task, "priority": priority, "model": model, "count": count}
+                for (task, priority, model), count in sorted(self.counts.items())
+            ]
+        }
@@ -1,76 +1,101 @@
 """Persona assignment and lead enrichment service."""
-from typing import Dict
-from app.models import Lead
+import asyncio
+from typing import Dict, List, Optional
+from app.config import settings
+from app.models import EnrichmentResponse, Lead
 from app.services.llm_service import LLMService
-from app.utils.prompts import LEAD_ENRICHMENT_PROMPT
+from app.services.confidence_gate import ConfidenceGate
+from app.utils.batching import plan_batches
+from app.utils.lead_rules import map_persona
+from app.utils.prompts import LEAD_ENRICHMENT_PROMPT, LEAD_ENRICHMENT_BATCH_PROMPT, LEAD_ENRICHMENT_BATCH_ITEM
+
+
+# Expected completion size of one lead entry in a batch response
+BATCH_OUTPUT_TOKENS_PER_LEAD = 100
+
+# Catch-all personas from the title mapping, less certain than the specific ones
+GENERIC_PERSONAS = {"Director", "Manager", "Partner"}
 
 
 class PersonaAgent:
     """Service for enriching leads and assigning personas."""
     
-    def __init__(self, llm_service: LLMService):
+    def __init__(self, llm_service: LLMService, confidence_gate: Optional[ConfidenceGate] = None):
         self.llm_service = llm_service
+        self.confidence_gate = confidence_gate
     
-    def _map_persona_from_title(self, job_title: str) -> str:
+    def map_persona_from_title(self, job_title: str) -> str:
         """Map job title to persona using deterministic rules."""
-        if not job_title:
-            return "Other"
-        
-        title_lower = job_title.lower()
-        
-        # Decision Makers
-        if any(title in title_lower for title in ["ceo", "founder", "president", "owner", "co-founder"]):
-            return "Decision Maker"
-        
-        # Technical Buyers
-        if any(title in title_lower for title in ["cto", "chief technology", "engineering manager", 
-                                                   "engineering director", "vp engineering", "technical director"]):
-            return "Technical Buyer"
-        
-        # Financial Decision Makers
-        if any(title in title_lower for title in ["cfo", "chief financial", "finance director", "vp finance"]):
-            return "Financial Decision Maker"
-        
-        # Marketing/Sales Influencers
-        if any(title in title_lower for title in ["marketing director", "marketing manager", "cmo", 
-                                                   "chief marketing", "sales director", "sales manager", 
-                                                   "vp sales", "vp marketing"]):
-            return "Influencer"
-        
-        # Operations
-        if any(title in title_lower for title in ["operations manager", "operations director", "coo", 
-                                                   "chief operations", "vp operations", "general manager"]):
-            return "Operations Manager"
-        
-        # HR
-        if any(title in title_lower for title in ["hr director", "hr manager", "human resources", 
-                                                   "chief people", "people operations"]):
-            return "HR Director"
-        
-        # Product
-        if any(title in title_lower for title in ["product manager", "product director", "cpo", 
-                                                   "chief product", "vp product"]):
-            return "Product Manager"
-        
-        # Directors (generic)
-        if "director" in title_lower:
-            return "Director"
+        return map_persona(job_title)
+    
+    def persona_confidence(self, lead: Lead, persona: str) -> float:
+        """Estimate how little the LLM enrichment could add to the rule-based result.
         
-        # Managers (generic)
-        if "manager" in title_lower:
-            return "Manager"
+        A mapped persona always wins over the LLM suggestion, so once the
+        industry and job title are known the LLM can only reword them.
+        """
+        if not lead.industry or not lead.job_title or persona == "Other":
+            return 0.0
+        if persona in GENERIC_PERSONAS:
+            return 0.85
+        return 0.95
+    
+    def _should_skip_llm(self, lead: Lead, persona: str) -> bool:
+        """Whether the enrichment LLM call can be skipped for this lead."""
+        if self.confidence_gate is None:
+            return False
+        return self.confidence_gate.should_skip("enrichment", self.persona_confidence(lead, persona))
+    
+    def skipped_llm_enrichment(self, lead: Lead, persona: str) -> Dict:
+        """Result used when the rule-based mapping is confident enough."""
+        return {
+            "industry": lead.industry,
+            "job_title": lead.job_title,
+            "persona": persona,
+            "reasoning": f"Mapped from title: {persona}"
+        }
+    
+    def merge_enrichment(self, lead: Lead, persona: str, result: Dict) -> Dict:
+        """Merge the LLM enrichment with the deterministic persona mapping."""
+        # Use LLM's industry and job_title if they're better
+        enriched_industry = result.get("industry") or lead.industry
+        enriched_job_title = result.get("job_title") or lead.job_title
         
-        # Partners
-        if "partner" in title_lower:
-            return "Partner"
+        # Use LLM persona if it's more specific, otherwise use our mapping
+        llm_persona = result.get("persona", "Other")
+        if llm_persona != "Other" and persona == "Other":
+            final_persona = llm_persona
+        elif persona != "Other":
+            final_persona = persona
+        else:
+            final_persona = llm_persona
         
-        return "Other"
+        return {
+            "industry": enriched_industry or "Unknown",
+            "job_title": enriched_job_title or "Unknown",
+            "persona": final_persona,
+            "reasoning": result.get("reasoning", f"Mapped from title: {persona}")
+        }
+    
+    def deterministic_enrichment(self, lead: Lead, persona: str, error: Exception) -> Dict:
+        """Fallback result when the LLM enrichment is unavailable."""
+        return {
+            "industry": lead.industry or "Unknown",
+            "job_title": lead.job_title or "Unknown",
+            "persona": persona,
+            "reasoning": f"Deterministic mapping applied. Error: {str(error)}"
+        }
     
     async def enrich_lead(self, lead: Lead) -> Dict:
         """Enrich lead data and assign persona."""
         # First, try deterministic mapping
-        persona = self._map_persona_from_title(lead.job_title or "")
-        
+        persona = self.map_persona_from_title(lead.job_title or "")
+        if self._should_skip_llm(lead, persona):
+            return self.skipped_llm_enrichment(lead, persona)
+        return await self._enrich_with_llm(lead, persona)
+    
+    async def _enrich_with_llm(self, lead: Lead, persona: str) -> Dict:
+        """Enrich a lead with one LLM call, falling back to the deterministic mapping."""
         # Use LLM to enrich missing fields and refine persona if needed
         prompt = LEAD_ENRICHMENT_PROMPT.format(
             name=lead.name or "Unknown",
@@ -82,33 +107,79 @@ class PersonaAgent:
         )
         
         try:
-            result = await self.llm_service.generate_json(prompt)
-            
-            # Use LLM's industry and job_title if they're better
-            enriched_industry = result.get("industry") or lead.industry
-            enriched_job_title = result.get("job_title") or lead.job_title
-            
-            # Use LLM persona if it's more specific, otherwise use our mapping
-            llm_persona = result.get("persona", "Other")
-            if llm_persona != "Other" and persona == "Other":
-                final_persona = llm_persona
-            elif persona != "Other":
-                final_persona = persona
-            else:
-                final_persona = llm_persona
-            
-            return {
-                "industry": enriched_industry or "Unknown",
-                "job_title": enriched_job_title or "Unknown",
-                "persona": final_persona,
-                "reasoning": result.get("reasoning", f"Mapped from title: {persona}")
-            }
+            result = await self.llm_service.generate_json(prompt, task="enrichment", schema=EnrichmentResponse)
+            return self.merge_enrichment(lead, persona, result)
         except Exception as e:
             # Fallback to deterministic mapping
-            return {
-                "industry": lead.industry or "Unknown",
-                "job_title": lead.job_title or "Unknown",
-                "persona": persona,
-                "reasoning": f"Deterministic mapping applied. Error: {str(e)}"
-            }
-
+            return self.deterministic_enrichment(lead, persona, e)
+    
+    async def enrich_leads(self, leads: List[Lead]) -> List[Dict]:
+        """Enrich several leads, sending them to the LLM in batches.
+        
+        Leads whose title mapping is confident skip the LLM entirely. Leads
+        missing from a batch response are retried individually; when a
+        whole batch call fails its leads fall back to the deterministic
+        mapping.
+        """
+        personas = [self.map_persona_from_title(lead.job_title or "") for lead in leads]
+        results: List[Optional[Dict]] = [None] * len(leads)
+        
+        # Confident rule-based results never reach the LLM
+        pending = []
+        for index, lead in enumerate(leads):
+            if self._should_skip_llm(lead, personas[index]):
+                results[index] = self.skipped_llm_enrichment(lead, personas[index])
+            else:
+                pending.append(index)
+        
+        items = [
+            LEAD_ENRICHMENT_BATCH_ITEM.format(
+                lead_id=f"L{index + 1}",
+                name=leads[index].name or "Unknown",
+                email=leads[index].email or "Unknown",
+                company=leads[index].company or "Unknown",
+                industry=leads[index].industry or "Unknown",
+                job_title=leads[index].job_title or "Unknown",
+                suggested_persona=personas[index]
+            )
+            for index in pending
+        ]
+        
+        batches = plan_batches(
+            [self.llm_service.estimate_tokens(item) for item in items],
+            max_batch_size=settings.LLM_BATCH_SIZE,
+            token_budget=settings.LLM_BATCH_TOKEN_BUDGET,
+            overhead_tokens=self.llm_service.estimate_tokens(LEAD_ENRICHMENT_BATCH_PROMPT),
+            output_tokens_per_item=BATCH_OUTPUT_TOKENS_PER_LEAD
+        )
+        missing = []
+        for batch in batches:
+            prompt = LEAD_ENRICHMENT_BATCH_PROMPT.format(
+                count=len(batch),
+                leads="\n\n".join(items[position] for position in batch)
+            )
+            try:
+                batch_results = await self.llm_service.generate_json_batch(
+                    prompt,
+                    task="enrichment",
+                    max_tokens=BATCH_OUTPUT_TOKENS_PER_LEAD * len(batch),
+                    schema=EnrichmentResponse
+                )
+            except Exception as e:
+                for position in batch:
+                    index = pending[position]
+                    results[index] = self.deterministic_enrichment(leads[index], personas[index], e)
+                continue
+            
+            for position in batch:
+                index = pending[position]
+                result = batch_results.get(f"L{index + 1}")
+                if result is None:
+                    missing.append(index)
+                else:
+                    results[index] = self.merge_enrichment(leads[index], personas[index], result)
+        
+        retried = await asyncio.gather(*(self._enrich_with_llm(leads[index], personas[index]) for index in missing))
+        for index, result in zip(missing, retried):
+            results[index] = result
+        return results
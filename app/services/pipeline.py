@@ -0,0 +1,311 @@
+"""Staged lead processing pipeline with bounded queues."""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.utils import metrics
+
+
+_SENTINEL = object()
+
+STAGE_SECONDS = metrics.histogram(
+    "pipeline_stage_duration_seconds", "Time spent in a stage handler per call (one call per batch).", ["stage"]
+)
+STAGE_ITEMS = metrics.counter("pipeline_stage_items_total", "Items that left a stage, by outcome.", ["stage", "outcome"])
+STAGE_IN_PROGRESS = metrics.gauge("pipeline_stage_in_progress", "Items currently inside a stage handler.", ["stage"])
+
+ResumeHook = Callable[[Any], Optional[Tuple[Any, Iterable[str]]]]
+StageHook = Callable[[str, "PipelineItem"], None]
+
+
+class PipelineStage:
+    """A named pipeline step served by its own pool of workers.
+    
+    When a batch handler is given, each worker takes up to batch_size
+    items at once, waiting up to batch_linger seconds after the first one
+    for the batch to fill, and passes their values as a list. The handler
+    returns one value per item, and an Exception instance in place of a
+    value marks only that item as failed.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 1,
+        batch_handler: Optional[Callable[[List[Any]], Awaitable[List[Any]]]] = None,
+        batch_size: int = 1,
+        batch_linger: float = 0.0
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.batch_handler = batch_handler
+        self.batch_size = max(1, batch_size)
+        self.batch_linger = batch_linger
+    
+    @property
+    def batched(self) -> bool:
+        """Whether the stage processes items in batches."""
+        return self.batch_handler is not None and self.batch_size > 1
+
+
+class PipelineItem:
+    """A single input travelling through the pipeline."""
+    
+    def __init__(self, index: int, source: Any):
+        self.index = index
+        self.source = source
+        self.value = source
+        self.error: Optional[Exception] = None
+        self.failed_stage: Optional[str] = None
+        self.completed_stages: Set[str] = set()
+    
+    @property
+    def ok(self) -> bool:
+        """Whether every stage completed for this item."""
+        return self.error is None
+    
+    def needs(self, stage: "PipelineStage") -> bool:
+        """Whether the item still has to go through the given stage."""
+        return self.error is None and stage.name not in self.completed_stages
+
+
+class LeadPipeline:
+    """Run items through a chain of stages concurrently.
+    
+    Every stage pulls from a bounded queue, so a slow stage applies
+    backpressure to the stages before it. Results are yielded in input
+    order, and an item that fails in one stage skips the remaining stages
+    without affecting any other item.
+    """
+    
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 50, max_in_flight: int = 500):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self._queues: List[asyncio.Queue] = []
+    
+    def queue_depths(self) -> Dict[str, int]:
+        """Return how many items wait in front of each stage of the running stream."""
+        return {stage.name: queue.qsize() for stage, queue in zip(self.stages, self._queues)}
+    
+    def _make_item(self, index: int, source: Any, resume: Optional[ResumeHook]) -> PipelineItem:
+        """Wrap an input, restoring the progress of a previous run when available."""
+        item = PipelineItem(index, source)
+        if resume is not None:
+            restored = resume(source)
+            if restored is not None:
+                item.value, completed_stages = restored
+                item.completed_stages = set(completed_stages)
+        return item
+    
+    async def _feed(self, items: Iterable[Any], outbox: asyncio.Queue, in_flight: asyncio.Semaphore,
+                    resume: Optional[ResumeHook]):
+        """Push input items into the first stage queue."""
+        error = None
+        try:
+            if hasattr(items, "__aiter__"):
+                index = 0
+                async for source in items:
+                    await in_flight.acquire()
+                    await outbox.put(self._make_item(index, source, resume))
+                    index += 1
+            else:
+                for index, source in enumerate(items):
+                    await in_flight.acquire()
+                    await outbox.put(self._make_item(index, source, resume))
+        except Exception as e:
+            error = e
+        
+        await outbox.put(_SENTINEL)
+        if error is not None:
+            raise error
+    
+    def _complete(self, stage: PipelineStage, item: PipelineItem, on_stage_complete: Optional[StageHook]):
+        """Mark a stage as done for an item and notify the observer."""
+        item.completed_stages.add(stage.name)
+        if on_stage_complete is not None:
+            on_stage_complete(stage.name, item)
+    
+    async def _worker(self, stage: PipelineStage, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                      on_stage_complete: Optional[StageHook]):
+        """Process items for one stage until the upstream queue is drained."""
+        while True:
+            item = await inbox.get()
+            if item is _SENTINEL:
+                # Leave the sentinel in place for sibling workers
+                await inbox.put(_SENTINEL)
+                return
+            
+            if item.needs(stage):
+                in_progress = STAGE_IN_PROGRESS.labels(stage.name)
+                in_progress.inc()
+                started = time.perf_counter()
+                try:
+                    item.value = await stage.handler(item.value)
+                    self._complete(stage, item, on_stage_complete)
+                    STAGE_ITEMS.labels(stage.name, "completed").inc()
+                except Exception as e:
+                    item.error = e
+                    item.failed_stage = stage.name
+                    STAGE_ITEMS.labels(stage.name, "failed").inc()
+                finally:
+                    in_progress.dec()
+                    STAGE_SECONDS.labels(stage.name).observe(time.perf_counter() - started)
+            
+            await outbox.put(item)
+    
+    async def _collect_batch(self, stage: PipelineStage, inbox: asyncio.Queue) -> Tuple[List["PipelineItem"], bool]:
+        """Take up to batch_size items, waiting at most batch_linger after the first.
+        
+        Returns the batch and whether the upstream queue is drained.
+        """
+        first = await inbox.get()
+        if first is _SENTINEL:
+            await inbox.put(_SENTINEL)
+            return [], True
+        
+        batch = [first]
+        deadline = time.monotonic() + stage.batch_linger
+        while len(batch) < stage.batch_size:
+            try:
+                item = inbox.get_nowait()
+            except asyncio.QueueEmpty:
+                # Items trickling in from a slower stage are worth waiting for
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(inbox.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _SENTINEL:
+                inbox.put_nowait(_SENTINEL)
+                return batch, True
+            batch.append(item)
+        return batch, False
+    
+    async def _batch_worker(self, stage: PipelineStage, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                            on_stage_complete: Optional[StageHook], collecting: asyncio.Lock):
+        """Process items for a batched stage until the upstream queue is drained."""
+        drained = False
+        while not drained:
+            # One worker fills a batch at a time, so idle workers don't split
+            # the queued items into several small batches
+            async with collecting:
+                batch, drained = await self._collect_batch(stage, inbox)
+            if not batch:
+                return
+            
+            pending = [item for item in batch if item.needs(stage)]
+            if pending:
+                in_progress = STAGE_IN_PROGRESS.labels(stage.name)
+                in_progress.inc(len(pending))
+                started = time.perf_counter()
+                try:
+                    values = await stage.batch_handler([item.value for item in pending])
+                    if len(values) != len(pending):
+                        raise ValueError(f"Stage {stage.name} returned {len(values)} results for {len(pending)} items")
+                except Exception as e:
+                    values = [e] * len(pending)
+                finally:
+                    in_progress.dec(len(pending))
+                    STAGE_SECONDS.labels(stage.name).observe(time.perf_counter() - started)
+                
+                for item, value in zip(pending, values):
+                    if isinstance(value, Exception):
+                        item.error = value
+                        item.failed_stage = stage.name
+                        continue
+                    
+                    item.value = value
+                    try:
+                        self._complete(stage, item, on_stage_complete)
+                    except Exception as e:
+                        item.error = e
+                        item.failed_stage = stage.name
+                
+                completed = sum(1 for item in pending if item.error is None)
+                STAGE_ITEMS.labels(stage.name, "completed").inc(completed)
+                STAGE_ITEMS.labels(stage.name, "failed").inc(len(pending) - completed)
+            
+            for item in batch:
+                await outbox.put(item)
+    
+    async def _run_stage(self, stage: PipelineStage, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                         on_stage_complete: Optional[StageHook]):
+        """Run the worker pool of a stage and signal completion downstream."""
+        if stage.batched:
+            collecting = asyncio.Lock()
+            workers = [
+                asyncio.create_task(self._batch_worker(stage, inbox, outbox, on_stage_complete, collecting))
+                for _ in range(stage.concurrency)
+            ]
+        else:
+            workers = [
+                asyncio.create_task(self._worker(stage, inbox, outbox, on_stage_complete))
+                for _ in range(stage.concurrency)
+            ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        
+        await outbox.put(_SENTINEL)
+    
+    async def stream(
+        self,
+        items: Iterable[Any],
+        resume: Optional[ResumeHook] = None,
+        on_stage_complete: Optional[StageHook] = None
+    ) -> AsyncIterator[PipelineItem]:
+        """Process items and yield them in input order as they complete.
+        
+        resume may return a (value, completed stage names) pair for an input
+        that was partly processed before; those stages are skipped for it.
+        on_stage_complete is called with the stage name and item every time
+        an item finishes a stage.
+        """
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._queues = queues
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        
+        tasks = [asyncio.create_task(self._feed(items, queues[0], in_flight, resume))]
+        for position, stage in enumerate(self.stages):
+            tasks.append(asyncio.create_task(
+                self._run_stage(stage, queues[position], queues[position + 1], on_stage_complete)
+            ))
+        
+        # Items finish out of order; hold them until their turn comes
+        finished = {}
+        next_index = 0
+        try:
+            while True:
+                item = await queues[-1].get()
+                if item is _SENTINEL:
+                    break
+                
+                finished[item.index] = item
+                while next_index in finished:
+                    ready = finished.pop(next_index)
+                    next_index += 1
+                    in_flight.release()
+                    yield ready
+            
+            # Surface errors raised while reading the input
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._queues = []
+    
+    async def run(
+        self,
+        items: Iterable[Any],
+        resume: Optional[ResumeHook] = None,
+        on_stage_complete: Optional[StageHook] = None
+    ) -> List[PipelineItem]:
+        """Process items and return all of them in input order."""
+        return [item async for item in self.stream(items, resume, on_stage_complete)]
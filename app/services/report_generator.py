@@ -1,7 +1,10 @@
 """Campaign summary report generator."""
+import asyncio
 import os
-from typing import List, Dict
-from app.models import Lead, CampaignSummary, Priority, ResponseStatus
+import tempfile
+from typing import AsyncIterator, List, Union
+from app.models import Lead
+from app.services.campaign_stats import CampaignStats
 from app.services.llm_service import LLMService
 from app.utils.prompts import CAMPAIGN_SUMMARY_PROMPT
 
@@ -18,46 +21,40 @@ class ReportGenerator:
         """Ensure reports directory exists."""
         os.makedirs(self.reports_dir, exist_ok=True)
     
-    def _calculate_statistics(self, leads: List[Lead]) -> Dict:
-        """Calculate campaign statistics."""
-        total = len(leads)
-        high_priority = sum(1 for lead in leads if lead.priority == Priority.HIGH)
-        medium_priority = sum(1 for lead in leads if lead.priority == Priority.MEDIUM)
-        low_priority = sum(1 for lead in leads if lead.priority == Priority.LOW)
-        
-        scores = [lead.score for lead in leads if lead.score]
-        average_score = sum(scores) / len(scores) if scores else 0.0
-        
-        # Persona distribution
-        persona_dist = {}
-        for lead in leads:
-            if lead.persona:
-                persona_dist[lead.persona] = persona_dist.get(lead.persona, 0) + 1
-        
-        # Response breakdown
-        response_dist = {
-            ResponseStatus.INTERESTED: 0,
-            ResponseStatus.NOT_INTERESTED: 0,
-            ResponseStatus.FOLLOW_UP: 0,
-            ResponseStatus.PENDING: 0
-        }
-        for lead in leads:
-            if lead.response_status:
-                response_dist[lead.response_status] = response_dist.get(lead.response_status, 0) + 1
-        
-        return {
-            "total": total,
-            "high_priority": high_priority,
-            "medium_priority": medium_priority,
-            "low_priority": low_priority,
-            "average_score": average_score,
-            "persona_distribution": persona_dist,
-            "response_breakdown": {k.value: v for k, v in response_dist.items()}
-        }
+    @property
+    def report_path(self) -> str:
+        """Path of the campaign summary report."""
+        return os.path.join(self.reports_dir, "campaign_summary.md")
     
-    async def generate_report(self, leads: List[Lead]) -> str:
-        """Generate campaign summary report."""
-        stats = self._calculate_statistics(leads)
+    def _open_temp_report(self):
+        """Open a temporary report file next to the report."""
+        fd, temp_path = tempfile.mkstemp(dir=self.reports_dir, prefix=".campaign_summary.md.", suffix=".tmp")
+        return os.fdopen(fd, 'w', encoding='utf-8'), temp_path
+    
+    def _commit_report(self, f, temp_path: str):
+        """Sync the temporary report and move it over the report."""
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(temp_path, self.report_path)
+    
+    async def generate_report(self, campaign_stats: Union[CampaignStats, List[Lead]]) -> str:
+        """Generate campaign summary report from the campaign aggregate."""
+        async for _ in self.stream_report(campaign_stats):
+            pass
+        return self.report_path
+    
+    async def stream_report(self, campaign_stats: Union[CampaignStats, List[Lead]]) -> AsyncIterator[str]:
+        """Yield the markdown report while writing it to the report file.
+        
+        The statistics sections are available at once, the AI summary
+        follows as the LLM streams it. The report is written to a temporary
+        file that replaces the report only once it is complete, so an
+        abandoned stream or a concurrent caller never leaves a partial one.
+        """
+        if not isinstance(campaign_stats, CampaignStats):
+            campaign_stats = CampaignStats.from_leads(campaign_stats)
+        stats = campaign_stats.snapshot()
         
         # Generate AI summary
         prompt = CAMPAIGN_SUMMARY_PROMPT.format(
@@ -70,11 +67,6 @@ class ReportGenerator:
             response_breakdown=stats["response_breakdown"]
         )
         
-        try:
-            ai_summary = await self.llm_service.generate(prompt)
-        except Exception as e:
-            ai_summary = f"Campaign processed {stats['total']} leads with an average score of {stats['average_score']:.2f}."
-        
         # Generate markdown report
         total = stats['total']
         # Avoid division by zero
@@ -82,6 +74,9 @@ class ReportGenerator:
         medium_pct = (stats['medium_priority']/total*100) if total > 0 else 0.0
         low_pct = (stats['low_priority']/total*100) if total > 0 else 0.0
         
+        median_score = stats['score_quantiles']['p50'] or 'n/a'
+        p90_score = stats['score_quantiles']['p90'] or 'n/a'
+        
         report_content = f"""# Campaign Summary Report
 
 ## Overview
@@ -90,6 +85,8 @@ class ReportGenerator:
 
 **Average Lead Score:** {stats['average_score']:.2f}/10
 
+**Median Lead Score:** {median_score} (p90: {p90_score})
+
 ---
 
 ## Priority Breakdown
@@ -115,12 +112,33 @@ class ReportGenerator:
                 percentage = (count / total * 100) if total > 0 else 0.0
                 report_content += f"- **{status}:** {count} leads ({percentage:.1f}%)\n"
         
-        report_content += f"\n---\n\n## AI-Generated Summary\n\n{ai_summary}\n\n---\n\n*Report generated automatically by AI Sales CRM*\n"
+        report_content += "\n---\n\n## AI-Generated Summary\n\n"
         
-        # Save report
-        report_path = os.path.join(self.reports_dir, "campaign_summary.md")
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_content)
-        
-        return report_path
-
+        f, temp_path = await asyncio.to_thread(self._open_temp_report)
+        try:
+            await asyncio.to_thread(f.write, report_content)
+            yield report_content
+            
+            streamed = False
+            try:
+                async for chunk in self.llm_service.generate_stream(prompt, task="summary"):
+                    streamed = True
+                    await asyncio.to_thread(f.write, chunk)
+                    yield chunk
+            except Exception as e:
+                print(f"Error generating campaign summary: {str(e)}")
+                if not streamed:
+                    fallback = f"Campaign processed {stats['total']} leads with an average score of {stats['average_score']:.2f}."
+                    await asyncio.to_thread(f.write, fallback)
+                    yield fallback
+            
+            footer = "\n\n---\n\n*Report generated automatically by AI Sales CRM*\n"
+            await asyncio.to_thread(f.write, footer)
+            await asyncio.to_thread(self._commit_report, f, temp_path)
+        except BaseException:
+            # Cancelled, abandoned by the client or failed: the last complete report stays
+            f.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        yield footer
@@ -1,9 +1,20 @@
 """Response classification service."""
+import asyncio
 import random
-from typing import Dict
-from app.models import Lead, ResponseStatus
+from typing import Dict, List, Optional
+from app.config import settings
+from app.models import ClassificationResponse, Lead, ResponseStatus
 from app.services.llm_service import LLMService
-from app.utils.prompts import RESPONSE_CLASSIFICATION_PROMPT
+from app.utils.batching import plan_batches
+from app.utils.prompts import (
+    RESPONSE_CLASSIFICATION_PROMPT,
+    RESPONSE_CLASSIFICATION_BATCH_PROMPT,
+    RESPONSE_CLASSIFICATION_BATCH_ITEM
+)
+
+
+# Expected completion size of one lead entry in a batch response
+BATCH_OUTPUT_TOKENS_PER_LEAD = 60
 
 
 class ResponseClassifier:
@@ -45,11 +56,42 @@ class ResponseClassifier:
             else:
                 return ResponseStatus.NOT_INTERESTED
     
+    def _merge_classification(self, base_response: ResponseStatus, result: Dict) -> Dict:
+        """Map the LLM classification onto a response status."""
+        status_str = result.get("response_status", base_response.value)
+        
+        # Map to enum
+        status_map = {
+            "interested": ResponseStatus.INTERESTED,
+            "not interested": ResponseStatus.NOT_INTERESTED,
+            "not_interested": ResponseStatus.NOT_INTERESTED,
+            "follow up": ResponseStatus.FOLLOW_UP,
+            "follow-up": ResponseStatus.FOLLOW_UP,
+            "followup": ResponseStatus.FOLLOW_UP
+        }
+        
+        response_status = status_map.get(status_str.lower(), base_response)
+        
+        return {
+            "response_status": response_status,
+            "reasoning": result.get("reasoning", f"Base: {base_response.value}, Refined: {response_status.value}")
+        }
+    
+    def _probabilistic_classification(self, base_response: ResponseStatus, error: Exception) -> Dict:
+        """Fallback result when the LLM classification is unavailable."""
+        return {
+            "response_status": base_response,
+            "reasoning": f"Probabilistic classification applied. Error: {str(error)}"
+        }
+    
     async def classify_response(self, lead: Lead) -> Dict:
         """Classify the likely response status for a lead."""
         # Calculate base response using probabilistic logic
         base_response = self._calculate_base_response(lead)
-        
+        return await self._classify_with_llm(lead, base_response)
+    
+    async def _classify_with_llm(self, lead: Lead, base_response: ResponseStatus) -> Dict:
+        """Refine a base response with one LLM call, falling back to the base response."""
         # Use LLM to refine based on context
         prompt = RESPONSE_CLASSIFICATION_PROMPT.format(
             name=lead.name or "Unknown",
@@ -64,30 +106,74 @@ class ResponseClassifier:
         )
         
         try:
-            result = await self.llm_service.generate_json(prompt)
-            
-            status_str = result.get("response_status", base_response.value)
-            
-            # Map to enum
-            status_map = {
-                "interested": ResponseStatus.INTERESTED,
-                "not interested": ResponseStatus.NOT_INTERESTED,
-                "not_interested": ResponseStatus.NOT_INTERESTED,
-                "follow up": ResponseStatus.FOLLOW_UP,
-                "follow-up": ResponseStatus.FOLLOW_UP,
-                "followup": ResponseStatus.FOLLOW_UP
-            }
-            
-            response_status = status_map.get(status_str.lower(), base_response)
-            
-            return {
-                "response_status": response_status,
-                "reasoning": result.get("reasoning", f"Base: {base_response.value}, Refined: {response_status.value}")
-            }
+            result = await self.llm_service.generate_json(
+                prompt, task="classification", schema=ClassificationResponse, priority=lead.priority
+            )
+            return self._merge_classification(base_response, result)
         except Exception as e:
             # Fallback to probabilistic logic
-            return {
-                "response_status": base_response,
-                "reasoning": f"Probabilistic classification applied. Error: {str(e)}"
-            }
-
+            return self._probabilistic_classification(base_response, e)
+    
+    async def classify_responses(self, leads: List[Lead]) -> List[Dict]:
+        """Classify several leads, sending them to the LLM in batches.
+        
+        Leads missing from a batch response are retried individually; when
+        a whole batch call fails its leads fall back to the probabilistic
+        classification.
+        """
+        base_responses = [self._calculate_base_response(lead) for lead in leads]
+        items = [
+            RESPONSE_CLASSIFICATION_BATCH_ITEM.format(
+                lead_id=f"L{index + 1}",
+                name=lead.name or "Unknown",
+                company=lead.company or "Unknown",
+                industry=lead.industry or "Unknown",
+                job_title=lead.job_title or "Unknown",
+                persona=lead.persona or "Other",
+                score=lead.score or 5,
+                priority=lead.priority or "Medium",
+                email_subject=lead.email_subject or "Partnership Opportunity",
+                base_response=base_responses[index].value
+            )
+            for index, lead in enumerate(leads)
+        ]
+        
+        results: List[Optional[Dict]] = [None] * len(leads)
+        batches = plan_batches(
+            [self.llm_service.estimate_tokens(item) for item in items],
+            max_batch_size=settings.LLM_BATCH_SIZE,
+            token_budget=settings.LLM_BATCH_TOKEN_BUDGET,
+            overhead_tokens=self.llm_service.estimate_tokens(RESPONSE_CLASSIFICATION_BATCH_PROMPT),
+            output_tokens_per_item=BATCH_OUTPUT_TOKENS_PER_LEAD
+        )
+        missing = []
+        for batch in batches:
+            prompt = RESPONSE_CLASSIFICATION_BATCH_PROMPT.format(
+                count=len(batch),
+                leads="\n\n".join(items[index] for index in batch)
+            )
+            try:
+                batch_results = await self.llm_service.generate_json_batch(
+                    prompt,
+                    task="classification",
+                    max_tokens=BATCH_OUTPUT_TOKENS_PER_LEAD * len(batch),
+                    schema=ClassificationResponse
+                )
+            except Exception as e:
+                for index in batch:
+                    results[index] = self._probabilistic_classification(base_responses[index], e)
+                continue
+            
+            for index in batch:
+                result = batch_results.get(f"L{index + 1}")
+                if result is None:
+                    missing.append(index)
+                else:
+                    results[index] = self._merge_classification(base_responses[index], result)
+        
+        retried = await asyncio.gather(
+            *(self._classify_with_llm(leads[index], base_responses[index]) for index in missing)
+        )
+        for index, result in zip(missing, retried):
+            results[index] = result
+        return results
@@ -0,0 +1,81 @@
+"""Campaign-level LLM token accounting and budgets."""
+from typing import Dict
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised instead of sending a request that could overrun the campaign token budget."""
+
+
+class TokenBudget:
+    """Tokens used by one campaign, optionally capped.
+    
+    Each request reserves its worst case (prompt estimate plus max_tokens)
+    before it is sent and settles with the usage reported by the provider,
+    so concurrent requests can never take the campaign past its limit.
+    Once it is exhausted, callers fall back to the rule-based results for
+    the remaining leads. A limit of 0 only counts.
+    """
+    
+    def __init__(self, limit: int = 0):
+        self.limit = max(0, limit)
+        self.reserved = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.by_task: Dict[str, int] = {}
+        self.requests = 0
+        self.refused = 0
+    
+    @property
+    def used(self) -> int:
+        """Tokens charged so far."""
+        return self.prompt_tokens + self.completion_tokens
+    
+    @property
+    def remaining(self) -> int:
+        """Tokens that can still be reserved (-1 when unlimited)."""
+        if not self.limit:
+            return -1
+        return max(0, self.limit - self.used - self.reserved)
+    
+    def reserve(self, tokens: int, task: str = "other"):
+        """Set aside the worst-case cost of a request, or refuse it."""
+        if self.limit and self.used + self.reserved + tokens > self.limit:
+            self.refused += 1
+            raise TokenBudgetExceeded(f"Campaign token budget of {self.limit} exhausted, skipping {task} request")
+        self.reserved += tokens
+    
+    def settle(self, reserved: int, prompt_tokens: int, completion_tokens: int, task: str = "other"):
+        """Replace a reservation with the tokens the request actually used."""
+        self.reserved = max(0, self.reserved - reserved)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.by_task[task] = self.by_task.get(task, 0) + prompt_tokens + completion_tokens
+        self.requests += 1
+    
+    def release(self, reserved: int):
+        """Drop the reservation of a request that failed without usage."""
+        self.reserved = max(0, self.reserved - reserved)
+    
+    def merge(self, data: Dict) -> "TokenBudget":
+        """Add the usage of another budget (e.g. a campaign shard) from its to_dict()."""
+        self.prompt_tokens += data.get("prompt_tokens", 0)
+        self.completion_tokens += data.get("completion_tokens", 0)
+        for task, tokens in data.get("by_task", {}).items():
+            self.by_task[task] = self.by_task.get(task, 0) + tokens
+        self.requests += data.get("requests", 0)
+        self.refused += data.get("refused_requests", 0)
+        return self
+    
+    def to_dict(self) -> Dict:
+        """Return the token totals as a JSON-serialisable dict."""
+        return {
+            "budget": self.limit or None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.used,
+            "remaining": self.remaining if self.limit else None,
+            "by_task": dict(self.by_task),
+            "requests": self.requests,
+            "refused_requests": self.refused,
+            "exhausted": bool(self.limit) and self.refused > 0
+        }
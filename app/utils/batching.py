@@ -0,0 +1,27 @@
+"""Helpers for packing several leads into one LLM request."""
+from typing import List
+
+
+def plan_batches(item_tokens: List[int], max_batch_size: int, token_budget: int,
+                 overhead_tokens: int, output_tokens_per_item: int) -> List[List[int]]:
+    """Group item indexes into batches that fit a per-request token budget.
+    
+    Each batch pays the shared prompt overhead once, plus the prompt and
+    expected completion tokens of every item in it. A single item larger
+    than the budget still gets a batch of its own.
+    """
+    batches = []
+    current = []
+    used = overhead_tokens
+    for index, tokens in enumerate(item_tokens):
+        cost = tokens + output_tokens_per_item
+        if current and (len(current) >= max_batch_size or used + cost > token_budget):
+            batches.append(current)
+            current = []
+            used = overhead_tokens
+        current.append(index)
+        used += cost
+    
+    if current:
+        batches.append(current)
+    return batches
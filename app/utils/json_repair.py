@@ -0,0 +1,124 @@
+"""Tolerant parsing of the JSON objects in LLM output."""
+import json
+from typing import Dict, List, Optional, Tuple
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _strip_fences(text: str) -> str:
+    """Remove markdown code fences around a response."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text[3:]
+        if text.lower().startswith("json"):
+            text = text[4:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def _drop_trailing_comma(out: List[str]):
+    """Remove a comma (and the whitespace after it) at the end of the output."""
+    end = len(out)
+    while end and out[end - 1].isspace():
+        end -= 1
+    if end and out[end - 1] == ",":
+        del out[end - 1:]
+
+
+def _close(out: List[str], stack: List[str]) -> str:
+    """Close every open container of a truncated object."""
+    text = "".join(out).rstrip()
+    # A member cut off after its key or colon cannot be completed
+    if text.endswith(":"):
+        text += " null"
+    text = text.rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def _loads_object(text: str) -> Optional[Dict]:
+    """Parse text that should hold a single JSON object."""
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _scan_object(text: str, start: int) -> Tuple[Optional[Dict], int]:
+    """Parse the object opening at text[start], repairing what can be repaired.
+    
+    Trailing commas are dropped. A truncated object is closed after its
+    last complete member (or after the cut-off string when that parses).
+    Returns the object, or None, and the index after the consumed text.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    # Output length and open containers right before each comma, where a truncated object can be cut
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = False
+    escaped = False
+    
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            out.append(char)
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                return _loads_object("".join(out)), index + 1
+        elif char == ",":
+            cuts.append((len(out), tuple(stack)))
+            out.append(char)
+        else:
+            out.append(char)
+    
+    # Truncated: try closing the cut-off string, then fall back to earlier members
+    candidates = [_close(out + (['"'] if in_string else []), stack)]
+    candidates += [_close(out[:length], list(open_stack)) for length, open_stack in reversed(cuts)]
+    for candidate in candidates:
+        value = _loads_object(candidate)
+        if value is not None:
+            return value, len(text)
+    return None, len(text)
+
+
+def parse_json_objects(text: str) -> List[Dict]:
+    """Return every JSON object found in a response, in order.
+    
+    Handles code fences, prose around the objects, trailing commas,
+    several objects in a row and output truncated by max_tokens.
+    """
+    text = _strip_fences(text)
+    value = _loads_object(text)
+    if value is not None:
+        return [value]
+    
+    objects = []
+    position = text.find("{")
+    while position >= 0:
+        value, end = _scan_object(text, position)
+        if value is not None:
+            objects.append(value)
+            position = text.find("{", end)
+        else:
+            # Not an object after all (e.g. braces in prose), try the next opening brace
+            position = text.find("{", position + 1)
+    return objects
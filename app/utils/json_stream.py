@@ -0,0 +1,89 @@
+"""Incremental parsing of a JSON object from streamed LLM output."""
+import json
+from typing import Dict, Optional, Sequence
+
+
+class IncrementalJSONObject:
+    """Find the first JSON object in a stream of text chunks.
+    
+    Text before the opening brace (prose, markdown fences) is skipped. The
+    object is returned as soon as it closes, or, when required keys are
+    given, as soon as every one of them holds a complete value, so the
+    caller can stop reading the rest of the completion.
+    """
+    
+    def __init__(self, required_keys: Sequence[str] = ()):
+        self.required_keys = tuple(required_keys)
+        self.text = ""
+        self.result: Optional[Dict] = None
+        # Minimal JSON text the result was parsed from, e.g. for caching
+        self.json_text: Optional[str] = None
+        self._position = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def _complete(self, candidate: str) -> bool:
+        """Accept a candidate object text if it parses into a usable dict."""
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(value, dict):
+            return False
+        self.result = value
+        self.json_text = candidate
+        return True
+    
+    def _has_required_keys(self, candidate: str) -> bool:
+        """Whether a partial object already holds every required key."""
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            return False
+        return isinstance(value, dict) and all(value.get(key) is not None for key in self.required_keys)
+    
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """Add streamed text and return the object once it is usable."""
+        if self.result is not None:
+            return self.result
+        self.text += chunk
+        text = self.text
+        
+        for index in range(self._position, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            
+            if self._start < 0:
+                if char == "{":
+                    self._start = index
+                    self._depth = 1
+                continue
+            
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._complete(text[self._start:index + 1]):
+                        return self.result
+                    # Not JSON after all (e.g. braces in prose), look for the next object
+                    self._start = -1
+            elif char == "," and self._depth == 1 and self.required_keys:
+                # A top-level member just ended, the object may already be usable
+                candidate = text[self._start:index] + "}"
+                if self._has_required_keys(candidate) and self._complete(candidate):
+                    return self.result
+        
+        self._position = len(text)
+        return None
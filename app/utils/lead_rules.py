@@ -0,0 +1,173 @@
+"""Compiled keyword rules for persona mapping and rule-based lead scoring."""
+import re
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Persona tiers in priority order; the first tier with a keyword contained in the title wins
+PERSONA_TIERS: List[Tuple[str, List[str]]] = [
+    ("Decision Maker", ["ceo", "founder", "president", "owner", "co-founder"]),
+    ("Technical Buyer", ["cto", "chief technology", "engineering manager",
+                         "engineering director", "vp engineering", "technical director"]),
+    ("Financial Decision Maker", ["cfo", "chief financial", "finance director", "vp finance"]),
+    ("Influencer", ["marketing director", "marketing manager", "cmo",
+                    "chief marketing", "sales director", "sales manager",
+                    "vp sales", "vp marketing"]),
+    ("Operations Manager", ["operations manager", "operations director", "coo",
+                            "chief operations", "vp operations", "general manager"]),
+    ("HR Director", ["hr director", "hr manager", "human resources",
+                     "chief people", "people operations"]),
+    ("Product Manager", ["product manager", "product director", "cpo",
+                         "chief product", "vp product"]),
+    ("Director", ["director"]),
+    ("Manager", ["manager"]),
+    ("Partner", ["partner"]),
+]
+
+# Job title tiers for the base score (decision-making authority) and the points each adds
+TITLE_SCORE_TIERS: List[Tuple[int, List[str]]] = [
+    (3, ["ceo", "founder", "president", "owner"]),
+    (2, ["cto", "cfo", "coo", "vp", "vice president"]),
+    (1, ["director", "head of", "chief"]),
+    (0, ["manager", "lead"]),
+]
+UNKNOWN_TITLE_POINTS = -1  # Unknown or lower-level roles
+
+HIGH_VALUE_INDUSTRIES = ["technology", "finance", "healthcare", "pharmaceutical", "aerospace"]
+
+
+class TieredKeywordMatcher:
+    """Find the best tier with a keyword occurring anywhere in a text.
+    
+    All keywords are compiled into one alternation inside a lookahead, so a
+    single scan reports a match at every position, including overlapping
+    ones. Alternatives are ordered by tier, which makes the regex pick the
+    best-tier keyword starting at each position; the best tier over all
+    positions is the tier the equivalent chain of any(keyword in text)
+    checks would pick.
+    """
+    
+    def __init__(self, tiers: Sequence[Sequence[str]]):
+        self.tier_of: Dict[str, int] = {}
+        ordered = []
+        for tier, keywords in enumerate(tiers):
+            for keyword in keywords:
+                if keyword not in self.tier_of:
+                    self.tier_of[keyword] = tier
+                    ordered.append(keyword)
+        self.pattern = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in ordered) + "))")
+    
+    def match(self, text: str) -> Optional[int]:
+        """Return the index of the best matching tier, or None when nothing matches."""
+        best = None
+        for found in self.pattern.finditer(text):
+            tier = self.tier_of[found.group(1)]
+            if best is None or tier < best:
+                best = tier
+                if best == 0:
+                    break
+        return best
+
+
+# Built once at import time and shared by every caller
+PERSONA_MATCHER = TieredKeywordMatcher([keywords for _, keywords in PERSONA_TIERS])
+TITLE_SCORE_MATCHER = TieredKeywordMatcher([keywords for _, keywords in TITLE_SCORE_TIERS])
+INDUSTRY_MATCHER = TieredKeywordMatcher([HIGH_VALUE_INDUSTRIES])
+
+
+@lru_cache(maxsize=65536)
+def map_persona(job_title: Optional[str]) -> str:
+    """Map a job title to a persona."""
+    if not job_title:
+        return "Other"
+    
+    tier = PERSONA_MATCHER.match(job_title.lower())
+    return PERSONA_TIERS[tier][0] if tier is not None else "Other"
+
+
+@lru_cache(maxsize=65536)
+def title_points(job_title: Optional[str]) -> int:
+    """Points a job title adds to the base score."""
+    tier = TITLE_SCORE_MATCHER.match((job_title or "").lower())
+    return TITLE_SCORE_TIERS[tier][0] if tier is not None else UNKNOWN_TITLE_POINTS
+
+
+@lru_cache(maxsize=4096)
+def industry_points(industry: Optional[str]) -> int:
+    """Points an industry adds to the base score."""
+    return 1 if INDUSTRY_MATCHER.match((industry or "").lower()) is not None else 0
+
+
+def company_points(company: Optional[str]) -> int:
+    """Points for having a company name."""
+    company = (company or "").strip()
+    return 1 if company and company != "Unknown" else 0
+
+
+def status_points(status: Optional[str]) -> int:
+    """Points for an active lead status."""
+    return 1 if status and "active" in status.lower() else 0
+
+
+def calculate_base_score(
+    job_title: Optional[str],
+    industry: Optional[str],
+    company: Optional[str],
+    status: Optional[str]
+) -> int:
+    """Calculate the rule-based score (1-10) of a lead."""
+    score = 5 + title_points(job_title) + industry_points(industry) + company_points(company) + status_points(status)
+    return max(1, min(10, score))
+
+
+def map_personas(job_titles: Iterable[Optional[str]]) -> List[str]:
+    """Map a whole column of job titles to personas."""
+    personas = {}
+    result = []
+    for job_title in job_titles:
+        persona = personas.get(job_title)
+        if persona is None:
+            persona = personas[job_title] = map_persona(job_title)
+        result.append(persona)
+    return result
+
+
+def calculate_base_scores(
+    job_titles: Iterable[Optional[str]],
+    industries: Iterable[Optional[str]],
+    companies: Iterable[Optional[str]],
+    statuses: Iterable[Optional[str]]
+) -> array:
+    """Calculate base scores for whole lead columns at once.
+    
+    Each distinct column value is evaluated once and every row is reduced
+    to dictionary lookups, which is what makes triage of large lead lists
+    cheap; lead exports repeat the same titles, industries and statuses
+    over and over. Scores are returned as a compact signed-byte array.
+    """
+    title_cache: Dict[Optional[str], int] = {}
+    industry_cache: Dict[Optional[str], int] = {}
+    company_cache: Dict[Optional[str], int] = {}
+    status_cache: Dict[Optional[str], int] = {}
+    
+    scores = array("b")
+    for job_title, industry, company, status in zip(job_titles, industries, companies, statuses):
+        points = title_cache.get(job_title)
+        if points is None:
+            points = title_cache[job_title] = title_points(job_title)
+        
+        industry_value = industry_cache.get(industry)
+        if industry_value is None:
+            industry_value = industry_cache[industry] = industry_points(industry)
+        
+        company_value = company_cache.get(company)
+        if company_value is None:
+            company_value = company_cache[company] = company_points(company)
+        
+        status_value = status_cache.get(status)
+        if status_value is None:
+            status_value = status_cache[status] = status_points(status)
+        
+        scores.append(max(1, min(10, 5 + points + industry_value + company_value + status_value)))
+    return scores
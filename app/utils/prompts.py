@@ -165,3 +165,195 @@ Write a professional, insightful summary paragraph (3-4 sentences) that highligh
 Respond with only the summary text, no JSON formatting.
 """
 
+
+
+LEAD_SCORING_BATCH_PROMPT = """You are an expert sales lead scoring system. Analyze each of the following {count} leads and refine its base score.
+
+Scoring Guidelines:
+- Score 8-10: C-level executives (CEO, CTO, CFO), Founders, VPs in high-value industries
+- Score 5-7: Directors, Managers, decision-makers in mid-market companies
+- Score 1-4: Lower-level roles, missing information, less relevant industries
+
+Consider these factors:
+1. Decision-making authority (job title hierarchy)
+2. Industry value (Technology, Finance, Healthcare = higher value)
+3. Company presence (having a company name is positive)
+4. Data completeness (missing fields reduce score)
+
+Provide a refined score for every lead that adjusts its base score based on nuanced context. Scores should vary between leads.
+
+Leads:
+
+{leads}
+
+Respond in JSON format only, with exactly one entry per lead id:
+{{
+    "results": [
+        {{
+            "id": "<lead id>",
+            "score": <number 1-10, should differ from base_score if context warrants>,
+            "reasoning": "<brief explanation of why this score was assigned, mention specific factors>"
+        }}
+    ]
+}}
+"""
+
+
+LEAD_SCORING_BATCH_ITEM = """[Lead {lead_id}]
+- Name: {name}
+- Email: {email}
+- Company: {company}
+- Industry: {industry}
+- Job Title: {job_title}
+- Status: {status}
+- Base Score (rule-based): {base_score}/10"""
+
+
+LEAD_ENRICHMENT_BATCH_PROMPT = """You are a lead enrichment agent. For each of the following {count} leads:
+1. Infer any missing fields (industry, job_title) based on available information (email domain, company name, etc.)
+2. Refine or confirm the suggested persona, or suggest a better one if the mapping seems incorrect
+
+Persona Categories:
+- Decision Maker: CEO, Founder, President, Owner
+- Technical Buyer: CTO, Engineering Manager/Director, VP Engineering
+- Financial Decision Maker: CFO, Finance Director, VP Finance
+- Influencer: Marketing Director/Manager, Sales Director/Manager, CMO, VP Sales/Marketing
+- Operations Manager: COO, Operations Director/Manager, VP Operations, General Manager
+- HR Director: HR Director/Manager, Chief People Officer
+- Product Manager: Product Manager/Director, CPO, VP Product
+- Director: Generic Director roles
+- Manager: Generic Manager roles
+- Partner: Partners in consulting/law firms
+- Other: Everything else
+
+If a suggested persona seems correct, confirm it. If the job title or context suggests a different persona, suggest the better one.
+
+Leads:
+
+{leads}
+
+Respond in JSON format only, with exactly one entry per lead id:
+{{
+    "results": [
+        {{
+            "id": "<lead id>",
+            "industry": "<inferred or original industry, be specific>",
+            "job_title": "<inferred or original job title, be specific>",
+            "persona": "<refined buyer persona category from the list above>",
+            "reasoning": "<brief explanation of enrichment decisions>"
+        }}
+    ]
+}}
+"""
+
+
+LEAD_ENRICHMENT_BATCH_ITEM = """[Lead {lead_id}]
+- Name: {name}
+- Email: {email}
+- Company: {company}
+- Industry: {industry}
+- Job Title: {job_title}
+- Suggested Persona (from title mapping): {suggested_persona}"""
+
+
+RESPONSE_CLASSIFICATION_BATCH_PROMPT = """You are an email response classifier. Based on each lead's profile and the email sent, simulate a realistic response classification for each of the following {count} leads.
+
+Response Guidelines:
+- "Interested": High-scoring leads (8+), decision-makers, relevant industry fit, personalized email
+- "Not Interested": Low-scoring leads (1-4), wrong persona fit, generic outreach, busy executives
+- "Follow Up": Medium-scoring leads (5-7), needs nurturing, timing not right, requires more information
+
+Consider:
+1. Lead score (higher = more likely interested)
+2. Persona fit (Decision Makers more likely to respond)
+3. Industry relevance
+4. Email personalization quality
+
+IMPORTANT: Vary your responses! Not all leads should have the same classification. Consider the specific context of each lead.
+
+Leads:
+
+{leads}
+
+Respond in JSON format only, with exactly one entry per lead id:
+{{
+    "results": [
+        {{
+            "id": "<lead id>",
+            "response_status": "<Interested|Not Interested|Follow Up>",
+            "reasoning": "<brief explanation considering the specific lead's context>"
+        }}
+    ]
+}}
+"""
+
+
+RESPONSE_CLASSIFICATION_BATCH_ITEM = """[Lead {lead_id}]
+- Name: {name}
+- Company: {company}
+- Industry: {industry}
+- Job Title: {job_title}
+- Persona: {persona}
+- Score: {score}/10
+- Priority: {priority}
+- Email Subject: {email_subject}
+- Base Response (probabilistic): {base_response}"""
+
+
+LEAD_PROFILE_PROMPT = """You are a lead enrichment and scoring agent. Analyze the following lead and:
+1. Infer any missing fields (industry, job_title) based on available information (email domain, company name, etc.)
+2. Refine or confirm the suggested persona, or suggest a better one if the mapping seems incorrect
+3. Refine the base score using the enriched profile
+
+Lead Information:
+- Name: {name}
+- Email: {email}
+- Company: {company}
+- Industry: {industry}
+- Job Title: {job_title}
+- Status: {status}
+
+Suggested Persona (from title mapping): {suggested_persona}
+Base Score (rule-based): {base_score}/10
+
+Persona Categories:
+- Decision Maker: CEO, Founder, President, Owner
+- Technical Buyer: CTO, Engineering Manager/Director, VP Engineering
+- Financial Decision Maker: CFO, Finance Director, VP Finance
+- Influencer: Marketing Director/Manager, Sales Director/Manager, CMO, VP Sales/Marketing
+- Operations Manager: COO, Operations Director/Manager, VP Operations, General Manager
+- HR Director: HR Director/Manager, Chief People Officer
+- Product Manager: Product Manager/Director, CPO, VP Product
+- Director: Generic Director roles
+- Manager: Generic Manager roles
+- Partner: Partners in consulting/law firms
+- Other: Everything else
+
+Scoring Guidelines:
+- Score 8-10: C-level executives (CEO, CTO, CFO), Founders, VPs in high-value industries
+- Score 5-7: Directors, Managers, decision-makers in mid-market companies
+- Score 1-4: Lower-level roles, missing information, less relevant industries
+
+Consider decision-making authority, industry value (Technology, Finance, Healthcare = higher value), company presence and data completeness. The score should vary between leads.
+
+Respond in JSON format only:
+{{
+    "industry": "<inferred or original industry, be specific>",
+    "job_title": "<inferred or original job title, be specific>",
+    "persona": "<refined buyer persona category from the list above>",
+    "score": <number 1-10, should differ from base_score if context warrants>,
+    "reasoning": "<brief explanation of enrichment and scoring decisions>"
+}}
+"""
+
+
+JSON_REPAIR_PROMPT = """{prompt}
+
+Your previous answer to the request above could not be used, these fields were missing or invalid:
+{problems}
+
+Respond in JSON format only, with exactly these fields:
+{{
+{fields}
+}}
+"""
@@ -0,0 +1,216 @@
+"""Client-side rate limiting for LLM provider calls."""
+import asyncio
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate limit reset value such as "7.66s", "2m59.56s" or "120" into seconds."""
+    if not value:
+        return None
+    
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return seconds
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate.
+    
+    A capacity of 0 disables local accounting, but the bucket still honours
+    pauses reported by the provider.
+    """
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        """Add the tokens accumulated since the last update."""
+        now = time.monotonic()
+        if self.capacity > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until the requested amount can be taken from the bucket and return the amount taken."""
+        async with self._lock:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                
+                if self.capacity <= 0:
+                    return 0.0
+                
+                # Requests larger than the bucket would otherwise never be served
+                amount = min(amount, self.capacity)
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return amount
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+    
+    def refund(self, amount: float):
+        """Return unused tokens, e.g. when the actual usage was below the estimate."""
+        if self.capacity > 0 and amount > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+    
+    def pause(self, seconds: float):
+        """Block the bucket for the given number of seconds."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def sync(self, remaining: Optional[float], reset_after: Optional[float]):
+        """Align the local bucket with the remaining quota reported by the provider."""
+        if remaining is None:
+            return
+        
+        self._refill()
+        if self.capacity > 0:
+            self.tokens = min(self.tokens, remaining)
+        if remaining <= 0 and reset_after:
+            self.pause(reset_after)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency window.
+    
+    The window grows by one slot per window of successful requests and is
+    halved when the provider reports rate limiting, at most once per
+    cooldown so a burst of 429s from concurrent requests counts as one
+    congestion signal.
+    """
+    
+    def __init__(self, initial: int, minimum: int, maximum: int,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self._condition = asyncio.Condition()
+    
+    async def acquire(self):
+        """Wait for a free slot in the window."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+    
+    async def release(self, rate_limited: bool = False, adjust: bool = True):
+        """Free a slot and adjust the window from the request outcome.
+        
+        adjust=False frees the slot of a request that never got an outcome,
+        e.g. one cancelled before or while it was sent.
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if adjust and rate_limited:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self.last_decrease = now
+            elif adjust:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class RateLimiter:
+    """Combined requests/minute, tokens/minute and concurrency limiter."""
+    
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float,
+                 initial_concurrency: int, min_concurrency: int, max_concurrency: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimiter(initial_concurrency, min_concurrency, max_concurrency)
+        self.rate_limited_count = 0
+    
+    async def acquire(self, tokens: float) -> float:
+        """Wait until a request of the given token cost may be sent and return the tokens taken.
+        
+        The concurrency slot is taken before any quota, so a request that is
+        cancelled while it waits gives back everything it took. The caller
+        refunds the returned tokens when the attempt does not go through.
+        """
+        await self.concurrency.acquire()
+        requests_taken = 0.0
+        try:
+            requests_taken = await self.requests.acquire(1)
+            return await self.tokens.acquire(tokens)
+        except BaseException:
+            self.requests.refund(requests_taken)
+            await self.concurrency.release(adjust=False)
+            raise
+    
+    async def release(self, rate_limited: bool = False, adjust: bool = True):
+        """Release the concurrency slot taken by acquire()."""
+        await self.concurrency.release(rate_limited, adjust)
+    
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Apply the x-ratelimit-* headers returned by the provider."""
+        self.requests.sync(
+            self._parse_float(headers.get("x-ratelimit-remaining-requests")),
+            parse_duration(headers.get("x-ratelimit-reset-requests"))
+        )
+        self.tokens.sync(
+            self._parse_float(headers.get("x-ratelimit-remaining-tokens")),
+            parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        )
+    
+    def on_rate_limited(self, headers: Mapping[str, str]) -> float:
+        """Pause all requests after a 429 and return the delay to wait."""
+        self.rate_limited_count += 1
+        delay = parse_retry_after(headers.get("retry-after"))
+        if delay is None:
+            delay = parse_duration(headers.get("x-ratelimit-reset-requests")) or 1.0
+        self.requests.pause(delay)
+        return delay
+    
+    def stats(self) -> dict:
+        """Return the current limiter state."""
+        return {
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "rate_limited": self.rate_limited_count
+        }
+    
+    @staticmethod
+    def _parse_float(value: Optional[str]) -> Optional[float]:
+        """Parse a numeric header value."""
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
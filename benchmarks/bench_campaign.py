@@ -0,0 +1,260 @@
+"""Offline end-to-end benchmark of POST /campaign/process.
+
+Starts the mock Groq server and a local SMTP sink, then runs a full
+campaign over synthetic lead files of each requested size. Every run
+happens in a fresh process (settings are read from the environment at
+import time) and reports leads/s, per-stage latency percentiles, peak
+RSS, LLM request counts by prompt and delivered mail. Results are printed
+and, with --output, written as JSON that can be diffed between releases.
+
+Usage:
+    python -m benchmarks.bench_campaign --sizes 1000,10000,100000 --output bench.json
+    python -m benchmarks.bench_campaign --sizes 1000 --latency-ms 300 --error-429 0.05 \\
+        --env LLM_BATCH_ENABLED=false
+
+With --secondary-latency-ms a second mock server is registered in
+LLM_BACKENDS, to measure request hedging and failover against the tail
+latency and errors of the primary.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.bench_lead_io import generate_rows
+from benchmarks.bench_smtp import SinkServer
+from benchmarks.mock_groq import LATENCY_DISTRIBUTIONS, MockGroqServer
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Summarise latencies in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50": at(0.50),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(ordered[-1] * 1000, 2)
+    }
+
+
+def write_leads(path: str, rows: int):
+    """Write a synthetic campaign input file (input columns only)."""
+    from app.services.csv_service import INPUT_FIELDS, LeadCSVWriter
+
+    with LeadCSVWriter(path) as writer:
+        for row in generate_rows(rows):
+            writer.write_row({field: row[field] for field in INPUT_FIELDS})
+
+
+async def run_child(result_path: str, mail_drain_timeout: float):
+    """Run one campaign in this process and write its measurements."""
+    from app import main
+
+    latencies: Dict[str, List[float]] = {}
+
+    def timed(name: str, handler, batched: bool):
+        async def wrapper(value):
+            start = time.perf_counter()
+            try:
+                return await handler(value)
+            finally:
+                elapsed = time.perf_counter() - start
+                # Every lead of a batch waits for the whole batch
+                latencies.setdefault(name, []).extend([elapsed] * (len(value) if batched else 1))
+        return wrapper
+
+    for stage in main.lead_pipeline.stages:
+        stage.handler = timed(stage.name, stage.handler, False)
+        if stage.batch_handler is not None:
+            stage.batch_handler = timed(stage.name, stage.batch_handler, True)
+
+    async with main.lifespan(main.app):
+        start = time.perf_counter()
+        result = await main.process_campaign(wait=True, shards=None)
+        elapsed = time.perf_counter() - start
+
+        mail_drain_seconds = None
+        if main.mail_queue is not None:
+            drain_start = time.perf_counter()
+            while time.perf_counter() - drain_start < mail_drain_timeout:
+                depth = (await main.mail_queue.stats())["depth"]
+                if not depth.get("pending") and not depth.get("inflight"):
+                    mail_drain_seconds = round(time.perf_counter() - drain_start, 3)
+                    break
+                await asyncio.sleep(0.2)
+        llm_stats = main.llm_service.stats()
+
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "leads_processed": result["leads_processed"],
+            "elapsed_seconds": round(elapsed, 3),
+            "leads_per_second": round(result["leads_processed"] / elapsed, 2) if elapsed else None,
+            "mail_drain_seconds": mail_drain_seconds,
+            "stages": {name: percentiles(values) for name, values in latencies.items()},
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss /
+                                 (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+            "llm": llm_stats
+        }, f)
+
+
+def run_size(rows: int, args, mock: MockGroqServer, sink: SinkServer, sink_address,
+             secondary: Optional[MockGroqServer] = None) -> Dict:
+    """Benchmark one campaign size in a child process."""
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "leads.csv")
+        write_leads(csv_path, rows)
+        env = dict(os.environ)
+        env.update({
+            "CSV_FILE_PATH": csv_path,
+            "REPORTS_DIR": os.path.join(directory, "reports"),
+            "GROQ_API_URL": mock.url,
+            "GROQ_API_KEY": "mock",
+            "GROQ_REQUESTS_PER_MINUTE": str(args.rpm),
+            "GROQ_SMALL_REQUESTS_PER_MINUTE": str(args.rpm),
+            "SMTP_HOST": sink_address[0],
+            "SMTP_PORT": str(sink_address[1]),
+            "SMTP_USER": "",
+            "SMTP_PASSWORD": "",
+            "MAIL_DOMAIN_PER_MINUTE": "0",
+            "PYTHONUNBUFFERED": "1",
+        })
+        if secondary is not None:
+            env["LLM_BACKENDS"] = json.dumps([{"name": "secondary", "url": secondary.url}])
+        for override in args.env:
+            key, _, value = override.partition("=")
+            env[key] = value
+
+        mock.reset()
+        if secondary is not None:
+            secondary.reset()
+        received = sink.received
+        result_path = os.path.join(directory, "result.json")
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_campaign", "--child", result_path,
+             "--mail-drain-timeout", str(args.mail_drain_timeout)],
+            cwd=PROJECT_ROOT, env=env, check=True,
+            stdout=None if args.verbose else subprocess.DEVNULL
+        )
+        with open(result_path, encoding="utf-8") as f:
+            result = json.load(f)
+
+    result["rows"] = rows
+    result["mock"] = mock.counters()
+    if secondary is not None:
+        result["mock_secondary"] = secondary.counters()
+    result["mail_delivered"] = sink.received - received
+    return result
+
+
+def print_result(result: Dict):
+    """Print a human-readable summary of one run."""
+    print(f"\n{result['rows']:,} leads: {result['elapsed_seconds']:.2f}s, "
+          f"{result['leads_per_second']:,.1f} leads/s, peak RSS {result['peak_rss_mb']} MB, "
+          f"{result['mock']['total']} LLM requests {result['mock']['statuses']}, "
+          f"{result['mail_delivered']} mails delivered")
+    if "mock_secondary" in result:
+        print(f"  secondary backend: {result['mock_secondary']['total']} LLM requests "
+              f"{result['mock_secondary']['statuses']}")
+    print(f"  {'stage':<16} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stage in result["stages"].items():
+        print(f"  {name:<16} {stage['count']:>8} {stage.get('p50', 0):>9} {stage.get('p95', 0):>9} "
+              f"{stage.get('p99', 0):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated lead counts")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mean simulated LLM latency")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--error-429", type=float, default=0.0, help="share of LLM requests answered with 429")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="share of LLM requests answered with 503")
+    parser.add_argument("--rpm", type=int, default=0, help="Groq requests per minute of both models (0 = unlimited)")
+    parser.add_argument("--secondary-latency-ms", type=float,
+                        help="also start a second mock backend with this mean latency")
+    parser.add_argument("--secondary-error-5xx", type=float, default=0.0,
+                        help="share of secondary backend requests answered with 503")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra setting for the campaign process, may be repeated")
+    parser.add_argument("--mail-drain-timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the campaign output")
+    parser.add_argument("--child", metavar="RESULT_PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(run_child(args.child, args.mail_drain_timeout))
+        return
+
+    mock = MockGroqServer(latency_ms=args.latency_ms, latency_distribution=args.latency_distribution,
+                          error_429=args.error_429, error_5xx=args.error_5xx)
+    mock.start()
+    secondary = None
+    if args.secondary_latency_ms is not None:
+        secondary = MockGroqServer(latency_ms=args.secondary_latency_ms,
+                                   latency_distribution=args.latency_distribution,
+                                   error_5xx=args.secondary_error_5xx, seed=11)
+        secondary.start()
+    sink = SinkServer()
+    sink_address = sink.start()
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "latency_ms": args.latency_ms,
+            "latency_distribution": args.latency_distribution,
+            "error_429": args.error_429,
+            "error_5xx": args.error_5xx,
+            "rpm": args.rpm,
+            "secondary_latency_ms": args.secondary_latency_ms,
+            "secondary_error_5xx": args.secondary_error_5xx,
+            "env": args.env
+        },
+        "runs": []
+    }
+    try:
+        for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+            result = run_size(size, args, mock, sink, sink_address, secondary)
+            report["runs"].append(result)
+            print_result(result)
+    finally:
+        mock.stop()
+        if secondary is not None:
+            secondary.stop()
+        sink.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
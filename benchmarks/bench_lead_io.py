@@ -0,0 +1,109 @@
+"""Benchmark for CSV versus columnar (Parquet / Arrow IPC) lead I/O.
+
+Writes the same synthetic enriched leads in every format, then times a
+full read, the column-projected read a campaign does, and the CSV import
+into each columnar format. File sizes are reported next to the timings.
+
+Usage:
+    python -m benchmarks.bench_lead_io --rows 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, Iterator
+
+from app.services.columnar_store import ColumnarLeadStore
+from app.services.csv_service import INPUT_FIELDS, CSVService
+
+
+TITLES = ["CEO", "CTO", "VP Sales", "Marketing Director", "Engineering Manager", "Analyst", "Founder"]
+INDUSTRIES = ["Technology", "Finance", "Healthcare", "Retail", "Manufacturing", "Education"]
+PERSONAS = ["Decision Maker", "Technical Buyer", "Sales Leader", "Marketing Leader", "Manager", "Other"]
+PRIORITIES = ["High", "Medium", "Low"]
+RESPONSES = ["Interested", "Not Interested", "Follow Up", "Pending"]
+
+
+def generate_rows(rows: int, seed: int = 7) -> Iterator[Dict[str, str]]:
+    """Yield enriched leads shaped like the output of a campaign."""
+    rng = random.Random(seed)
+    for number in range(rows):
+        company = f"Company {rng.randint(1, rows // 10 + 1)}"
+        yield {
+            "name": f"Lead {number}",
+            "email": f"lead{number}@example{number % 997}.com",
+            "company": company,
+            "industry": rng.choice(INDUSTRIES),
+            "job_title": rng.choice(TITLES),
+            "status": rng.choice(["Active", "New", "Inactive"]),
+            "score": str(rng.randint(1, 10)),
+            "priority": rng.choice(PRIORITIES),
+            "persona": rng.choice(PERSONAS),
+            "email_subject": f"Helping {company} grow",
+            "email_body": f"Hi Lead {number},\n\nI noticed {company} is expanding. "
+                          f"Would you be open to a short call next week?\n\nBest regards,\nSales Team",
+            "response_status": rng.choice(RESPONSES),
+        }
+
+
+def timed(label: str, rows: int, func: Callable[[], object]) -> object:
+    """Run a function once and print its throughput."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44} {elapsed:8.3f}s  {rows / elapsed:>12,.0f} rows/s")
+    return result
+
+
+def size_mb(path: str) -> str:
+    """Format a file size in megabytes."""
+    return f"{os.path.getsize(path) / 1e6:8.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--compression", default="zstd")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "leads.csv")
+        stores = {
+            "parquet": ColumnarLeadStore(os.path.join(directory, "leads.parquet"), args.compression),
+            "arrow": ColumnarLeadStore(os.path.join(directory, "leads.arrow"), args.compression),
+        }
+        csv_service = CSVService(csv_path)
+        
+        def write(store):
+            with store.open_writer() as writer:
+                for row in generate_rows(args.rows):
+                    writer.write_row(row)
+        
+        timed("write csv (DictWriter)", args.rows, lambda: write(csv_service))
+        for name, store in stores.items():
+            timed(f"write {name} ({args.compression})", args.rows, lambda: write(store))
+        
+        def consume(chunks) -> int:
+            return sum(len(chunk) for chunk in chunks)
+        
+        timed("read csv, all columns", args.rows, lambda: consume(csv_service.read_lead_chunks(10000)))
+        timed("read csv, input columns", args.rows,
+              lambda: consume(csv_service.read_lead_chunks(10000, INPUT_FIELDS)))
+        for name, store in stores.items():
+            timed(f"read {name}, all columns", args.rows, lambda: consume(store.read_lead_chunks(10000)))
+            timed(f"read {name}, input columns", args.rows,
+                  lambda: consume(store.read_lead_chunks(10000, INPUT_FIELDS)))
+        
+        for name, store in stores.items():
+            timed(f"import csv -> {name} (arrow csv reader)", args.rows, lambda: store.import_csv(csv_path))
+            timed(f"export {name} -> csv (arrow csv writer)", args.rows,
+                  lambda: store.export_csv(os.path.join(directory, f"export-{name}.csv")))
+        
+        print(f"{'csv size':<44} {size_mb(csv_path)}")
+        for name, store in stores.items():
+            print(f"{name + ' size':<44} {size_mb(store.file_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Micro-benchmark for rule-based persona mapping and base scoring.
+
+Compares the original per-lead keyword scans with the compiled matcher in
+app.utils.lead_rules, per lead and over whole columns.
+
+Usage:
+    python -m benchmarks.bench_lead_rules --rows 1000000
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Optional
+
+from app.utils.lead_rules import calculate_base_score, calculate_base_scores, map_persona, map_personas
+
+
+TITLES = [
+    "CEO", "Co-Founder", "President", "Owner", "CTO", "Chief Technology Officer", "Engineering Manager",
+    "VP Engineering", "CFO", "Finance Director", "Marketing Director", "Sales Manager", "VP Sales",
+    "Operations Manager", "COO", "General Manager", "HR Director", "Chief People Officer",
+    "Product Manager", "VP Product", "Director of Sales", "Account Manager", "Partner",
+    "Software Engineer", "Analyst", "Team Lead", "Head of Growth", "Vice President, Strategy",
+    "Customer Success Coordinator", "Intern", "",
+]
+SENIORITY = ["", "Senior ", "Junior ", "Regional ", "Global ", "Interim "]
+INDUSTRIES = ["Technology", "Finance", "Healthcare", "Pharmaceutical", "Aerospace", "Retail",
+              "Manufacturing", "Education", "Real Estate", "Consulting", "", None]
+COMPANIES = ["TechCorp", "Acme", "Globex", "Initech", "Unknown", "", None]
+STATUSES = ["Active", "Inactive", "New", "", None]
+
+
+def legacy_map_persona(job_title: str) -> str:
+    """Original per-lead persona mapping."""
+    if not job_title:
+        return "Other"
+    title_lower = job_title.lower()
+    if any(title in title_lower for title in ["ceo", "founder", "president", "owner", "co-founder"]):
+        return "Decision Maker"
+    if any(title in title_lower for title in ["cto", "chief technology", "engineering manager",
+                                               "engineering director", "vp engineering", "technical director"]):
+        return "Technical Buyer"
+    if any(title in title_lower for title in ["cfo", "chief financial", "finance director", "vp finance"]):
+        return "Financial Decision Maker"
+    if any(title in title_lower for title in ["marketing director", "marketing manager", "cmo",
+                                               "chief marketing", "sales director", "sales manager",
+                                               "vp sales", "vp marketing"]):
+        return "Influencer"
+    if any(title in title_lower for title in ["operations manager", "operations director", "coo",
+                                               "chief operations", "vp operations", "general manager"]):
+        return "Operations Manager"
+    if any(title in title_lower for title in ["hr director", "hr manager", "human resources",
+                                               "chief people", "people operations"]):
+        return "HR Director"
+    if any(title in title_lower for title in ["product manager", "product director", "cpo",
+                                               "chief product", "vp product"]):
+        return "Product Manager"
+    if "director" in title_lower:
+        return "Director"
+    if "manager" in title_lower:
+        return "Manager"
+    if "partner" in title_lower:
+        return "Partner"
+    return "Other"
+
+
+def legacy_base_score(job_title: Optional[str], industry: Optional[str],
+                      company: Optional[str], status: Optional[str]) -> int:
+    """Original per-lead base score."""
+    score = 5
+    job_title = (job_title or "").lower()
+    industry = (industry or "").lower()
+    company = (company or "").strip()
+    if any(title in job_title for title in ["ceo", "founder", "president", "owner"]):
+        score += 3
+    elif any(title in job_title for title in ["cto", "cfo", "coo", "vp", "vice president"]):
+        score += 2
+    elif any(title in job_title for title in ["director", "head of", "chief"]):
+        score += 1
+    elif any(title in job_title for title in ["manager", "lead"]):
+        score += 0
+    else:
+        score -= 1
+    if any(ind in industry for ind in ["technology", "finance", "healthcare", "pharmaceutical", "aerospace"]):
+        score += 1
+    if company and company != "Unknown":
+        score += 1
+    if status and "active" in (status or "").lower():
+        score += 1
+    return max(1, min(10, score))
+
+
+def generate_columns(rows: int, unique_titles: bool = False, seed: int = 42) -> List[list]:
+    """Generate synthetic lead columns."""
+    rng = random.Random(seed)
+    titles = [rng.choice(SENIORITY) + rng.choice(TITLES) for _ in range(rows)]
+    if unique_titles:
+        # Defeats per-value memoisation to measure the matcher alone
+        titles = [f"{title} #{row}" for row, title in enumerate(titles)]
+    industries = [rng.choice(INDUSTRIES) for _ in range(rows)]
+    companies = [rng.choice(COMPANIES) for _ in range(rows)]
+    statuses = [rng.choice(STATUSES) for _ in range(rows)]
+    return [titles, industries, companies, statuses]
+
+
+def timed(label: str, rows: int, func: Callable[[], object]) -> object:
+    """Run a function once and print its throughput."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.3f}s  {rows / elapsed:>12,.0f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--unique-titles", action="store_true", help="make every job title distinct")
+    args = parser.parse_args()
+
+    titles, industries, companies, statuses = generate_columns(args.rows, args.unique_titles)
+    columns = list(zip(titles, industries, companies, statuses))
+
+    legacy_personas = timed("legacy persona (per lead)", args.rows,
+                            lambda: [legacy_map_persona(title) for title in titles])
+    map_persona.cache_clear()
+    compiled_personas = timed("compiled persona (per lead)", args.rows,
+                              lambda: [map_persona(title) for title in titles])
+    map_persona.cache_clear()
+    column_personas = timed("compiled persona (column)", args.rows, lambda: map_personas(titles))
+
+    legacy_scores = timed("legacy base score (per lead)", args.rows,
+                          lambda: [legacy_base_score(*row) for row in columns])
+    compiled_scores = timed("compiled base score (per lead)", args.rows,
+                            lambda: [calculate_base_score(*row) for row in columns])
+    column_scores = timed("compiled base score (column)", args.rows,
+                          lambda: calculate_base_scores(titles, industries, companies, statuses))
+
+    assert legacy_personas == compiled_personas == column_personas, "persona mismatch"
+    assert legacy_scores == compiled_scores == list(column_scores), "base score mismatch"
+    print("results identical to the legacy implementation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Throughput benchmark for SMTP delivery.
+
+Compares one connection per message (the original behaviour) with the
+pooled MailService sending from async code. Runs against a local sink,
+using aiosmtpd when it is installed and a minimal built-in SMTP sink
+otherwise, or against any server such as MailHog via --host/--port.
+
+Usage:
+    python -m benchmarks.bench_smtp --messages 500 --pool-size 4
+    python -m benchmarks.bench_smtp --host localhost --port 1025
+"""
+import argparse
+import asyncio
+import smtplib
+import threading
+import time
+from typing import Tuple
+
+from app.config import settings
+from app.services.mail_service import MailService
+
+
+class SinkServer:
+    """Minimal SMTP server that accepts and discards every message."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.received = 0
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one SMTP session."""
+        writer.write(b"220 sink ESMTP\r\n")
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command == b"EHLO":
+                writer.write(b"250-sink\r\n250 8BITMIME\r\n")
+            elif command == b"DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                await reader.readuntil(b"\r\n.\r\n")
+                self.received += 1
+                writer.write(b"250 OK\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    def start(self) -> Tuple[str, int]:
+        """Start serving in a background thread and return the bound address."""
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, self.host, self.port), self._loop
+        ).result()
+        return self.host, self._server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        """Stop the server and its event loop."""
+        self._server.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def start_sink() -> Tuple[str, int, object]:
+    """Start aiosmtpd if available, otherwise the built-in sink."""
+    try:
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Sink
+    except ImportError:
+        sink = SinkServer()
+        host, port = sink.start()
+        print(f"using built-in SMTP sink on {host}:{port}")
+        return host, port, sink.stop
+
+    controller = Controller(Sink(), hostname="127.0.0.1", port=8025)
+    controller.start()
+    print(f"using aiosmtpd sink on {controller.hostname}:{controller.port}")
+    return controller.hostname, controller.port, controller.stop
+
+
+def send_per_connection(mail_service: MailService, messages: int):
+    """Send every message over its own connection, as the original service did."""
+    for number in range(messages):
+        msg = mail_service._build_message(f"lead{number}@example.com", "Benchmark", "Hello")
+        with smtplib.SMTP(mail_service.host, mail_service.port) as server:
+            server.send_message(msg)
+
+
+async def send_pooled(mail_service: MailService, messages: int):
+    """Send all messages concurrently through the connection pool."""
+    await asyncio.gather(*(
+        mail_service.send_email_async(f"lead{number}@example.com", "Benchmark", "Hello")
+        for number in range(messages)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=settings.SMTP_POOL_SIZE)
+    parser.add_argument("--host", help="send to an existing SMTP server instead of a local sink")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    stop = None
+    if args.host:
+        host, port = args.host, args.port
+    else:
+        host, port, stop = start_sink()
+
+    settings.SMTP_POOL_SIZE = args.pool_size
+    mail_service = MailService()
+    mail_service.host, mail_service.port = host, port
+    mail_service.user = mail_service.password = ""
+
+    try:
+        start = time.perf_counter()
+        send_per_connection(mail_service, args.messages)
+        elapsed = time.perf_counter() - start
+        print(f"{'connection per message':<32} {elapsed:8.3f}s  {args.messages / elapsed:>10,.0f} msg/s")
+
+        start = time.perf_counter()
+        asyncio.run(send_pooled(mail_service, args.messages))
+        elapsed = time.perf_counter() - start
+        print(f"{f'pooled ({args.pool_size} connections)':<32} {elapsed:8.3f}s  {args.messages / elapsed:>10,.0f} msg/s")
+        print(mail_service.stats())
+    finally:
+        mail_service.close()
+        if stop is not None:
+            stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Local OpenAI-compatible chat completions server for offline benchmarks.
+
+Recognises every prompt template in app/utils/prompts.py and answers with
+plausible canned JSON, after a configurable simulated latency. A share of
+requests can be failed with 429 or 5xx responses to exercise the rate
+limiter and retry paths. Requests with "stream": true are answered with
+server-sent event chunks like the real API.
+
+Usage:
+    python -m benchmarks.mock_groq --port 8900 --latency-ms 200 --error-429 0.02
+    GROQ_API_URL=http://127.0.0.1:8900/openai/v1/chat/completions GROQ_API_KEY=mock ...
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple, Union
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# Distinctive opening of each template, batch variants first
+PROMPT_KINDS = [
+    ("You are an expert sales lead scoring system. Analyze each of the following", "scoring_batch"),
+    ("You are an expert sales lead scoring system.", "scoring"),
+    ("You are a lead enrichment and scoring agent.", "profile"),
+    ("You are a lead enrichment agent. For each of the following", "enrichment_batch"),
+    ("You are a lead enrichment agent.", "enrichment"),
+    ("You are an expert sales email copywriter.", "email"),
+    ("You are an email response classifier. Based on each lead's profile", "classification_batch"),
+    ("You are an email response classifier.", "classification"),
+    ("You are a sales campaign analyst.", "summary"),
+]
+
+_LEAD_BLOCK = re.compile(r"\[Lead ([^\]]+)\](.*?)(?=\n\[Lead |\Z)", re.DOTALL)
+
+
+def prompt_kind(prompt: str) -> str:
+    """Name the prompt template a request was built from."""
+    for prefix, kind in PROMPT_KINDS:
+        if prompt.startswith(prefix):
+            return kind
+    return "unknown"
+
+
+def _field(text: str, label: str) -> str:
+    """Read a "- Label: value" line from a prompt, treating None as empty."""
+    match = re.search(rf"{re.escape(label)}: *(.*)", text)
+    value = match.group(1).strip() if match else ""
+    return "" if value == "None" else value
+
+
+def _score(text: str, label: str, rng: random.Random) -> int:
+    """Nudge a score found in the prompt by at most one point."""
+    match = re.search(rf"{re.escape(label)}: *(\d+)", text)
+    base = int(match.group(1)) if match else 5
+    return max(1, min(10, base + rng.choice((-1, 0, 0, 1))))
+
+
+def _enrichment(text: str) -> Dict:
+    """Echo the known fields of a lead back as its enrichment."""
+    return {
+        "industry": _field(text, "Industry") or "Technology",
+        "job_title": _field(text, "Job Title") or "Manager",
+        "persona": _field(text, "Suggested Persona (from title mapping)") or "Other",
+        "reasoning": "Mock enrichment"
+    }
+
+
+def _classification(text: str) -> Dict:
+    """Classify a lead by the score found in the prompt."""
+    match = re.search(r"Score: *(\d+)", text)
+    score = int(match.group(1)) if match else 5
+    status = "Interested" if score >= 8 else "Follow Up" if score >= 5 else "Not Interested"
+    return {"response_status": status, "reasoning": "Mock classification"}
+
+
+def canned_completion(prompt: str) -> Tuple[str, str]:
+    """Return the prompt kind and a deterministic response text for it."""
+    kind = prompt_kind(prompt)
+    rng = random.Random(zlib.crc32(prompt.encode("utf-8")))
+    
+    if kind == "scoring":
+        data = {"score": _score(prompt, "Base Score (rule-based)", rng), "reasoning": "Mock scoring"}
+    elif kind == "enrichment":
+        data = _enrichment(prompt)
+    elif kind == "profile":
+        data = {**_enrichment(prompt), "score": _score(prompt, "Base Score (rule-based)", rng)}
+    elif kind == "email":
+        name = _field(prompt, "Name") or "there"
+        company = _field(prompt, "Company") or "your team"
+        data = {
+            "subject": f"Helping {company} grow",
+            "body": f"Hi {name},\n\nI noticed {company} is expanding. Would you be open to a short call "
+                    f"next week?\n\nBest regards,\nSales Team"
+        }
+    elif kind == "classification":
+        data = _classification(prompt)
+    elif kind.endswith("_batch"):
+        results = []
+        for lead_id, block in _LEAD_BLOCK.findall(prompt):
+            if kind == "scoring_batch":
+                item = {"score": _score(block, "Base Score (rule-based)", rng), "reasoning": "Mock scoring"}
+            elif kind == "enrichment_batch":
+                item = _enrichment(block)
+            else:
+                item = _classification(block)
+            results.append({"id": lead_id, **item})
+        data = {"results": results}
+    elif kind == "summary":
+        return kind, "The campaign reached every lead in the file. High priority leads should be followed up first."
+    else:
+        data = {}
+    return kind, json.dumps(data)
+
+
+class MockGroqServer:
+    """Minimal HTTP/1.1 keep-alive server speaking the chat completions API."""
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 50.0,
+        latency_distribution: str = "lognormal",
+        error_429: float = 0.0,
+        error_5xx: float = 0.0,
+        seed: int = 7
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{latency_distribution}', "
+                             f"expected one of: {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.latency_distribution = latency_distribution
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self._rng = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        """Chat completions URL to use as GROQ_API_URL."""
+        return f"http://{self.host}:{self.port}/openai/v1/chat/completions"
+    
+    def reset(self):
+        """Clear the request counters."""
+        self.requests.clear()
+        self.statuses.clear()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+    
+    def counters(self) -> Dict:
+        """Return request counts by prompt kind and by status code."""
+        return {
+            "requests": dict(self.requests),
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "total": sum(self.statuses.values()),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens
+        }
+    
+    def _sample_latency(self) -> float:
+        """Draw one simulated response time in seconds."""
+        mean = self.latency
+        if mean <= 0 or self.latency_distribution == "fixed":
+            return max(0.0, mean)
+        if self.latency_distribution == "uniform":
+            return self._rng.uniform(0, 2 * mean)
+        if self.latency_distribution == "exponential":
+            return self._rng.expovariate(1 / mean)
+        # Long right tail, like real model latencies
+        sigma = 0.6
+        return self._rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+    
+    @staticmethod
+    def _stream_events(completion: Dict, chunk_chars: int = 16) -> str:
+        """Render a completion as server-sent event chunks, usage in the last one (as Groq does)."""
+        content = completion["choices"][0]["message"]["content"]
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+        events = []
+        for start in range(0, len(content), chunk_chars):
+            delta = {"content": content[start:start + chunk_chars]}
+            events.append({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+        events.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                       "x_groq": {"usage": completion["usage"]}})
+        return "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    
+    async def _complete(self, body: bytes) -> Tuple[int, Union[Dict, str], Dict[str, str]]:
+        """Build the status, JSON body (or event stream) and extra headers for one completion request."""
+        await asyncio.sleep(self._sample_latency())
+        
+        roll = self._rng.random()
+        if roll < self.error_429:
+            return 429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}, \
+                {"retry-after": "0.2", "x-ratelimit-reset-requests": "0.2s"}
+        if roll < self.error_429 + self.error_5xx:
+            return 503, {"error": {"message": "Service unavailable", "type": "server_error"}}, {}
+        
+        payload = json.loads(body or b"{}")
+        messages: List[Dict] = payload.get("messages") or [{"content": ""}]
+        kind, content = canned_completion(messages[-1].get("content", ""))
+        self.requests[kind] += 1
+        prompt_tokens = sum(len(message.get("content", "")) for message in messages) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        completion = {
+            "id": f"chatcmpl-mock-{sum(self.statuses.values())}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+        if payload.get("stream"):
+            return 200, self._stream_events(completion), {}
+        return 200, completion, {}
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method = request_line.split(b" ", 1)[0].upper()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0") or 0))
+                
+                if method == b"POST":
+                    status, data, extra = await self._complete(body)
+                else:
+                    # Connection warm-up probes
+                    status, data, extra = 200, {}, {}
+                self.statuses[status] += 1
+                
+                if isinstance(data, str):
+                    content, content_type = data.encode("utf-8"), "text/event-stream"
+                else:
+                    content, content_type = json.dumps(data).encode("utf-8"), "application/json"
+                reason = {200: "OK", 429: "Too Many Requests", 503: "Service Unavailable"}.get(status, "OK")
+                head = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}",
+                        f"Content-Length: {len(content)}", "Connection: keep-alive"]
+                head += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != b"HEAD":
+                    writer.write(content)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    def start(self) -> str:
+        """Start serving in a background thread and return the completions URL."""
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, self.host, self.port), self._loop
+        ).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.url
+    
+    def stop(self):
+        """Stop the server and its event loop."""
+        self._server.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--error-429", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+    
+    server = MockGroqServer(args.host, args.port, args.latency_ms, args.latency_distribution,
+                            args.error_429, args.error_5xx)
+    print(f"mock Groq API listening on {server.start()}")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(server.counters()))
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Test settings, applied before the app modules read them at import time."""
+import os
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="ai-sales-crm-tests-")
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ["REPORTS_DIR"] = os.path.join(_TEST_DIR, "reports")
+os.environ["CSV_FILE_PATH"] = os.path.join(_TEST_DIR, "leads.csv")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_WARMUP_CONNECTIONS"] = "0"
+os.environ["MAIL_QUEUE_ENABLED"] = "false"
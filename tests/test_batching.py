@@ -0,0 +1,128 @@
+"""Tests for batched LLM prompts and the pipeline's batch collection."""
+import asyncio
+import re
+
+from app.models import Lead, ResponseStatus
+from app.services.lead_scoring import LeadScoringService
+from app.services.persona_agent import PersonaAgent
+from app.services.pipeline import LeadPipeline, PipelineStage
+from app.services.response_classifier import ResponseClassifier
+from app.utils.batching import plan_batches
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FakeLLM:
+    """Answers batch prompts for every lead except the ones listed as dropped."""
+    
+    def __init__(self, batch_answer, single_answer, dropped=(), batch_error=None):
+        self.batch_answer = batch_answer
+        self.single_answer = single_answer
+        self.dropped = set(dropped)
+        self.batch_error = batch_error
+        self.batch_calls = 0
+        self.single_prompts = []
+    
+    def estimate_tokens(self, text):
+        return len(text) // 4
+    
+    async def generate_json_batch(self, prompt, task=None, max_tokens=None, schema=None):
+        self.batch_calls += 1
+        if self.batch_error is not None:
+            raise self.batch_error
+        lead_ids = re.findall(r"\bL\d+\b", prompt)
+        return {lead_id: dict(self.batch_answer) for lead_id in lead_ids if lead_id not in self.dropped}
+    
+    async def generate_json(self, prompt, task=None, schema=None, priority=None):
+        self.single_prompts.append(prompt)
+        return dict(self.single_answer)
+
+
+def make_leads(count):
+    return [
+        Lead(name=f"Lead {index}", email=f"lead{index}@example.com", company=f"Company {index}",
+             industry="Software", job_title="Engineer", status="New")
+        for index in range(count)
+    ]
+
+
+def test_plan_batches_respects_size_and_token_budget():
+    assert plan_batches([10] * 5, max_batch_size=2, token_budget=1000,
+                        overhead_tokens=0, output_tokens_per_item=0) == [[0, 1], [2, 3], [4]]
+    # 100 overhead + two items of 40 + 10 fit in 200, a third does not
+    assert plan_batches([40, 40, 40], max_batch_size=10, token_budget=200,
+                        overhead_tokens=100, output_tokens_per_item=10) == [[0, 1], [2]]
+
+
+def test_plan_batches_gives_an_oversized_item_its_own_batch():
+    assert plan_batches([10, 500, 10], max_batch_size=10, token_budget=100,
+                        overhead_tokens=0, output_tokens_per_item=0) == [[0], [1], [2]]
+
+
+def test_partial_scoring_reply_retries_only_missing_leads():
+    llm = FakeLLM({"score": 9, "reasoning": "batch"}, {"score": 2, "reasoning": "single"}, dropped={"L2", "L4"})
+    results = run(LeadScoringService(llm).score_leads(make_leads(5)))
+    
+    assert llm.batch_calls == 1
+    assert len(llm.single_prompts) == 2
+    assert all("Lead 1" in prompt or "Lead 3" in prompt for prompt in llm.single_prompts)
+    assert [result["reasoning"] for result in results] == ["batch", "single", "batch", "single", "batch"]
+
+
+def test_failed_scoring_batch_falls_back_without_retries():
+    llm = FakeLLM({}, {"score": 2}, batch_error=RuntimeError("provider down"))
+    results = run(LeadScoringService(llm).score_leads(make_leads(3)))
+    
+    assert llm.single_prompts == []
+    assert all("provider down" in result["reasoning"] for result in results)
+
+
+def test_partial_enrichment_reply_retries_only_missing_leads():
+    llm = FakeLLM({"persona": "Engineering", "reasoning": "batch"}, {"persona": "Engineering", "reasoning": "single"},
+                  dropped={"L1"})
+    results = run(PersonaAgent(llm).enrich_leads(make_leads(3)))
+    
+    assert len(llm.single_prompts) == 1
+    assert "Lead 0" in llm.single_prompts[0]
+    assert [result["reasoning"] for result in results] == ["single", "batch", "batch"]
+
+
+def test_partial_classification_reply_retries_only_missing_leads():
+    llm = FakeLLM({"response_status": "Interested", "reasoning": "batch"},
+                  {"response_status": "Follow Up", "reasoning": "single"}, dropped={"L3"})
+    results = run(ResponseClassifier(llm).classify_responses(make_leads(3)))
+    
+    assert len(llm.single_prompts) == 1
+    assert "Lead 2" in llm.single_prompts[0]
+    assert [result["response_status"] for result in results] == [
+        ResponseStatus.INTERESTED, ResponseStatus.INTERESTED, ResponseStatus.FOLLOW_UP
+    ]
+
+
+def test_batched_stage_waits_for_items_trickling_in():
+    batch_sizes = []
+    
+    async def trickle(value):
+        # A slow unbatched stage hands items on one at a time
+        await asyncio.sleep(0.005 * value)
+        return value
+    
+    async def single(value):
+        return value
+    
+    async def batch(values):
+        batch_sizes.append(len(values))
+        await asyncio.sleep(0.01)
+        return values
+    
+    pipeline = LeadPipeline([
+        PipelineStage("trickle", trickle, concurrency=4),
+        PipelineStage("batch", single, concurrency=4, batch_handler=batch, batch_size=10, batch_linger=0.5),
+    ])
+    items = run(pipeline.run(range(20)))
+    
+    assert [item.value for item in items] == list(range(20))
+    # Idle workers don't split the trickle into single-item batches
+    assert batch_sizes == [10, 10]
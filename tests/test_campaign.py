@@ -0,0 +1,233 @@
+"""Tests for running a campaign over the lead store and the checkpoint journal."""
+import asyncio
+import os
+import threading
+
+import pytest
+
+from app import main
+from app.services.campaign_jobs import CampaignJob
+from app.services.campaign_journal import CampaignJournal
+from app.services.csv_service import CSVService
+from app.services.pipeline import LeadPipeline, PipelineStage
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class RecordingStore(CSVService):
+    """CSV store that remembers which threads read its chunks."""
+    
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self.read_threads = []
+    
+    def read_lead_chunks(self, chunk_size=1000, columns=None):
+        for chunk in super().read_lead_chunks(chunk_size, columns):
+            self.read_threads.append(threading.get_ident())
+            yield chunk
+
+
+def make_leads(count):
+    return [
+        main.create_lead({"name": f"Lead {index}", "email": f"lead{index}@example.com", "company": "Acme",
+                          "industry": "Software", "job_title": "Engineer", "status": "New"})
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def campaign(tmp_path, monkeypatch):
+    store = RecordingStore(str(tmp_path / "leads.csv"))
+    store.write_leads(make_leads(7))
+    monkeypatch.setattr(main, "lead_store", store)
+    monkeypatch.setattr(main, "campaign_journal", CampaignJournal(str(tmp_path / "leads.csv.journal.jsonl")))
+    monkeypatch.setattr(main.settings, "CSV_CHUNK_SIZE", 2)
+    return store
+
+
+async def build_lead(lead_data):
+    return main.create_lead(lead_data)
+
+
+async def score_lead(lead):
+    lead.score = 5
+    return lead
+
+
+def test_lead_chunks_are_read_off_the_event_loop(campaign):
+    pipeline = LeadPipeline([PipelineStage("build", build_lead), PipelineStage("scoring", score_lead)])
+    result = run(main.run_campaign(CampaignJob(), pipeline, report=False))
+    
+    assert result["leads_processed"] == 7
+    assert len(campaign.read_threads) == 4
+    assert threading.get_ident() not in campaign.read_threads
+    assert [lead["score"] for lead in campaign.read_leads()] == ["5"] * 7
+
+
+def test_journal_replays_stages_and_keeps_the_snapshot_of_each_record(tmp_path):
+    journal = CampaignJournal(str(tmp_path / "journal.jsonl"))
+    lead, other = make_leads(2)
+    with journal:
+        journal.record("build", lead)
+        lead.score = 7
+        journal.record("scoring", lead)
+        # Changes after the last record are not part of the checkpoint
+        lead.score = 9
+        journal.record("build", other)
+    
+    state = journal.load()
+    assert state[lead.email]["stages"] == {"build", "scoring"}
+    assert state[lead.email]["lead"]["score"] == 7
+    assert state[other.email]["stages"] == {"build"}
+
+
+def test_journal_ignores_a_torn_final_line(tmp_path):
+    journal = CampaignJournal(str(tmp_path / "journal.jsonl"))
+    with journal:
+        journal.record("build", make_leads(1)[0])
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"email": "lead1@exa')
+    
+    assert list(journal.load()) == ["lead0@example.com"]
+
+
+def test_journal_syncs_on_its_writer_thread(tmp_path, monkeypatch):
+    synced_on = []
+    real_fsync = os.fsync
+    
+    def recording_fsync(fd):
+        synced_on.append(threading.get_ident())
+        real_fsync(fd)
+    
+    monkeypatch.setattr(os, "fsync", recording_fsync)
+    journal = CampaignJournal(str(tmp_path / "journal.jsonl"), fsync_every=1)
+    with journal:
+        for lead in make_leads(3):
+            journal.record("build", lead)
+    
+    assert len(synced_on) >= 3
+    assert threading.get_ident() not in synced_on
+    assert len(journal.load()) == 3
+
+
+def test_interrupted_campaign_resumes_from_the_journal(campaign):
+    built = []
+    scored = []
+    
+    async def counting_build(lead_data):
+        built.append(lead_data["email"])
+        return main.create_lead(lead_data)
+    
+    async def stuck_scoring(lead):
+        await asyncio.Event().wait()
+    
+    async def interrupted():
+        job = CampaignJob()
+        pipeline = LeadPipeline([PipelineStage("build", counting_build, 4), PipelineStage("scoring", stuck_scoring, 4)])
+        task = asyncio.create_task(main.run_campaign(job, pipeline, report=False))
+        while job.stage_counts.get("build", 0) < 7:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    run(interrupted())
+    assert len(built) == 7
+    assert len(main.campaign_journal.load()) == 7
+    
+    async def resumed_scoring(lead):
+        scored.append(lead.email)
+        lead.score = 6
+        return lead
+    
+    built.clear()
+    pipeline = LeadPipeline([PipelineStage("build", counting_build), PipelineStage("scoring", resumed_scoring)])
+    result = run(main.run_campaign(CampaignJob(), pipeline, report=False))
+    
+    # Only the stage that never completed runs again
+    assert built == []
+    assert len(scored) == 7
+    assert result["leads_processed"] == 7
+    assert [lead["score"] for lead in campaign.read_leads()] == ["6"] * 7
+    assert not os.path.exists(main.campaign_journal.path)
+
+
+def test_compaction_merges_checkpoints_into_the_lead_file(campaign):
+    leads = make_leads(3)
+    with main.campaign_journal:
+        for lead in leads:
+            main.campaign_journal.record("build", lead)
+            lead.score = 8
+            main.campaign_journal.record("scoring", lead)
+    
+    result = run(main.compact_campaign_journal())
+    
+    assert result["leads_merged"] == 3
+    scores = {lead["email"]: lead["score"] for lead in campaign.read_leads()}
+    assert [scores[lead.email] for lead in leads] == ["8"] * 3
+    # One line per lead remains, with every stage it completed
+    with open(main.campaign_journal.path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+    assert main.campaign_journal.load()[leads[0].email]["stages"] == {"build", "scoring"}
+
+
+def merged_job(leads):
+    # What merge_results leaves behind: every shard lead counted as processed
+    job = CampaignJob()
+    for lead in leads:
+        lead.priority = main.Priority.HIGH
+        job.lead_processed(lead)
+        job.high_priority += 1
+    return job
+
+
+def test_failed_shard_mail_is_not_counted_or_written(campaign, monkeypatch):
+    leads = make_leads(3)
+    job = merged_job(leads)
+    
+    async def send(lead):
+        if lead.email == leads[1].email:
+            raise ConnectionError("SMTP down")
+        return lead
+    
+    monkeypatch.setattr(main, "send_email_stage", send)
+    
+    async def deliver():
+        with main.campaign_journal:
+            return await main.send_email_chunk(job, leads, {})
+    
+    delivered = run(deliver())
+    
+    assert [lead.email for lead in delivered] == [leads[0].email, leads[2].email]
+    assert job.processed == 2
+    assert job.failed == 1
+    assert job.high_priority == 2
+    assert job.stats.total == 2
+    assert job.stage_counts == {"mail": 2}
+    assert job.stage_failures == {"mail": 1}
+
+
+def test_journaled_shard_mail_is_not_sent_again(campaign, monkeypatch):
+    leads = make_leads(3)
+    sent = []
+    
+    async def send(lead):
+        sent.append(lead.email)
+        return lead
+    
+    monkeypatch.setattr(main, "send_email_stage", send)
+    
+    async def deliver(chunk):
+        journal_state = main.campaign_journal.load()
+        with main.campaign_journal:
+            return await main.send_email_chunk(merged_job(leads), chunk, journal_state)
+    
+    # An interrupted run delivered the first two emails
+    run(deliver(leads[:2]))
+    sent.clear()
+    delivered = run(deliver(leads))
+    
+    assert sent == [leads[2].email]
+    assert len(delivered) == 3
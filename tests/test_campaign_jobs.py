@@ -0,0 +1,145 @@
+"""Tests for background campaign jobs and their event streams."""
+import asyncio
+import json
+
+import pytest
+
+from app.services.campaign_jobs import CampaignJob, CampaignJobManager
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def parse(event):
+    fields = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+async def collect(job, last_event_id=0):
+    return [parse(event) async for event in job.events(last_event_id, keepalive=0.05) if not event.startswith(":")]
+
+
+def test_late_subscriber_gets_the_history_then_live_events():
+    async def main():
+        job = CampaignJob()
+        job.set_status("running")
+        job.publish("progress", {"processed": 1})
+        subscriber = asyncio.create_task(collect(job))
+        await asyncio.sleep(0.01)
+        job.publish("progress", {"processed": 2})
+        job.set_status("completed")
+        return await subscriber
+    
+    events = run(main())
+    
+    assert [event_id for event_id, _, _ in events] == [1, 2, 3, 4]
+    assert events[1] == (2, "progress", {"processed": 1})
+    assert events[-1] == (4, "status", {"status": "completed"})
+
+
+def test_reconnecting_subscriber_resumes_after_its_last_event():
+    job = CampaignJob()
+    for processed in range(5):
+        job.publish("progress", {"processed": processed})
+    job.set_status("completed")
+    
+    events = run(collect(job, last_event_id=3))
+    
+    assert [event_id for event_id, _, _ in events] == [4, 5, 6]
+
+
+def test_slow_subscriber_does_not_block_publishing():
+    async def main():
+        job = CampaignJob()
+        stream = job.events(queue_size=2)
+        # Subscribe, then stop reading while events pile up
+        first = asyncio.create_task(stream.__anext__())
+        await asyncio.sleep(0)
+        for processed in range(10):
+            job.publish("progress", {"processed": processed})
+        await first
+        await stream.aclose()
+        return job
+    
+    job = run(main())
+    # Two fit in the subscriber queue before the reader wakes up
+    assert job.dropped_events == 8
+    assert job._subscribers == []
+
+
+def test_eta_follows_throughput():
+    job = CampaignJob()
+    job.set_status("running")
+    job.total = 10
+    job.started_at -= 4
+    job.processed, job.failed = 3, 1
+    
+    assert job.eta_seconds() == pytest.approx(6.0, abs=0.1)
+
+
+def test_manager_runs_one_job_at_a_time_and_records_the_result():
+    async def main():
+        manager = CampaignJobManager()
+        release = asyncio.Event()
+        
+        async def runner(job):
+            await release.wait()
+            return {"leads_processed": 3}
+        
+        job = manager.start(runner)
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            manager.start(runner)
+        release.set()
+        await job.task
+        return job
+    
+    job = run(main())
+    assert job.status == "completed"
+    assert job.to_dict()["result"] == {"leads_processed": 3}
+
+
+def test_failed_and_cancelled_jobs_are_recorded():
+    async def main():
+        manager = CampaignJobManager()
+        
+        async def broken(job):
+            raise ValueError("CSV missing")
+        
+        failed = manager.start(broken)
+        await failed.task
+        
+        async def forever(job):
+            await asyncio.Event().wait()
+        
+        cancelled = manager.start(forever)
+        await asyncio.sleep(0)
+        assert manager.cancel(cancelled.id) is True
+        await cancelled.task
+        assert manager.cancel(cancelled.id) is False
+        return failed, cancelled
+    
+    failed, cancelled = run(main())
+    assert failed.status == "failed"
+    assert failed.to_dict()["errors"] == [{"email": None, "stage": None, "error": "CSV missing"}]
+    assert cancelled.status == "cancelled"
+
+
+def test_manager_forgets_the_oldest_finished_jobs():
+    async def main():
+        manager = CampaignJobManager(max_jobs=2)
+        
+        async def done(job):
+            return {}
+        
+        jobs = []
+        for _ in range(3):
+            job = manager.start(done)
+            await job.task
+            jobs.append(job)
+        return manager, jobs
+    
+    manager, jobs = run(main())
+    assert list(manager.jobs) == [jobs[1].id, jobs[2].id]
+    assert manager.get(jobs[0].id) is None
@@ -0,0 +1,36 @@
+"""Tests for splitting a campaign across worker processes."""
+import pytest
+
+from app.services import campaign_shards
+from app.services.campaign_shards import ShardedCampaign, shard_of, split_limit
+
+
+def test_split_limit_keeps_unlimited_and_a_minimum_of_one():
+    assert split_limit(0, 4) == 0
+    assert split_limit(30, 4) == 7
+    assert split_limit(3, 4) == 1
+
+
+def test_shard_of_ignores_email_case():
+    assert shard_of("Ada@Example.com ", 4) == shard_of("ada@example.com", 4)
+
+
+@pytest.mark.parametrize("name", [
+    "GROQ_REQUESTS_PER_MINUTE", "GROQ_TOKENS_PER_MINUTE",
+    "GROQ_SMALL_REQUESTS_PER_MINUTE", "GROQ_SMALL_TOKENS_PER_MINUTE",
+    "LLM_MAX_CONCURRENCY", "LLM_MAX_CONNECTIONS", "CAMPAIGN_TOKEN_BUDGET",
+])
+def test_workers_share_each_global_limit(tmp_path, monkeypatch, name):
+    monkeypatch.setattr(campaign_shards.settings, name, 1200)
+    env = ShardedCampaign(4, str(tmp_path)).worker_environment(2)
+    
+    assert env[name] == "300"
+
+
+def test_workers_get_their_own_files(tmp_path):
+    sharded = ShardedCampaign(2, str(tmp_path))
+    env = sharded.worker_environment(1)
+    
+    assert env["CSV_FILE_PATH"] == sharded.shard_path(1)
+    assert env["JOURNAL_PATH"] == f"{sharded.shard_path(1)}.journal.jsonl"
+    assert env["MAIL_QUEUE_ENABLED"] == "false"
@@ -0,0 +1,67 @@
+"""Tests for the mergeable campaign statistics."""
+from app.models import Lead, Priority, ResponseStatus, enum_value
+from app.services.campaign_stats import CampaignStats
+from app.services.columnar_store import _text
+from app.services.lead_store import _to_record
+
+
+def make_lead(score, priority, response=ResponseStatus.INTERESTED, persona="Founder"):
+    lead = Lead(name="Ada", email=f"ada{score}@example.com")
+    # Pipeline stages assign enum members, which skips pydantic's value conversion
+    lead.score = score
+    lead.priority = priority
+    lead.response_status = response
+    lead.persona = persona
+    return lead
+
+
+def test_enum_value_unwraps_members_only():
+    assert enum_value(Priority.HIGH) == "High"
+    assert enum_value(ResponseStatus.NOT_INTERESTED) == "Not Interested"
+    assert enum_value("Medium") == "Medium"
+    assert enum_value(None) is None
+    assert enum_value(7) == 7
+
+
+def test_enum_members_and_values_count_alike():
+    stats = CampaignStats.from_leads([
+        make_lead(9, Priority.HIGH),
+        make_lead(8, "High", response="Interested"),
+        make_lead(3, Priority.LOW, ResponseStatus.FOLLOW_UP, persona="Engineer"),
+    ])
+    
+    assert stats.priorities == {"High": 2, "Low": 1}
+    assert stats.responses == {"Interested": 2, "Follow Up": 1}
+    snapshot = stats.snapshot()
+    assert snapshot["high_priority"] == 2
+    assert snapshot["response_breakdown"]["Not Interested"] == 0
+
+
+def test_merged_shards_match_a_single_pass():
+    leads = [make_lead(score, Priority.HIGH if score >= 8 else Priority.MEDIUM) for score in range(1, 11)]
+    whole = CampaignStats.from_leads(leads)
+    merged = CampaignStats.from_leads(leads[:4]) + CampaignStats.from_dict(CampaignStats.from_leads(leads[4:]).to_dict())
+    
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.average_score == 5.5
+    assert [merged.quantile(q) for q in (0.25, 0.5, 0.9)] == [3, 5, 9]
+
+
+def test_stores_write_enum_values():
+    row = {"email": "ada@example.com", "priority": Priority.HIGH, "response_status": ResponseStatus.FOLLOW_UP,
+           "score": 8}
+    
+    assert _text(Priority.HIGH) == "High"
+    assert _text(" Founder ") == "Founder"
+    assert _text(None) is None
+    record = _to_record(row)
+    assert "High" in record
+    assert "Follow Up" in record
+
+
+def test_removing_a_lead_undoes_adding_it():
+    leads = [make_lead(9, Priority.HIGH), make_lead(4, Priority.LOW, persona="Engineer")]
+    stats = CampaignStats.from_leads(leads)
+    stats.remove(leads[1])
+    
+    assert stats.to_dict() == CampaignStats.from_leads(leads[:1]).to_dict()
@@ -0,0 +1,83 @@
+"""Tests for skipping LLM calls on confident rule-based results."""
+import asyncio
+
+from app.models import Lead, Priority
+from app.services.confidence_gate import ConfidenceGate
+from app.services.lead_scoring import LeadScoringService
+from app.services.persona_agent import PersonaAgent
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class CountingLLM:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+    
+    async def generate_json(self, prompt, task=None, schema=None, priority=None):
+        self.calls += 1
+        return dict(self.answer)
+
+
+def test_gate_counts_every_decision():
+    gate = ConfidenceGate(0.9)
+    
+    assert gate.should_skip("scoring", 0.95) is True
+    assert gate.should_skip("scoring", 0.5) is False
+    assert gate.should_skip("scoring", 0.9) is True
+    assert gate.stats()["stages"]["scoring"] == {"skipped": 2, "called": 1, "skip_ratio": 0.6667}
+
+
+def test_disabled_gate_never_skips():
+    gate = ConfidenceGate(0.0, enabled=False)
+    
+    assert gate.should_skip("enrichment", 1.0) is False
+    assert gate.stats()["stages"]["enrichment"]["called"] == 1
+
+
+def test_score_confidence_is_lowest_near_priority_boundaries():
+    service = LeadScoringService(CountingLLM({}))
+    
+    assert service.score_confidence(10) == 1.0
+    assert service.score_confidence(1) == 1.0
+    assert service.score_confidence(8) < 1.0
+    assert service.score_confidence(5) < 1.0
+
+
+def test_confident_score_skips_the_llm():
+    llm = CountingLLM({"score": 3})
+    service = LeadScoringService(llm, ConfidenceGate(0.9))
+    # CEO of an active technology company: 5 + 3 + 1 + 1 + 1
+    lead = Lead(name="Ada", email="ada@example.com", company="Acme", industry="Technology",
+                job_title="CEO", status="Active")
+    
+    result = run(service.score_lead(lead))
+    
+    assert llm.calls == 0
+    assert result["score"] == 10
+    assert result["priority"] == Priority.HIGH
+
+
+def test_uncertain_score_still_calls_the_llm():
+    llm = CountingLLM({"score": 3})
+    service = LeadScoringService(llm, ConfidenceGate(0.9))
+    lead = Lead(name="Bo", email="bo@example.com", company="Acme", industry="Retail", job_title="Director")
+    
+    run(service.score_lead(lead))
+    
+    assert llm.calls == 1
+
+
+def test_mapped_persona_with_known_fields_skips_enrichment():
+    llm = CountingLLM({"persona": "Other"})
+    agent = PersonaAgent(llm, ConfidenceGate(0.9))
+    known = Lead(name="Ada", email="ada@example.com", industry="Finance", job_title="CFO")
+    unknown = Lead(name="Bo", email="bo@example.com", industry=None, job_title="CFO")
+    
+    result = run(agent.enrich_lead(known))
+    run(agent.enrich_lead(unknown))
+    
+    assert result["persona"] == "Financial Decision Maker"
+    assert llm.calls == 1
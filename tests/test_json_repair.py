@@ -0,0 +1,49 @@
+"""Tests for the tolerant JSON object parser used on LLM output."""
+from app.utils.json_repair import parse_json_objects
+
+
+def test_plain_and_fenced_objects():
+    assert parse_json_objects('{"score": 8}') == [{"score": 8}]
+    assert parse_json_objects('```json\n{"score": 8}\n```') == [{"score": 8}]
+
+
+def test_prose_around_the_object():
+    text = 'Here is the result:\n{"score": 7, "reasoning": "good fit"}\nLet me know if you need more.'
+    assert parse_json_objects(text) == [{"score": 7, "reasoning": "good fit"}]
+
+
+def test_trailing_commas_are_dropped():
+    assert parse_json_objects('{"a": [1, 2,], "b": {"c": 3,},}') == [{"a": [1, 2], "b": {"c": 3}}]
+
+
+def test_several_objects_in_a_row():
+    text = '{"id": "L1", "score": 3}\n{"id": "L2", "score": 9}'
+    assert parse_json_objects(text) == [{"id": "L1", "score": 3}, {"id": "L2", "score": 9}]
+
+
+def test_braces_and_commas_inside_strings_are_kept():
+    text = '{"body": "Hi {name}, thanks, \\"really\\"", "subject": "Hello"}'
+    assert parse_json_objects(text) == [{"body": 'Hi {name}, thanks, "really"', "subject": "Hello"}]
+
+
+def test_braces_in_prose_are_skipped():
+    assert parse_json_objects('Use {curly} braces. {"score": 4}') == [{"score": 4}]
+
+
+def test_truncated_string_is_closed():
+    assert parse_json_objects('{"subject": "Hello", "body": "Dear Ada, we') == [
+        {"subject": "Hello", "body": "Dear Ada, we"}
+    ]
+
+
+def test_truncated_member_is_cut_at_the_last_complete_one():
+    assert parse_json_objects('{"score": 8, "reasoning": ') == [{"score": 8, "reasoning": None}]
+    # The partial item keeps what was complete, schema validation drops it later
+    assert parse_json_objects('{"results": [{"id": "L1", "score": 3}, {"id": "L2", "sc') == [
+        {"results": [{"id": "L1", "score": 3}, {"id": "L2"}]}
+    ]
+
+
+def test_no_object_found():
+    assert parse_json_objects("I cannot help with that.") == []
+    assert parse_json_objects("[1, 2, 3]") == []
@@ -0,0 +1,140 @@
+"""Tests for parsing streamed JSON and closing the stream once it is usable."""
+import asyncio
+import json
+
+import httpx
+
+from app.models import EmailResponse
+from app.services.llm_cache import LLMCache
+from app.services.llm_service import LLMService
+from app.utils.json_stream import IncrementalJSONObject
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def feed_all(parser, chunks):
+    for chunk in chunks:
+        result = parser.feed(chunk)
+        if result is not None:
+            return result
+    return None
+
+
+def test_object_is_found_after_prose_and_fences():
+    parser = IncrementalJSONObject()
+    text = 'Sure! Here is the result:\n```json\n{"score": 7, "tags": ["a", "b"]}\n```'
+    
+    assert feed_all(parser, [text[i:i + 3] for i in range(0, len(text), 3)]) == {"score": 7, "tags": ["a", "b"]}
+    assert parser.json_text == '{"score": 7, "tags": ["a", "b"]}'
+
+
+def test_braces_inside_strings_do_not_close_the_object():
+    parser = IncrementalJSONObject()
+    
+    assert parser.feed('{"reasoning": "uses {curly} \\"quotes\\"",') is None
+    assert parser.feed(' "score": 3}') == {"reasoning": 'uses {curly} "quotes"', "score": 3}
+
+
+def test_braces_in_prose_are_skipped():
+    parser = IncrementalJSONObject()
+    
+    assert feed_all(parser, ["Use {placeholders} like this: ", '{"score": 2}']) == {"score": 2}
+
+
+def test_required_keys_return_before_the_object_closes():
+    parser = IncrementalJSONObject(["score"])
+    
+    assert parser.feed('{"score": 8') is None
+    # The number might still continue until the member ends
+    assert parser.feed(', "reasoning": "a long expl') == {"score": 8}
+    assert parser.json_text == '{"score": 8}'
+
+
+def test_incomplete_required_keys_wait_for_more_members():
+    parser = IncrementalJSONObject(["score", "reasoning"])
+    
+    assert parser.feed('{"score": 8, "details": {"a": 1, "b": 2}, ') is None
+    assert parser.feed('"reasoning": "ok"}') == {"score": 8, "details": {"a": 1, "b": 2}, "reasoning": "ok"}
+
+
+def test_unfinished_stream_returns_nothing():
+    parser = IncrementalJSONObject()
+    
+    assert parser.feed('{"score": 8, "reasoning": "cut') is None
+    assert parser.result is None
+
+
+def sse_service(deltas):
+    """Service whose provider streams the given deltas and records how many were sent."""
+    sent = []
+    
+    async def events():
+        for delta in deltas:
+            sent.append(delta)
+            chunk = {"choices": [{"index": 0, "delta": {"content": delta}}]}
+            yield f"data: {json.dumps(chunk)}\n\n".encode()
+            await asyncio.sleep(0)
+        yield b"data: [DONE]\n\n"
+    
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+    
+    service = LLMService()
+    service.streaming = True
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service, sent
+
+
+def test_generate_json_stops_reading_once_required_keys_are_complete():
+    deltas = ['{"sco', 're": 9', ', "reas', 'oning": "', "long " * 5, '"}'] + ["ignored"] * 50
+    service, sent = sse_service(deltas)
+    
+    async def main():
+        try:
+            return await service.generate_json("Score this lead", task="scoring", required_keys=["score"])
+        finally:
+            await service._client.aclose()
+    
+    assert run(main()) == {"score": 9}
+    assert len(sent) < 5
+
+
+def test_streamed_and_whole_json_answers_share_cache_entries():
+    bodies = []
+    answer = '{"subject": "Hi", "body": "Hello Ada"}'
+    
+    def handler(request):
+        body = json.loads(request.content)
+        bodies.append(body)
+        if body.get("stream"):
+            chunk = {"choices": [{"index": 0, "delta": {"content": answer}}]}
+            return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                                  content=f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode())
+        return httpx.Response(200, json={"choices": [{"index": 0, "message": {"role": "assistant", "content": answer}}]})
+    
+    service = LLMService()
+    service.json_mode = True
+    service.cache = LLMCache(None)
+    service.cache_tasks = {"email"}
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    async def main():
+        results = []
+        try:
+            for streaming in (True, False):
+                service.streaming = streaming
+                results.append(await service.generate_json(
+                    "Write an email", task="email", required_keys=("subject", "body"), schema=EmailResponse
+                ))
+        finally:
+            await service._client.aclose()
+        return results
+    
+    streamed, cached = run(main())
+    assert streamed == cached == {"subject": "Hi", "body": "Hello Ada"}
+    assert len(bodies) == 1
+    # JSON mode is left out of the streamed request itself
+    assert "response_format" not in bodies[0]
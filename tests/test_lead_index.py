@@ -0,0 +1,111 @@
+"""Tests for the CSV sidecar index and its keyset pagination."""
+import os
+
+import pytest
+
+from app.services.csv_service import CSVService
+from app.services.lead_index import LeadIndex, decode_cursor, encode_cursor
+
+
+def write_csv(store, rows):
+    with store.open_writer() as writer:
+        for row in rows:
+            writer.write_row(row)
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    store = CSVService(str(tmp_path / "leads.csv"))
+    write_csv(store, [
+        {"name": "Ada", "email": "ada@example.com", "score": "9", "priority": "High"},
+        # Quoted newlines stay inside their record
+        {"name": "Bob", "email": "bob@example.com", "score": "4", "priority": "Low",
+         "email_body": "Hi Bob,\nthanks for \"reading\"\n"},
+        {"name": "Cy", "email": "cy@example.com", "score": "9", "priority": "high"},
+        {"name": "Di", "email": "di@example.com", "score": None, "priority": None},
+    ])
+    index = LeadIndex(store.file_path)
+    yield store, index
+    index.close()
+
+
+def test_rows_are_read_back_from_their_offsets(indexed):
+    store, index = indexed
+    rows = list(index.iter_leads())
+    
+    assert [row["name"] for row in rows] == ["Ada", "Bob", "Cy", "Di"]
+    assert rows[1]["email_body"] == 'Hi Bob,\nthanks for "reading"'
+    assert [row["name"] for row in index.iter_leads(priority="HIGH")] == ["Ada", "Cy"]
+
+
+def test_score_pages_follow_the_cursor_without_gaps(indexed):
+    store, index = indexed
+    first = index.query_leads(sort="score_desc", limit=2)
+    second = index.query_leads(sort="score_desc", limit=2, cursor=first["next_cursor"])
+    
+    assert [row["name"] for row in first["leads"]] == ["Ada", "Cy"]
+    assert decode_cursor(first["next_cursor"]) == [9, 2]
+    # Unscored leads sort last
+    assert [row["name"] for row in second["leads"]] == ["Bob", "Di"]
+    assert second["next_cursor"] is None
+
+
+def test_index_is_rebuilt_when_the_csv_changes(indexed):
+    store, index = indexed
+    index.query_leads()
+    builds = index.builds
+    index.query_leads()
+    assert index.builds == builds
+    
+    write_csv(store, [{"name": "Eve", "email": "eve@example.com", "score": "5"}])
+    os.utime(store.file_path, ns=(1, 1))
+    
+    assert [row["name"] for row in index.query_leads()["leads"]] == ["Eve"]
+    assert index.builds == builds + 1
+    assert os.path.exists(index.index_path)
+
+
+def test_a_restarted_index_reuses_the_sidecar_file(indexed):
+    store, index = indexed
+    index.query_leads()
+    index.close()
+    
+    reopened = LeadIndex(store.file_path)
+    try:
+        assert len(reopened.query_leads(limit=10)["leads"]) == 4
+        assert reopened.builds == 0
+    finally:
+        reopened.close()
+
+
+def test_missing_csv_returns_no_leads(tmp_path):
+    index = LeadIndex(str(tmp_path / "missing.csv"))
+    assert index.query_leads() == {"leads": [], "count": 0, "next_cursor": None}
+
+
+@pytest.mark.parametrize("query", [
+    {"sort": "newest"},
+    {"cursor": "not a cursor"},
+    {"sort": "row", "cursor": encode_cursor([9, 1])},
+])
+def test_invalid_queries_are_rejected(indexed, query):
+    store, index = indexed
+    with pytest.raises(ValueError):
+        index.query_leads(**query)
+
+
+def test_iteration_keeps_reading_the_file_it_started_on(tmp_path):
+    store = CSVService(str(tmp_path / "leads.csv"))
+    write_csv(store, [{"name": f"Old {i}", "email": f"old{i}@example.com"} for i in range(2500)])
+    index = LeadIndex(store.file_path)
+    
+    rows = index.iter_leads()
+    names = [next(rows)["name"] for _ in range(1200)]
+    # The file is replaced mid-iteration and another query rebuilds the index
+    write_csv(store, [{"name": f"New {i}", "email": f"new{i}@example.com"} for i in range(10)])
+    assert index.query_leads(sort="row", limit=1)["leads"][0]["name"] == "New 0"
+    names.extend(row["name"] for row in rows)
+    
+    assert names == [f"Old {i}" for i in range(2500)]
+    assert [row["name"] for row in index.iter_leads()] == [f"New {i}" for i in range(10)]
+    index.close()
@@ -0,0 +1,81 @@
+"""Tests for the fused enrichment and scoring profiler."""
+import asyncio
+
+import pytest
+
+from app.models import Lead
+from app.services.lead_profiler import LeadProfiler
+from app.services.lead_scoring import LeadScoringService
+from app.services.persona_agent import PersonaAgent
+from app.services.token_budget import TokenBudgetExceeded
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class ScriptedLLM:
+    """Answers each task from a script; an Exception instance is raised instead."""
+    
+    def __init__(self, answers):
+        self.answers = answers
+        self.tasks = []
+    
+    async def generate_json(self, prompt, task=None, schema=None, priority=None):
+        self.tasks.append(task)
+        answer = self.answers[task]
+        if isinstance(answer, Exception):
+            raise answer
+        return dict(answer)
+
+
+def make_profiler(answers):
+    llm = ScriptedLLM(answers)
+    return llm, LeadProfiler(llm, PersonaAgent(llm), LeadScoringService(llm))
+
+
+LEAD = Lead(name="Ada", email="ada@example.com", company="Acme", industry="Software", job_title="CTO", status="New")
+
+TWO_CALL_ANSWERS = {
+    "enrichment": {"industry": "Software", "job_title": "CTO", "persona": "Technical Decision Maker", "reasoning": "two"},
+    "scoring": {"score": 8, "reasoning": "two"},
+}
+
+
+def test_fused_answer_takes_one_call():
+    llm, profiler = make_profiler({
+        "profile": {"industry": "Software", "job_title": "CTO", "persona": "Technical Decision Maker",
+                    "score": 9, "reasoning": "fused"}
+    })
+    profile = run(profiler.profile_lead(LEAD))
+    
+    assert llm.tasks == ["profile"]
+    assert profile["reasoning"] == "fused"
+    assert 1 <= profile["score"] <= 10
+
+
+def test_unusable_fused_answer_falls_back_to_two_calls():
+    llm, profiler = make_profiler({"profile": ValueError("Invalid profile response"), **TWO_CALL_ANSWERS})
+    profile = run(profiler.profile_lead(LEAD))
+    
+    assert llm.tasks == ["profile", "enrichment", "scoring"]
+    assert profile["reasoning"] == "two two"
+
+
+def test_request_errors_propagate_without_extra_calls():
+    llm, profiler = make_profiler({"profile": Exception("Failed to generate after 3 attempts on groq: 503"),
+                                   **TWO_CALL_ANSWERS})
+    
+    with pytest.raises(Exception, match="Failed to generate"):
+        run(profiler.profile_lead(LEAD))
+    assert llm.tasks == ["profile"]
+
+
+def test_exhausted_budget_keeps_the_rule_based_results():
+    llm, profiler = make_profiler({"profile": TokenBudgetExceeded("Campaign token budget exhausted"),
+                                   **TWO_CALL_ANSWERS})
+    profile = run(profiler.profile_lead(LEAD))
+    
+    assert llm.tasks == ["profile"]
+    assert profile["persona"] == "Technical Buyer"
+    assert profile["score"] == LeadScoringService(llm).calculate_base_score(LEAD)
@@ -0,0 +1,137 @@
+"""Tests for filtered, keyset-paginated lead queries across storage backends."""
+import pytest
+
+from app.services.columnar_store import ColumnarLeadStore
+from app.services.csv_service import CSVService
+from app.services.lead_index import LeadIndex, decode_cursor, encode_cursor
+from app.services.lead_store import SQLiteLeadStore
+
+PRIORITIES = ["High", "medium", "Low", None]
+PERSONAS = ["Founder", "Engineer", None]
+
+
+def make_rows(count=23):
+    rows = []
+    for index in range(count):
+        rows.append({
+            "name": f"Lead {index}",
+            # One lead has no email, the file backends still return it
+            "email": None if index == 5 else f"lead{index}@example.com",
+            "company": "Acme",
+            "score": None if index % 7 == 0 else str(index % 10 + 1),
+            "priority": PRIORITIES[index % 4],
+            "persona": PERSONAS[index % 3],
+        })
+    return rows
+
+
+@pytest.fixture
+def backends(tmp_path):
+    rows = make_rows()
+    csv_store = CSVService(str(tmp_path / "leads.csv"))
+    stores = {
+        "csv": csv_store,
+        "sqlite": SQLiteLeadStore(str(tmp_path / "leads.sqlite3")),
+        # Small row groups so queries cross several of them
+        "parquet": ColumnarLeadStore(str(tmp_path / "leads.parquet"), row_group_size=4),
+        "arrow": ColumnarLeadStore(str(tmp_path / "leads.arrow"), row_group_size=4),
+    }
+    for store in stores.values():
+        with store.open_writer() as writer:
+            for row in rows:
+                writer.write_row(dict(row))
+    stores["csv"] = LeadIndex(csv_store.file_path)
+    yield stores
+    stores["sqlite"].close()
+    stores["csv"].close()
+
+
+def all_pages(store, **query):
+    names, cursor = [], None
+    while True:
+        page = store.query_leads(limit=3, cursor=cursor, **query)
+        names.extend(lead["name"] for lead in page["leads"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return names
+
+
+@pytest.mark.parametrize("query", [
+    {"sort": "row"},
+    {"sort": "score_desc"},
+    {"sort": "score_asc"},
+    {"priority": "HIGH"},
+    {"persona": "engineer", "sort": "score_asc"},
+    {"min_score": 4, "max_score": 7},
+    {"min_score": 9, "sort": "row"},
+    {"email": "Lead12@example.com"},
+])
+def test_backends_return_the_same_pages(backends, query):
+    results = {name: all_pages(store, **query) for name, store in backends.items()}
+    
+    assert results["csv"], query
+    assert results["parquet"] == results["csv"]
+    assert results["arrow"] == results["csv"]
+    # The database is keyed by email and never stores the lead without one
+    assert results["sqlite"] == [name for name in results["csv"] if name != "Lead 5"]
+
+
+def test_file_backends_include_leads_without_email(backends):
+    for name in ("csv", "parquet", "arrow"):
+        assert len(all_pages(backends[name], sort="row")) == 23
+
+
+def test_score_sort_orders_ties_by_row(backends):
+    page = backends["parquet"].query_leads(sort="score_desc", limit=50)
+    scores = [int(lead["score"]) if lead["score"] else -1 for lead in page["leads"]]
+    
+    assert scores == sorted(scores, reverse=True)
+    assert page["next_cursor"] is None
+
+
+def test_fields_limit_the_returned_columns(backends):
+    page = backends["parquet"].query_leads(sort="row", limit=2, fields=["name", "score"])
+    
+    assert page["leads"] == [{"name": "Lead 0", "score": None}, {"name": "Lead 1", "score": "2"}]
+    assert decode_cursor(page["next_cursor"]) == [1]
+
+
+def test_parquet_query_skips_row_groups_outside_the_range(backends, monkeypatch):
+    store = backends["parquet"]
+    read = []
+    original = store._scan
+    
+    def counting_scan(columns, wanted=None):
+        for first_row, table in original(columns, wanted):
+            read.append(first_row)
+            yield first_row, table
+    
+    monkeypatch.setattr(store, "_scan", counting_scan)
+    page = store.query_leads(sort="row", limit=2, cursor=encode_cursor([17]))
+    
+    assert [lead["name"] for lead in page["leads"]] == ["Lead 18", "Lead 19"]
+    # Row groups before the cursor are never decoded
+    assert set(read) == {16, 20}
+
+
+def test_invalid_cursor_is_rejected(backends):
+    with pytest.raises(ValueError):
+        backends["parquet"].query_leads(sort="row", cursor=encode_cursor([1, 2]))
+
+
+def test_parquet_query_skips_row_groups_by_score_statistics(backends, monkeypatch):
+    store = backends["parquet"]
+    read = []
+    original = store._scan
+    
+    def counting_scan(columns, wanted=None):
+        for first_row, table in original(columns, wanted):
+            read.append(first_row)
+            yield first_row, table
+    
+    monkeypatch.setattr(store, "_scan", counting_scan)
+    page = store.query_leads(min_score=9, limit=50)
+    
+    assert sorted(int(lead["score"]) for lead in page["leads"]) == [9, 9, 10, 10]
+    # Rows 0-3 score at most 4
+    assert 0 not in read
@@ -0,0 +1,92 @@
+"""Tests for the compiled keyword rules and column-wise base scoring."""
+import pytest
+
+from app.utils.lead_rules import (
+    PERSONA_TIERS, TITLE_SCORE_TIERS, TieredKeywordMatcher, calculate_base_score, calculate_base_scores,
+    map_persona, map_personas
+)
+
+TITLES = [
+    "CEO", "Founder & CEO", "Co-Founder", "CTO", "VP Engineering", "Chief Financial Officer",
+    "Director", "Sales Director", "Account Manager", "Managing Partner", "Coordinator",
+    "Head of Product", "Team Lead", "Software Engineer", "", None,
+]
+
+
+def naive_tier(tiers, text):
+    # The chain of substring checks the matcher replaces
+    for tier, keywords in enumerate(tiers):
+        if any(keyword in text for keyword in keywords):
+            return tier
+    return None
+
+
+def test_matcher_picks_the_best_tier_across_positions():
+    matcher = TieredKeywordMatcher([["engineering manager"], ["manager"], ["engineering"]])
+    
+    assert matcher.match("engineering manager") == 0
+    assert matcher.match("manager of engineering") == 1
+    assert matcher.match("engineering") == 2
+    assert matcher.match("sales") is None
+
+
+def test_matcher_finds_overlapping_keywords():
+    # "cto" starts inside "director", after the lower-tier match has begun
+    matcher = TieredKeywordMatcher([["cto"], ["director"]])
+    
+    assert matcher.match("director") == 0
+
+
+def test_matcher_keeps_the_first_tier_of_a_repeated_keyword():
+    matcher = TieredKeywordMatcher([["lead"], ["lead", "owner"]])
+    
+    assert matcher.match("team lead") == 0
+    assert matcher.match("owner") == 1
+
+
+@pytest.mark.parametrize("title", [title for title in TITLES if title])
+def test_compiled_tiers_match_the_substring_chain(title):
+    text = title.lower()
+    persona_tier = naive_tier([keywords for _, keywords in PERSONA_TIERS], text)
+    
+    assert map_persona(title) == (PERSONA_TIERS[persona_tier][0] if persona_tier is not None else "Other")
+    score_tier = naive_tier([keywords for _, keywords in TITLE_SCORE_TIERS], text)
+    expected_points = TITLE_SCORE_TIERS[score_tier][0] if score_tier is not None else -1
+    assert calculate_base_score(title, None, None, None) == 5 + expected_points
+
+
+def test_map_persona_examples():
+    assert map_persona("Founder & CEO") == "Decision Maker"
+    assert map_persona("CTO") == "Technical Buyer"
+    assert map_persona("Marketing Manager") == "Influencer"
+    # Substring semantics: "director" contains "cto"
+    assert map_persona("Sales Director") == "Technical Buyer"
+    assert map_persona("Software Engineer") == "Other"
+    assert map_persona(None) == "Other"
+
+
+def test_map_personas_matches_single_lookups():
+    titles = TITLES * 3
+    
+    assert map_personas(titles) == [map_persona(title) for title in titles]
+
+
+def test_base_score_is_clamped():
+    assert calculate_base_score("CEO", "Technology", "Acme", "Active") == 10
+    assert calculate_base_score("Intern", None, "Unknown", "Cold") == 4
+    assert calculate_base_score("CEO", "Aerospace", "Acme", "Inactive") == 10
+
+
+def test_column_scores_match_row_scores():
+    industries = ["Technology", "Retail", None, "Healthcare Services"]
+    companies = ["Acme", "", "Unknown", None]
+    statuses = ["Active", "New", None, "inactive"]
+    rows = [
+        (title, industries[index % 4], companies[index % 3], statuses[index % 4])
+        for index, title in enumerate(TITLES * 2)
+    ]
+    
+    scores = calculate_base_scores(*zip(*rows))
+    
+    assert scores.typecode == "b"
+    assert list(scores) == [calculate_base_score(*row) for row in rows]
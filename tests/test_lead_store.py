@@ -0,0 +1,92 @@
+"""Tests for the SQLite lead store and its parity with the CSV store."""
+import pytest
+
+from app.models import Lead, Priority
+from app.services.columnar_store import ColumnarLeadStore
+from app.services.csv_service import CSVService
+from app.services.lead_store import SQLiteLeadStore, create_lead_store
+
+
+def make_leads(count):
+    return [
+        Lead(name=f"Lead {index}", email=f"lead{index}@example.com", company="Acme",
+             industry="Software" if index % 2 else None, job_title="Engineer", status="New")
+        for index in range(count)
+    ]
+
+
+def scored(lead, score, priority):
+    return lead.model_copy(update={"score": score, "priority": priority, "persona": "Technical Buyer",
+                                   "email_subject": "Hi", "industry": "Finance"})
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteLeadStore(str(tmp_path / "leads.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_updates_match_the_csv_store(tmp_path, sqlite_store):
+    csv_store = CSVService(str(tmp_path / "leads.csv"))
+    leads = make_leads(4)
+    updates = [scored(leads[1], 8, Priority.HIGH), scored(leads[3], 3, Priority.LOW)]
+    for store in (csv_store, sqlite_store):
+        store.write_leads(leads)
+        store.update_leads(updates)
+    
+    assert sqlite_store.read_leads() == csv_store.read_leads()
+    row = sqlite_store.read_leads()[1]
+    assert (row["score"], row["priority"], row["industry"]) == ("8", "High", "Finance")
+
+
+def test_writer_upserts_by_email_and_keeps_row_order(sqlite_store):
+    sqlite_store.write_leads(make_leads(3))
+    with sqlite_store.open_writer() as writer:
+        writer.write_row({"name": "Renamed", "email": "LEAD1@example.com", "score": "7"})
+        writer.write_row({"name": "New", "email": "new@example.com"})
+        writer.write_row({"name": "No email", "email": ""})
+    
+    rows = sqlite_store.read_leads()
+    assert [row["name"] for row in rows] == ["Lead 0", "Renamed", "Lead 2", "New"]
+    assert rows[1]["score"] == "7"
+    assert writer.rows_written == 2
+
+
+def test_aborted_writer_keeps_only_flushed_batches(sqlite_store):
+    with pytest.raises(RuntimeError):
+        with sqlite_store.open_writer() as writer:
+            writer.write_leads(make_leads(2))
+            writer.write_row({"name": "Unflushed", "email": "unflushed@example.com"})
+            raise RuntimeError("campaign failed")
+    
+    assert [row["name"] for row in sqlite_store.read_leads()] == ["Lead 0", "Lead 1"]
+
+
+def test_readers_see_committed_rows_while_a_writer_is_open(sqlite_store):
+    sqlite_store.write_leads(make_leads(2))
+    with sqlite_store.open_writer() as writer:
+        writer.write_leads(make_leads(4)[2:])
+        assert sqlite_store.count_leads() == 4
+        assert [len(chunk) for chunk in sqlite_store.read_lead_chunks(3)] == [3, 1]
+
+
+def test_csv_round_trip(tmp_path, sqlite_store):
+    source = CSVService(str(tmp_path / "in.csv"))
+    source.write_leads(make_leads(5))
+    
+    assert sqlite_store.import_csv(source.file_path) == 5
+    assert sqlite_store.export_csv(str(tmp_path / "out.csv")) == 5
+    assert CSVService(str(tmp_path / "out.csv")).read_leads() == source.read_leads()
+
+
+def test_create_lead_store_picks_the_backend(tmp_path):
+    csv_path = str(tmp_path / "leads.csv")
+    
+    assert type(create_lead_store("csv", csv_path)) is CSVService
+    assert isinstance(create_lead_store("csv", str(tmp_path / "leads.parquet")), ColumnarLeadStore)
+    store = create_lead_store("SQLite", csv_path)
+    assert store.file_path == str(tmp_path / "leads.sqlite3")
+    store.close()
+    with pytest.raises(ValueError):
+        create_lead_store("mongo", csv_path)
@@ -0,0 +1,140 @@
+"""Tests for backend health, ordering, hedging and failover."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.llm_backends import LLMBackend, LLMBackendPool, parse_backend_specs
+from app.services.llm_service import LLMService
+from app.utils.rate_limiter import RateLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_backend(name, **kwargs):
+    rate_limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0,
+                               initial_concurrency=4, min_concurrency=1, max_concurrency=8)
+    return LLMBackend(name, f"https://{name}.example.com/v1/chat/completions", None, rate_limiter, **kwargs)
+
+
+def test_repeated_failures_start_a_cooldown():
+    backend = make_backend("a", failure_threshold=2, cooldown_seconds=60)
+    backend.record_failure()
+    
+    assert backend.available
+    backend.record_failure()
+    assert not backend.available
+    assert backend.health == pytest.approx(0.64)
+
+
+def test_success_resets_the_failure_streak():
+    backend = make_backend("a", failure_threshold=2)
+    backend.record_failure()
+    backend.record_success("scoring", 0.1)
+    backend.record_failure()
+    
+    assert backend.available
+    assert backend.successes == 1 and backend.failures == 2
+
+
+def test_pool_tries_cooling_and_degraded_backends_last():
+    cooling = make_backend("cooling", failure_threshold=1)
+    degraded = make_backend("degraded", failure_threshold=10)
+    healthy = make_backend("healthy")
+    cooling.record_failure()
+    for _ in range(4):
+        degraded.record_failure()
+    pool = LLMBackendPool([cooling, degraded, healthy])
+    
+    assert [backend.name for backend in pool.ordered()] == ["healthy", "degraded", "cooling"]
+    assert pool.primary is cooling
+
+
+def test_hedge_delay_uses_the_latency_percentile_once_sampled():
+    backend = make_backend("a", min_latency_samples=10)
+    pool = LLMBackendPool([backend, make_backend("b")], hedge_percentile=90, hedge_delay=2.0)
+    for index in range(9):
+        backend.record_success("scoring", 0.1 * (index + 1))
+    
+    assert pool.hedge_delay(backend, "scoring") == 2.0
+    backend.record_success("scoring", 1.0)
+    assert pool.hedge_delay(backend, "scoring") == pytest.approx(0.9)
+    # Latencies are kept per kind of request
+    assert pool.hedge_delay(backend, "persona") == 2.0
+
+
+def test_single_backend_pool_never_hedges():
+    assert LLMBackendPool([make_backend("a")]).hedging is False
+    with pytest.raises(ValueError):
+        LLMBackendPool([])
+
+
+def test_parse_backend_specs():
+    assert parse_backend_specs("  ") == []
+    assert parse_backend_specs('[{"url": "http://localhost:8000/v1/chat/completions", "model": "llama"}]') == [{
+        "name": "backend1", "url": "http://localhost:8000/v1/chat/completions", "model": "llama", "api_key": None
+    }]
+    with pytest.raises(ValueError):
+        parse_backend_specs('{"url": "http://localhost"}')
+    with pytest.raises(ValueError):
+        parse_backend_specs('[{"name": "no url"}]')
+
+
+def pooled_service(handler, backends, hedge_delay=2.0):
+    service = LLMService()
+    service.backends = LLMBackendPool(backends, hedge_delay=hedge_delay)
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def completion(content):
+    return httpx.Response(200, json={
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5}
+    })
+
+
+def generate(service, prompt):
+    async def main():
+        try:
+            return await service.generate(prompt, task="scoring")
+        finally:
+            await service._client.aclose()
+    return run(main())
+
+
+def test_failed_backend_fails_over_to_the_next():
+    hosts = []
+    
+    def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == "a.example.com":
+            return httpx.Response(500, json={"error": "down"})
+        return completion("from b")
+    
+    primary, fallback = make_backend("a"), make_backend("b")
+    service = pooled_service(handler, [primary, fallback])
+    
+    assert generate(service, "hello") == "from b"
+    assert hosts == ["a.example.com", "b.example.com"]
+    assert primary.failures == 1 and fallback.successes == 1
+
+
+def test_slow_backend_is_hedged_and_the_duplicate_wins():
+    async def handler(request):
+        if request.url.host == "a.example.com":
+            await asyncio.sleep(1.0)
+            return completion("from a")
+        assert json.loads(request.content)["messages"][-1]["content"] == "hello"
+        return completion("from b")
+    
+    primary, fallback = make_backend("a"), make_backend("b")
+    service = pooled_service(handler, [primary, fallback], hedge_delay=0.05)
+    
+    assert generate(service, "hello") == "from b"
+    assert fallback.hedge_wins == 1
+    # The cancelled attempt is neither a success nor a failure
+    assert primary.successes == 0 and primary.failures == 0
@@ -0,0 +1,158 @@
+"""Tests for the two-tier LLM response cache."""
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.llm_cache import LLMCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_make_key_ignores_dict_order():
+    assert LLMCache.make_key({"a": 1, "b": [1, 2]}) == LLMCache.make_key({"b": [1, 2], "a": 1})
+    assert LLMCache.make_key({"a": 1}) != LLMCache.make_key({"a": 2})
+
+
+def test_concurrent_callers_share_one_computation():
+    calls = []
+    
+    async def main():
+        cache = LLMCache(None)
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "value"
+        
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        again = await cache.get_or_compute("k", compute)
+        return cache, results, again
+    
+    cache, results, again = run(main())
+    assert results == ["value"] * 5
+    assert again == "value"
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["memory_hits"] == 1
+
+
+def test_leader_cancellation_does_not_cancel_waiters():
+    calls = []
+    
+    async def main():
+        cache = LLMCache(None)
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return f"value{len(calls)}"
+        
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return cache, results
+    
+    cache, results = run(main())
+    # One waiter took over and the others shared its result
+    assert results == ["value2"] * 3
+    assert len(calls) == 2
+    assert cache._inflight == {}
+
+
+def test_cancelled_waiter_leaves_the_leader_running():
+    async def main():
+        cache = LLMCache(None)
+        
+        async def compute():
+            await asyncio.sleep(0.03)
+            return "value"
+        
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+    
+    assert run(main()) == "value"
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    attempts = []
+    
+    async def main():
+        cache = LLMCache(None)
+        
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+        
+        results = await asyncio.gather(
+            *(cache.get_or_compute("k", failing) for _ in range(3)), return_exceptions=True
+        )
+        
+        async def working():
+            return "value"
+        
+        return results, await cache.get_or_compute("k", working)
+    
+    results, value = run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(attempts) == 1
+    assert value == "value"
+
+
+def test_disk_tier_survives_restarts(tmp_path):
+    path = os.path.join(tmp_path, "cache.sqlite3")
+    
+    async def compute():
+        return "stored"
+    
+    async def fail():
+        raise AssertionError("should be served from disk")
+    
+    cache = LLMCache(path)
+    run(cache.get_or_compute("k", compute))
+    cache.close()
+    
+    reopened = LLMCache(path)
+    try:
+        assert run(reopened.get_or_compute("k", fail)) == "stored"
+        assert reopened.stats()["disk_hits"] == 1
+    finally:
+        reopened.close()
+
+
+def test_expired_entries_are_recomputed(tmp_path):
+    cache = LLMCache(os.path.join(tmp_path, "cache.sqlite3"), ttl_seconds=60)
+    try:
+        run(cache.put("k", "old"))
+        # Age the entry past its TTL in both tiers
+        cache._memory["k"] = ("old", time.time() - 120)
+        with cache._db_lock:
+            cache._db.execute("UPDATE llm_cache SET created_at = ?", (time.time() - 120,))
+        assert run(cache.get("k")) is None
+    finally:
+        cache.close()
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LLMCache(None, memory_entries=2)
+    for key in ("a", "b", "c"):
+        run(cache.put(key, key))
+    assert run(cache.get("a")) is None
+    assert run(cache.get("c")) == "c"
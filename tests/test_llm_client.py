@@ -0,0 +1,52 @@
+"""Tests for the shared HTTP client of LLMService."""
+import asyncio
+
+import httpx
+
+from app.services.llm_backends import LLMBackend
+from app.services.llm_service import LLMService
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_client_is_shared_and_reopened_after_shutdown():
+    async def main():
+        service = LLMService()
+        client = service.client
+        assert service.client is client
+        
+        await service.shutdown()
+        assert client.is_closed
+        reopened = service.client
+        await service.shutdown()
+        return client, reopened
+    
+    client, reopened = run(main())
+    assert reopened is not client
+
+
+def test_startup_warms_up_every_backend():
+    requests = []
+    
+    def handler(request):
+        requests.append((request.method, str(request.url)))
+        if request.url.host == "down.example.com":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200)
+    
+    async def main():
+        service = LLMService()
+        service.warmup_connections = 2
+        service.backends.primary.api_url = "https://api.example.com/openai/v1/chat/completions"
+        service.backends.backends.append(
+            LLMBackend("down", "https://down.example.com/v1/chat/completions", None, service.rate_limiter)
+        )
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        # A backend that cannot be reached does not stop the startup
+        await service.startup()
+        await service.shutdown()
+    
+    run(main())
+    assert sorted(requests) == [("HEAD", "https://api.example.com/")] * 2 + [("HEAD", "https://down.example.com/")] * 2
@@ -0,0 +1,124 @@
+"""Tests for the durable outbound mail queue."""
+import asyncio
+import smtplib
+
+from app.services.mail_queue import MailQueue
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FakeMailService:
+    """Records deliveries and fails the first attempts for chosen recipients."""
+    
+    def __init__(self, failures=None, delay=0.0):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.sent = []
+        self.active = 0
+        self.max_active = 0
+    
+    async def deliver_async(self, to_email, subject, body, to_name=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            errors = self.failures.get(to_email)
+            if errors:
+                raise errors.pop(0)
+            self.sent.append(to_email)
+        finally:
+            self.active -= 1
+
+
+def make_queue(tmp_path, mail_service, **kwargs):
+    options = {"retry_base_seconds": 0, "poll_interval": 0.01, **kwargs}
+    return MailQueue(mail_service, str(tmp_path / "mail_queue.sqlite3"), **options)
+
+
+async def drain(queue, messages, settle=lambda stats: stats["depth"]["pending"] == 0):
+    await queue.start()
+    try:
+        for to_email in messages:
+            await queue.enqueue(to_email, "Hello", "Body")
+        for _ in range(500):
+            stats = await queue.stats()
+            if stats["depth"]["inflight"] == 0 and settle(stats):
+                return stats
+            await asyncio.sleep(0.01)
+        raise AssertionError("queue did not drain")
+    finally:
+        await queue.stop()
+
+
+def test_queued_mail_is_delivered(tmp_path):
+    mail = FakeMailService()
+    queue = make_queue(tmp_path, mail)
+    stats = run(drain(queue, ["a@one.com", "b@two.com"]))
+    
+    assert sorted(mail.sent) == ["a@one.com", "b@two.com"]
+    assert stats["depth"]["sent"] == 2
+    assert stats["delivered"] == 2
+    queue.close()
+
+
+def test_transient_failures_are_retried(tmp_path):
+    mail = FakeMailService({"a@one.com": [ConnectionError("reset"), ConnectionError("reset")]})
+    queue = make_queue(tmp_path, mail, max_attempts=3)
+    stats = run(drain(queue, ["a@one.com"]))
+    
+    assert mail.sent == ["a@one.com"]
+    assert stats["retried"] == 2
+    assert stats["dead_lettered"] == 0
+    queue.close()
+
+
+def test_permanent_rejection_is_dead_lettered_at_once(tmp_path):
+    rejected = smtplib.SMTPRecipientsRefused({"a@one.com": (550, b"no such user")})
+    mail = FakeMailService({"a@one.com": [rejected]})
+    queue = make_queue(tmp_path, mail, max_attempts=5)
+    stats = run(drain(queue, ["a@one.com"]))
+    
+    assert stats["depth"]["dead"] == 1
+    assert stats["retried"] == 0
+    dead = run(queue.dead_letters())
+    assert dead[0]["to_email"] == "a@one.com"
+    assert dead[0]["attempts"] == 1
+    queue.close()
+
+
+def test_requeued_dead_letters_are_delivered(tmp_path):
+    mail = FakeMailService({"a@one.com": [ConnectionError("reset")] * 2})
+    queue = make_queue(tmp_path, mail, max_attempts=2)
+    run(drain(queue, ["a@one.com"], settle=lambda stats: stats["depth"]["dead"] == 1))
+    assert mail.sent == []
+    
+    assert run(queue.requeue_dead_letters()) == 1
+    stats = run(drain(queue, []))
+    assert mail.sent == ["a@one.com"]
+    assert stats["depth"] == {"pending": 0, "inflight": 0, "sent": 1, "dead": 0}
+    queue.close()
+
+
+def test_interrupted_delivery_is_pending_again_after_restart(tmp_path):
+    queue = make_queue(tmp_path, FakeMailService())
+    run(queue.enqueue("a@one.com", "Hello", "Body"))
+    assert queue._claim()[1] == "a@one.com"
+    queue.close()
+    
+    mail = FakeMailService()
+    restarted = make_queue(tmp_path, mail)
+    run(drain(restarted, []))
+    assert mail.sent == ["a@one.com"]
+    restarted.close()
+
+
+def test_deliveries_are_capped_per_domain(tmp_path):
+    mail = FakeMailService(delay=0.02)
+    queue = make_queue(tmp_path, mail, workers=6, domain_concurrency=2)
+    run(drain(queue, [f"lead{index}@same.com" for index in range(8)]))
+    
+    assert len(mail.sent) == 8
+    assert mail.max_active == 2
+    queue.close()
@@ -0,0 +1,93 @@
+"""Tests for pooled SMTP delivery."""
+import asyncio
+import smtplib
+import threading
+
+import pytest
+
+from app.services import mail_service
+from app.services.mail_service import MailService
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FakeSMTP:
+    """SMTP session that records messages; drop_next makes the next send see a dropped connection."""
+    
+    sessions = []
+    drop_next = False
+    
+    def __init__(self, host, port, timeout=None):
+        self.messages = []
+        self.threads = []
+        self.closed = False
+        FakeSMTP.sessions.append(self)
+    
+    def login(self, user, password):
+        pass
+    
+    def send_message(self, msg):
+        if FakeSMTP.drop_next:
+            FakeSMTP.drop_next = False
+            raise smtplib.SMTPServerDisconnected("idle timeout")
+        self.threads.append(threading.get_ident())
+        self.messages.append(msg["To"])
+    
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def service(monkeypatch):
+    FakeSMTP.sessions = []
+    FakeSMTP.drop_next = False
+    monkeypatch.setattr(mail_service.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(mail_service.settings, "SMTP_POOL_SIZE", 1)
+    monkeypatch.setattr(mail_service.settings, "SMTP_MAX_MESSAGES_PER_CONNECTION", 3)
+    service = MailService()
+    yield service
+    service.close()
+
+
+def test_connection_is_reused_until_its_message_limit(service):
+    for index in range(4):
+        service.deliver(f"lead{index}@example.com", "Hello", "Body")
+    
+    assert [len(session.messages) for session in FakeSMTP.sessions] == [3, 1]
+    assert FakeSMTP.sessions[0].closed
+    assert service.stats()["connections_opened"] == 2
+
+
+def test_stale_connection_is_reopened_once(service):
+    service.deliver("lead0@example.com", "Hello", "Body")
+    FakeSMTP.drop_next = True
+    service.deliver("lead1@example.com", "Hello", "Body")
+    
+    assert service.reconnects == 1
+    assert FakeSMTP.sessions[-1].messages == ["lead1@example.com"]
+    assert service.sent == 2 and service.failed == 0
+
+
+def test_async_delivery_runs_on_the_smtp_threads(service):
+    async def send():
+        await service.deliver_async("lead0@example.com", "Hello", "Body")
+        return await service.send_email_async("lead1@example.com", "Hello", "Body")
+    
+    assert run(send()) is True
+    assert threading.get_ident() not in FakeSMTP.sessions[0].threads
+
+
+def test_failed_delivery_is_reported(service, monkeypatch):
+    def refuse(self, msg):
+        raise smtplib.SMTPRecipientsRefused({msg["To"]: (550, b"no such user")})
+    
+    monkeypatch.setattr(FakeSMTP, "send_message", refuse)
+    
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        service.deliver("lead0@example.com", "Hello", "Body")
+    assert service.send_email("lead1@example.com", "Hello", "Body") is False
+    assert service.failed == 2
+    # A failed session is not handed to the next message
+    assert all(session.closed for session in FakeSMTP.sessions)
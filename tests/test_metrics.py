@@ -0,0 +1,60 @@
+"""Tests for the Prometheus text metrics and the /metrics endpoint."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.utils.metrics import Registry, timed_chunks
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("stage_seconds", "Stage latency.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("scoring").observe(value)
+    
+    assert registry.render().splitlines() == [
+        "# HELP stage_seconds Stage latency.",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="scoring",le="0.1"} 2',
+        'stage_seconds_bucket{stage="scoring",le="1"} 3',
+        'stage_seconds_bucket{stage="scoring",le="+Inf"} 4',
+        'stage_seconds_sum{stage="scoring"} 3.65',
+        'stage_seconds_count{stage="scoring"} 4',
+    ]
+
+
+def test_counters_and_gauges_escape_label_values():
+    registry = Registry()
+    errors = registry.counter("errors_total", "Errors.", ["message"])
+    errors.labels('bad "quote"\n').inc()
+    errors.labels('bad "quote"\n').inc(2)
+    registry.gauge("depth", "Queue depth.").set(1.5)
+    
+    lines = registry.render().splitlines()
+    assert 'errors_total{message="bad \\"quote\\"\\n"} 3' in lines
+    assert "depth 1.5" in lines
+
+
+def test_metric_families_are_registered_once():
+    registry = Registry()
+    first = registry.counter("requests_total", "Requests.", ["task"])
+    
+    assert registry.counter("requests_total", "Requests.", ["task"]) is first
+    with pytest.raises(ValueError):
+        first.labels("scoring", "extra")
+
+
+def test_timed_chunks_observes_each_chunk():
+    series = Registry().histogram("read_seconds", "Chunk reads.").labels()
+    
+    assert list(timed_chunks(iter([[1], [2], [3]]), series)) == [[1], [2], [3]]
+    assert sum(series.counts) == 3
+
+
+def test_metrics_endpoint_serves_the_text_format():
+    response = TestClient(main.app).get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE llm_concurrency_limit gauge" in response.text
+    assert 'llm_backend_health{backend="groq"} 1' in response.text
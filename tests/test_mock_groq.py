@@ -0,0 +1,74 @@
+"""Tests that the benchmark mock server understands every prompt the services send."""
+import asyncio
+
+import pytest
+
+from app.models import Lead
+from app.services.campaign_stats import CampaignStats
+from app.services.email_agent import EmailAgent
+from app.services.lead_profiler import LeadProfiler
+from app.services.lead_scoring import LeadScoringService
+from app.services.llm_service import LLMService
+from app.services.persona_agent import PersonaAgent
+from app.services.report_generator import ReportGenerator
+from app.services.response_classifier import ResponseClassifier
+from benchmarks.mock_groq import MockGroqServer, canned_completion
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def server():
+    server = MockGroqServer(latency_ms=0, latency_distribution="fixed")
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_leads(count):
+    return [
+        Lead(name=f"Lead {index}", email=f"lead{index}@example.com", company="Acme",
+             industry="Retail", job_title="Director", status="New")
+        for index in range(count)
+    ]
+
+
+def test_unknown_prompts_get_an_empty_object():
+    assert canned_completion("Tell me a joke") == ("unknown", "{}")
+
+
+def test_every_service_prompt_is_recognised(server, tmp_path):
+    async def main():
+        llm = LLMService()
+        llm.backends.primary.api_url = server.url
+        persona_agent = PersonaAgent(llm)
+        scoring = LeadScoringService(llm)
+        lead, *batch = make_leads(4)
+        try:
+            await scoring.score_lead(lead)
+            await scoring.score_leads(batch)
+            await persona_agent.enrich_lead(lead)
+            await persona_agent.enrich_leads(batch)
+            await LeadProfiler(llm, persona_agent, scoring).profile_lead(lead)
+            email = await EmailAgent(llm).generate_email(lead)
+            classifier = ResponseClassifier(llm)
+            await classifier.classify_response(lead)
+            await classifier.classify_responses(batch)
+            stats = CampaignStats()
+            stats.add(lead)
+            await ReportGenerator(llm, str(tmp_path)).generate_report(stats)
+        finally:
+            await llm.shutdown()
+        return email
+    
+    email = run(main())
+    counters = server.counters()
+    
+    assert "Lead 0" in email["body"]
+    assert set(counters["requests"]) == {
+        "scoring", "scoring_batch", "enrichment", "enrichment_batch", "profile",
+        "email", "classification", "classification_batch", "summary"
+    }
+    assert counters["statuses"] == {"200": counters["total"]}
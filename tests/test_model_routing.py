@@ -0,0 +1,43 @@
+"""Tests for routing LLM requests to models by task and lead priority."""
+import pytest
+
+from app.models import Priority
+from app.services.model_routing import ModelRouter
+
+
+def make_router(routes):
+    return ModelRouter(routes, "big-model", {"large": "big-model", "small": "tiny-model"})
+
+
+def test_priority_route_wins_over_task_and_wildcard_routes():
+    router = make_router("email:High=large,email=small,*=small,*:High=custom-model")
+    
+    assert router.model_for("email", Priority.HIGH) == "big-model"
+    assert router.model_for("email", "Low") == "tiny-model"
+    assert router.model_for("scoring", "high") == "custom-model"
+    assert router.model_for("scoring") == "tiny-model"
+
+
+def test_requests_without_a_route_use_the_default_model():
+    router = make_router("classification=small")
+    
+    assert router.model_for("email", Priority.LOW) == "big-model"
+    assert router.model_for(None) == "big-model"
+
+
+def test_route_counts_decisions():
+    router = make_router("classification=small")
+    router.route("classification", Priority.HIGH)
+    router.route("classification", Priority.HIGH)
+    router.route("email")
+    
+    assert router.stats()["requests"] == [
+        {"task": "classification", "priority": "High", "model": "tiny-model", "count": 2},
+        {"task": "email", "priority": "any", "model": "big-model", "count": 1},
+    ]
+
+
+@pytest.mark.parametrize("spec", ["email", "=small", "email="])
+def test_invalid_routes_are_rejected(spec):
+    with pytest.raises(ValueError):
+        make_router(spec)
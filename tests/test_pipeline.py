@@ -0,0 +1,167 @@
+"""Tests for the staged lead pipeline."""
+import asyncio
+
+import pytest
+
+from app.services.pipeline import LeadPipeline, PipelineStage
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_outputs_keep_input_order_under_uneven_latency():
+    async def slow_for_small_values(value):
+        # Early items take longest, so they finish last
+        await asyncio.sleep(0.002 * (20 - value))
+        return value * 10
+    
+    async def add_one(value):
+        await asyncio.sleep(0.001 * (value % 3))
+        return value + 1
+    
+    pipeline = LeadPipeline([
+        PipelineStage("multiply", slow_for_small_values, concurrency=8),
+        PipelineStage("add", add_one, concurrency=4),
+    ])
+    items = run(pipeline.run(range(20)))
+    
+    assert [item.index for item in items] == list(range(20))
+    assert [item.value for item in items] == [value * 10 + 1 for value in range(20)]
+    assert all(item.ok for item in items)
+
+
+def test_failure_stays_with_its_item():
+    calls = []
+    
+    async def explode_on_three(value):
+        if value == 3:
+            raise ValueError("bad lead")
+        return value
+    
+    async def record(value):
+        calls.append(value)
+        return value
+    
+    pipeline = LeadPipeline([
+        PipelineStage("first", explode_on_three, concurrency=2),
+        PipelineStage("second", record, concurrency=2),
+    ])
+    items = run(pipeline.run(range(6)))
+    
+    failed = [item for item in items if not item.ok]
+    assert [item.index for item in failed] == [3]
+    assert failed[0].failed_stage == "first"
+    assert isinstance(failed[0].error, ValueError)
+    # The failed item skips later stages, the others are unaffected
+    assert sorted(calls) == [0, 1, 2, 4, 5]
+    assert [item.value for item in items if item.ok] == [0, 1, 2, 4, 5]
+
+
+def test_batch_handler_failure_marks_only_that_item():
+    async def single(value):
+        return value
+    
+    async def batch(values):
+        return [ValueError("no") if value == 2 else value * 2 for value in values]
+    
+    pipeline = LeadPipeline([
+        PipelineStage("double", single, concurrency=1, batch_handler=batch, batch_size=4, batch_linger=0.01),
+    ])
+    items = run(pipeline.run(range(5)))
+    
+    assert [item.ok for item in items] == [True, True, False, True, True]
+    assert [item.value for item in items if item.ok] == [0, 2, 6, 8]
+
+
+def test_bounded_queues_apply_backpressure():
+    fed = []
+    
+    async def main():
+        release = asyncio.Event()
+        
+        async def source():
+            for value in range(100):
+                fed.append(value)
+                yield value
+        
+        async def blocked(value):
+            await release.wait()
+            return value
+        
+        pipeline = LeadPipeline([PipelineStage("blocked", blocked, concurrency=1)], queue_size=2, max_in_flight=500)
+        consumer = asyncio.create_task(pipeline.run(source()))
+        await asyncio.sleep(0.05)
+        # One item in the handler, the bounded inbox full, one waiting to be put
+        stalled_at = len(fed)
+        release.set()
+        items = await consumer
+        return stalled_at, items
+    
+    stalled_at, items = run(main())
+    assert stalled_at <= 5
+    assert len(items) == 100
+
+
+def test_max_in_flight_limits_unfinished_items():
+    fed = []
+    
+    async def main():
+        first_done = asyncio.Event()
+        
+        async def source():
+            for value in range(50):
+                fed.append(value)
+                yield value
+        
+        async def hold_first(value):
+            # The first item is held, so none of the later ones can be yielded
+            if value == 0:
+                await first_done.wait()
+            return value
+        
+        pipeline = LeadPipeline([PipelineStage("hold", hold_first, concurrency=8)], queue_size=50, max_in_flight=10)
+        consumer = asyncio.create_task(pipeline.run(source()))
+        await asyncio.sleep(0.05)
+        stalled_at = len(fed)
+        first_done.set()
+        return stalled_at, await consumer
+    
+    stalled_at, items = run(main())
+    assert stalled_at <= 11
+    assert [item.value for item in items] == list(range(50))
+
+
+def test_resume_skips_completed_stages():
+    calls = []
+    
+    async def stage_a(value):
+        calls.append(("a", value))
+        return value + 1
+    
+    async def stage_b(value):
+        calls.append(("b", value))
+        return value * 2
+    
+    def resume(source):
+        # Item 1 already went through stage a in an earlier run
+        return (100, ["a"]) if source == 1 else None
+    
+    pipeline = LeadPipeline([PipelineStage("a", stage_a), PipelineStage("b", stage_b)])
+    items = run(pipeline.run([0, 1], resume=resume))
+    
+    assert [item.value for item in items] == [2, 200]
+    assert ("a", 1) not in calls
+
+
+def test_input_errors_are_raised():
+    def broken():
+        yield 1
+        raise RuntimeError("read failed")
+    
+    async def identity(value):
+        return value
+    
+    pipeline = LeadPipeline([PipelineStage("identity", identity)])
+    with pytest.raises(RuntimeError, match="read failed"):
+        run(pipeline.run(broken()))
@@ -0,0 +1,211 @@
+"""Tests for the LLM rate limiter and its token accounting."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.llm_service import LLMService
+from app.utils.rate_limiter import AdaptiveConcurrencyLimiter, RateLimiter, TokenBucket, parse_duration
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_parse_duration():
+    assert parse_duration("7.66s") == pytest.approx(7.66)
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("120") == 120
+    assert parse_duration("250ms") == pytest.approx(0.25)
+    assert parse_duration(None) is None
+
+
+def test_token_bucket_returns_amount_taken():
+    async def main():
+        bucket = TokenBucket(100)
+        taken = await bucket.acquire(40)
+        # Requests larger than the bucket are capped at its capacity
+        oversized = await TokenBucket(100).acquire(500)
+        disabled = await TokenBucket(0).acquire(500)
+        return bucket, taken, oversized, disabled
+    
+    bucket, taken, oversized, disabled = run(main())
+    assert taken == 40
+    assert bucket.tokens == pytest.approx(60, abs=0.1)
+    assert oversized == 100
+    assert disabled == 0
+    bucket.refund(1000)
+    assert bucket.tokens == 100
+
+
+def test_aimd_grows_on_success_and_halves_once_per_cooldown():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=8, cooldown=60)
+        for _ in range(4):
+            await limiter.acquire()
+            await limiter.release()
+        grown = limiter.limit
+        
+        await limiter.acquire()
+        await limiter.acquire()
+        await limiter.release(rate_limited=True)
+        halved = limiter.limit
+        # A second 429 of the same burst is not another congestion signal
+        await limiter.release(rate_limited=True)
+        return grown, halved, limiter
+    
+    grown, halved, limiter = run(main())
+    assert 4.8 < grown < 5
+    assert halved == pytest.approx(grown / 2)
+    assert limiter.limit == pytest.approx(halved)
+    assert limiter.in_flight == 0
+
+
+def test_aimd_respects_bounds_and_unadjusted_release():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=2, maximum=3, cooldown=0)
+        for _ in range(20):
+            await limiter.acquire()
+            await limiter.release()
+        maximum = limiter.limit
+        await limiter.acquire()
+        await limiter.release(rate_limited=True)
+        minimum = limiter.limit
+        await limiter.acquire()
+        await limiter.release(adjust=False)
+        return maximum, minimum, limiter.limit
+    
+    maximum, minimum, unadjusted = run(main())
+    assert maximum == 3
+    assert minimum == 2
+    assert unadjusted == 2
+
+
+def test_concurrency_window_blocks_extra_requests():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=1, maximum=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        blocked = not waiter.done()
+        await limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        return blocked, limiter.in_flight
+    
+    blocked, in_flight = run(main())
+    assert blocked
+    assert in_flight == 2
+
+
+def test_cancel_while_waiting_for_a_slot_takes_no_quota():
+    async def main():
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=6000,
+                              initial_concurrency=1, min_concurrency=1, max_concurrency=1)
+        await limiter.acquire(1000)
+        waiter = asyncio.create_task(limiter.acquire(1000))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return limiter
+    
+    limiter = run(main())
+    assert limiter.requests.tokens == pytest.approx(59, abs=0.1)
+    assert limiter.tokens.tokens == pytest.approx(5000, abs=1)
+    assert limiter.concurrency.in_flight == 1
+
+
+def test_cancel_while_waiting_for_tokens_gives_back_quota_and_slot():
+    async def main():
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=100,
+                              initial_concurrency=4, min_concurrency=1, max_concurrency=4)
+        await limiter.acquire(100)
+        waiter = asyncio.create_task(limiter.acquire(50))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return limiter
+    
+    limiter = run(main())
+    # The request token taken by the cancelled waiter is refunded
+    assert limiter.requests.tokens == pytest.approx(59, abs=0.1)
+    assert limiter.concurrency.in_flight == 1
+    assert limiter.concurrency.limit == 4
+
+
+def _completion(prompt_tokens: int, completion_tokens: int) -> dict:
+    return {
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "hello"}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+    }
+
+
+def test_rate_limited_retries_refund_their_reservation():
+    calls = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, json=_completion(10, 5))
+    
+    async def main():
+        service = LLMService()
+        service.rate_limiter.tokens = TokenBucket(60000)
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            text = await service.generate("Say hello")
+        finally:
+            await service._client.aclose()
+        return service, text
+    
+    service, text = run(main())
+    assert text == "hello"
+    assert len(calls) == 3
+    # Only the usage of the successful attempt stays charged
+    assert service.rate_limiter.tokens.tokens == pytest.approx(60000 - 15, abs=5)
+    assert service.rate_limiter.concurrency.in_flight == 0
+
+
+def test_failed_request_refunds_every_attempt():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+    
+    async def main():
+        service = LLMService()
+        service.max_retries = 1
+        service.rate_limiter.tokens = TokenBucket(60000)
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            with pytest.raises(Exception, match="Failed to generate"):
+                await service.generate("Say hello")
+        finally:
+            await service._client.aclose()
+        return service
+    
+    service = run(main())
+    assert service.rate_limiter.tokens.tokens == pytest.approx(60000, abs=5)
+
+
+def test_cancelled_request_does_not_grow_the_window():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(10)
+        return httpx.Response(200, json=_completion(10, 5))
+    
+    async def main():
+        service = LLMService()
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        limit = service.rate_limiter.concurrency.limit
+        task = asyncio.create_task(service.generate("Say hello"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await service._client.aclose()
+        return service, limit
+    
+    service, limit = run(main())
+    assert service.rate_limiter.concurrency.in_flight == 0
+    assert service.rate_limiter.concurrency.limit == limit
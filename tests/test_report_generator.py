@@ -0,0 +1,83 @@
+"""Tests for writing the campaign summary report."""
+import asyncio
+import os
+
+from app.models import Lead, Priority
+from app.services.campaign_stats import CampaignStats
+from app.services.report_generator import ReportGenerator
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class StreamingLLM:
+    """Streams the given chunks, raising an Exception instance in place of one."""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+    
+    async def generate_stream(self, prompt, task=None):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+def make_stats():
+    stats = CampaignStats()
+    stats.add(Lead(name="Ada", email="ada@example.com", score=9, priority=Priority.HIGH, persona="Decision Maker"))
+    return stats
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_complete_report_replaces_the_previous_one(tmp_path):
+    generator = ReportGenerator(StreamingLLM(["Great ", "campaign."]), str(tmp_path))
+    path = run(generator.generate_report(make_stats()))
+    
+    report = read(path)
+    assert "**Total Leads Processed:** 1" in report
+    assert "Great campaign." in report
+    assert report.endswith("*Report generated automatically by AI Sales CRM*\n")
+    assert os.listdir(tmp_path) == ["campaign_summary.md"]
+
+
+def test_abandoned_stream_keeps_the_last_complete_report(tmp_path):
+    generator = ReportGenerator(StreamingLLM(["Old summary."]), str(tmp_path))
+    run(generator.generate_report(make_stats()))
+    previous = read(generator.report_path)
+    
+    async def disconnect():
+        generator.llm_service = StreamingLLM(["New ", "summary ", "never finished."])
+        stream = generator.stream_report(make_stats())
+        await stream.__anext__()
+        await stream.__anext__()
+        await stream.aclose()
+    
+    run(disconnect())
+    assert read(generator.report_path) == previous
+    assert os.listdir(tmp_path) == ["campaign_summary.md"]
+
+
+def test_failed_summary_falls_back_to_the_statistics(tmp_path):
+    generator = ReportGenerator(StreamingLLM([RuntimeError("provider down")]), str(tmp_path))
+    report = read(run(generator.generate_report(make_stats())))
+    
+    assert "Campaign processed 1 leads with an average score of 9.00." in report
+
+
+def test_concurrent_reports_do_not_interleave(tmp_path):
+    async def both():
+        first = ReportGenerator(StreamingLLM(["first "] * 20), str(tmp_path))
+        second = ReportGenerator(StreamingLLM(["second "] * 20), str(tmp_path))
+        await asyncio.gather(first.generate_report(make_stats()), second.generate_report(make_stats()))
+    
+    run(both())
+    report = read(tmp_path / "campaign_summary.md")
+    assert ("first " * 20 in report) != ("second " * 20 in report)
+    assert report.count("*Report generated automatically") == 1
@@ -0,0 +1,91 @@
+"""Tests for schema-validated LLM output and its targeted repair."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.models import ScoringResponse
+from app.services.llm_service import LLMService
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def scripted_service(answers, repair=True):
+    """Service whose provider returns the given answers in turn and records the prompts."""
+    prompts = []
+    
+    def handler(request):
+        body = json.loads(request.content)
+        prompts.append(body["messages"][-1]["content"])
+        content = answers[len(prompts) - 1]
+        return httpx.Response(200, json={
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5}
+        })
+    
+    service = LLMService()
+    service.repair_enabled = repair
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service, prompts
+
+
+def generate(service, method, *args, **kwargs):
+    async def main():
+        try:
+            return await getattr(service, method)(*args, **kwargs)
+        finally:
+            await service._client.aclose()
+    return run(main())
+
+
+def test_valid_answer_is_coerced_and_counted():
+    service, prompts = scripted_service(['{"score": "8/10", "reasoning": "fits"}'])
+    result = generate(service, "generate_json", "Score this lead", task="scoring", schema=ScoringResponse)
+    
+    assert result == {"score": 8, "reasoning": "fits"}
+    assert len(prompts) == 1
+    assert service.structured_output["scoring"]["valid"] == 1
+
+
+def test_invalid_field_is_repaired_with_one_short_request():
+    service, prompts = scripted_service([
+        '{"score": 42, "reasoning": "keeps this"}',
+        '{"score": 6, "reasoning": "must not replace the original"}',
+    ])
+    result = generate(service, "generate_json", "Score this lead", task="scoring", schema=ScoringResponse)
+    
+    assert result == {"score": 6, "reasoning": "keeps this"}
+    assert len(prompts) == 2
+    # Only the invalid field is asked for again
+    assert '"score"' in prompts[1]
+    assert '"reasoning"' not in prompts[1]
+    assert service.structured_output["scoring"]["repaired"] == 1
+
+
+def test_unrepairable_answer_raises_value_error():
+    service, prompts = scripted_service(["no idea", "still no idea"])
+    
+    with pytest.raises(ValueError, match="after repair"):
+        generate(service, "generate_json", "Score this lead", task="scoring", schema=ScoringResponse)
+    assert service.structured_output["scoring"]["failed"] == 1
+
+
+def test_without_repair_an_invalid_answer_fails_at_once():
+    service, prompts = scripted_service(['{"score": 42}'], repair=False)
+    
+    with pytest.raises(ValueError, match="Invalid scoring response"):
+        generate(service, "generate_json", "Score this lead", task="scoring", schema=ScoringResponse)
+    assert len(prompts) == 1
+
+
+def test_batch_items_failing_validation_are_left_out():
+    service, prompts = scripted_service([
+        '{"results": [{"id": "L1", "score": 7}, {"id": "L2", "score": "high"}, {"id": "L3", "score": 2,}]}'
+    ])
+    results = generate(service, "generate_json_batch", "Score these leads", task="scoring", schema=ScoringResponse)
+    
+    assert sorted(results) == ["L1", "L3"]
+    assert results["L1"]["score"] == 7
@@ -0,0 +1,173 @@
+"""Tests for campaign token accounting and budgets."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.models import Lead, Priority
+from app.services.lead_profiler import LeadProfiler
+from app.services.lead_scoring import LeadScoringService
+from app.services.llm_service import LLMService
+from app.services.persona_agent import PersonaAgent
+from app.services.token_budget import TokenBudget, TokenBudgetExceeded
+from app.utils.rate_limiter import TokenBucket
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_settle_replaces_the_reservation_with_the_reported_usage():
+    budget = TokenBudget(1000)
+    budget.reserve(300, "email")
+    assert budget.remaining == 700
+    
+    budget.settle(300, prompt_tokens=120, completion_tokens=40, task="email")
+    
+    assert budget.reserved == 0
+    assert budget.used == 160
+    assert budget.remaining == 840
+    assert budget.by_task == {"email": 160}
+
+
+def test_reservations_in_flight_cannot_overrun_the_limit():
+    budget = TokenBudget(100)
+    budget.reserve(60, "scoring")
+    
+    with pytest.raises(TokenBudgetExceeded):
+        budget.reserve(60, "scoring")
+    budget.release(60)
+    budget.reserve(60, "scoring")
+    
+    data = budget.to_dict()
+    assert data["refused_requests"] == 1
+    assert data["exhausted"] is True
+
+
+def test_unlimited_budget_only_counts():
+    budget = TokenBudget()
+    budget.reserve(10 ** 9)
+    budget.settle(10 ** 9, 5, 5)
+    
+    assert budget.remaining == -1
+    assert budget.to_dict()["budget"] is None
+    assert budget.to_dict()["exhausted"] is False
+
+
+def test_shard_budgets_merge_into_the_campaign_totals():
+    shards = []
+    for prompt_tokens in (100, 200):
+        shard = TokenBudget()
+        shard.settle(0, prompt_tokens, 10, "scoring")
+        shards.append(shard.to_dict())
+    
+    campaign = TokenBudget(5000)
+    for shard in shards:
+        campaign.merge(shard)
+    
+    assert campaign.prompt_tokens == 300
+    assert campaign.completion_tokens == 20
+    assert campaign.by_task == {"scoring": 320}
+    assert campaign.requests == 2
+
+
+def _service(handler):
+    service = LLMService()
+    service.rate_limiter.tokens = TokenBucket(60000)
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def test_service_charges_reported_usage_to_the_budget():
+    def handler(request):
+        return httpx.Response(200, json={
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "hello"}}],
+            "usage": {"prompt_tokens": 30, "completion_tokens": 7}
+        })
+    
+    async def main():
+        service = _service(handler)
+        budget = service.start_token_budget(100000)
+        try:
+            await service.generate("Say hello", task="email")
+        finally:
+            service.stop_token_budget()
+            await service._client.aclose()
+        return budget
+    
+    budget = run(main())
+    assert budget.used == 37
+    assert budget.reserved == 0
+    assert budget.by_task == {"email": 37}
+
+
+def test_refused_request_is_never_sent():
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+    
+    async def main():
+        service = _service(handler)
+        budget = service.start_token_budget(10)
+        try:
+            with pytest.raises(TokenBudgetExceeded):
+                await service.generate("Say hello", task="email")
+        finally:
+            service.stop_token_budget()
+            await service._client.aclose()
+        return budget
+    
+    budget = run(main())
+    assert calls == []
+    assert budget.refused == 1
+
+
+def test_failed_request_releases_its_reservation():
+    def handler(request):
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+    
+    async def main():
+        service = _service(handler)
+        service.max_retries = 1
+        budget = service.start_token_budget(100000)
+        try:
+            with pytest.raises(Exception, match="Failed to generate"):
+                await service.generate("Say hello", task="email")
+        finally:
+            service.stop_token_budget()
+            await service._client.aclose()
+        return budget
+    
+    budget = run(main())
+    assert budget.reserved == 0
+    assert budget.used == 0
+
+
+def test_fused_profile_past_the_budget_uses_the_rule_based_results():
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+    
+    lead = Lead(name="Ada", email="ada@example.com", company="Acme", industry="Finance",
+                job_title="CEO", status="Active")
+    
+    async def main():
+        service = _service(handler)
+        profiler = LeadProfiler(service, PersonaAgent(service), LeadScoringService(service))
+        budget = service.start_token_budget(10)
+        try:
+            return await profiler.profile_lead(lead), budget
+        finally:
+            service.stop_token_budget()
+            await service._client.aclose()
+    
+    profile, budget = run(main())
+    assert calls == []
+    # Only the fused request was refused, the two-call path was not tried
+    assert budget.refused == 1
+    assert profile["persona"] == "Decision Maker"
+    assert (profile["score"], profile["priority"]) == (10, Priority.HIGH)